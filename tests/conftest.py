@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def root():
+    """A hidden Tk root; tests needing widgets are skipped without a display"""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"Tk unavailable: {e}")
+    root.withdraw()
+    yield root
+    root.destroy()
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from themed_table import (_column_index, _column_letter, _evaluate_formula,
+                          _evaluate_formula_values, _translate_formula)
+
+CELLS = {(0, 0): 1.0, (1, 0): 'a', (2, 0): 3.0, (0, 1): 4.0}
+
+
+def get_value(row, col):
+    return CELLS.get((row, col))  # None for empty cells
+
+
+@pytest.mark.parametrize('formula, expected', [
+    ('=SUM(A1:B1)+1', 6.0),
+    ('=MEDIAN(A1:A3)', 2.0),
+    ('=COUNTIF(A1:A3,">1")', 1),
+    ('=SUMIF(A1:A3,">0")', 4.0),
+    ('=ROUND(2.345, 2)', 2.35),
+    ('=COUNTA(A1:A5)', 3),
+    ('=COUNTBLANK(A1:A5)', 2),
+    ('=A5+1', 1),
+    ('plain text', 'plain text'),
+])
+def test_evaluate(formula, expected):
+    assert _evaluate_formula(formula, get_value) == expected
+
+
+def test_blank_counts_match_the_grid_path():
+    grid = np.full((5, 2), np.nan)
+    grid[0, 0], grid[2, 0], grid[0, 1] = 1.0, 3.0, 4.0
+    for formula in ('=COUNTA(A1:B5)', '=COUNTBLANK(A1:B5)', '=COUNT(A1:B5)'):
+        expected = _evaluate_formula_values(grid, {(1, 0): 'a'}, [(9, 0, formula)])[0][2]
+        assert _evaluate_formula(formula, get_value) == expected
+
+
+def test_errors_are_values():
+    assert _evaluate_formula('=A1/0', get_value).startswith('#ERROR')
+    assert _evaluate_formula('=SUM(', get_value).startswith('#ERROR')
+
+
+def test_translate_formula_ranges():
+    assert _translate_formula('=SUM(A1:B3)*C4')[1] == ((0, 0, 2, 1), (3, 2, 3, 2))
+
+
+def test_column_letters():
+    for col in (0, 25, 26, 701, 702):
+        assert _column_index(_column_letter(col)) == col
+    assert _column_letter(26) == 'AA'
+
+
+def test_grid_evaluation_matches_getter():
+    grid = np.full((3, 2), np.nan)
+    grid[0, 0], grid[2, 0], grid[0, 1] = 1.0, 3.0, 4.0
+    batch = [(5, 0, '=SUM(A1:B3)'), (5, 1, '=A2')]
+    assert _evaluate_formula_values(grid, {(1, 0): 'a'}, batch) == [(5, 0, 8.0), (5, 1, 'a')]
+
+
+def test_formula_graph_cached_until_formulas_change(root):
+    from themed_table import Table
+    table = Table(root, rows=4, cols=2, spreadsheet_mode=True)
+    try:
+        table.paste("1\t=A1*2\n2\t=B1+A2", 0, 0)
+        graph = table._formula_graph()
+        table.set_cell(0, 0, '5')
+        assert table._formula_graph() is graph
+        assert float(table.get_cell(1, 1)['value']) == 12
+        table.paste("=B2", 2, 1)
+        assert set(table._formula_graph()[0][(2, 1)]) == {(1, 1)}
+        table.undo()
+        assert (2, 1) not in table._formula_graph()[0]
+    finally:
+        table.destroy()
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+
+from themed_table import _Journal
+
+
+def write(path, records):
+    journal = _Journal(path)
+    for record in records:
+        journal.record(record)
+    journal.close()
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "table.journal")
+    records = [('checkpoint', 2, ['a', 'b']), ('set', 0, 1, 'x'), ('set_many', np.arange(3), 0, ['p', 'q', 'r'])]
+    write(path, records)
+    read = list(_Journal.read(path))
+    assert read[:2] == records[:2]
+    assert read[2][1].tolist() == [0, 1, 2] and read[2][2:] == (0, ['p', 'q', 'r'])
+
+
+def test_checkpoint_replaces_file(tmp_path):
+    path = str(tmp_path / "table.journal")
+    write(path, [('checkpoint', 1), ('set', 0, 0, 'old'), ('checkpoint', 2), ('set', 0, 0, 'new')])
+    assert list(_Journal.read(path)) == [('checkpoint', 2), ('set', 0, 0, 'new')]
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    path = str(tmp_path / "table.journal")
+    write(path, [('checkpoint', 1), ('set', 0, 0, 'kept'), ('set', 0, 0, 'torn')])
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 3)
+    assert list(_Journal.read(path)) == [('checkpoint', 1), ('set', 0, 0, 'kept')]
+    with open(path, 'r+b') as f:
+        f.truncate(2)  # Not even a whole length prefix
+    assert list(_Journal.read(path)) == []
+
+
+def test_writer_error_is_reported(tmp_path):
+    path = str(tmp_path / "table.journal")
+    journal = _Journal(path)
+    journal.record(('checkpoint', 1))
+    journal.record(('set', 0, 0, lambda: None))  # Can't be pickled
+    journal.record(('set', 0, 0, 'after'))
+    with pytest.raises(OSError, match="stopped"):
+        journal.close()
+    assert journal.error is not None
+    # Nothing after the failed record reaches the file
+    assert list(_Journal.read(path)) == [('checkpoint', 1)]
+
+
+def test_record_before_checkpoint_fails(tmp_path):
+    journal = _Journal(str(tmp_path / "table.journal"))
+    journal.record(('set', 0, 0, 'x'))
+    with pytest.raises(OSError):
+        journal.close()
+    assert isinstance(journal.error, ValueError)
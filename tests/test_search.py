@@ -0,0 +1,44 @@
+import numpy as np
+
+from themed_table import Table, _ColumnStore, _SearchIndex, _replace_values
+
+
+def test_replace_values_keeps_unmatched_numbers():
+    values = np.array([123, 'a2', 4.5, ''], dtype=object)
+    new, changed = _replace_values(values, '2', 'x')
+    assert new.tolist() == ['1x3', 'ax', '4.5', '']
+    assert changed.tolist() == [True, True, False, False]
+
+
+def test_replace_values_case():
+    values = np.array(['Total', 'total'], dtype=object)
+    assert _replace_values(values, 'total', 'sum')[0].tolist() == ['sum', 'sum']
+    assert _replace_values(values, 'total', 'sum', case_sensitive=True)[1].tolist() == [False, True]
+
+
+def test_search_index_follows_edits():
+    store = _ColumnStore(5, 2)
+    for row, value in enumerate(['apple pie', 'Apple', 'banana', '', 'pineapple']):
+        store.set(row, 0, value)
+    index = _SearchIndex(store)
+    assert index.find_rows(0, 'apple').tolist() == [0, 1, 4]
+    assert index.find_rows(0, 'Apple', case_sensitive=True).tolist() == [1]
+    assert index.find_rows(0, r'^a', regex=True).tolist() == [0, 1]
+    store.set(2, 0, 'apple tart')
+    store.set(0, 0, 'cherry')
+    assert index.find_rows(0, 'apple').tolist() == [1, 2, 4]
+    index.close()
+    assert index not in store.watchers
+
+
+def test_replace_all_on_numeric_column(root):
+    data = np.array([[123, 'a2'], [4.5, 'b'], [7, 'c']], dtype=object)
+    table = Table(root, rows=0, cols=0)
+    try:
+        table.load_provider(lambda start, stop, cols: data[start:stop][:, cols], row_count=len(data), column_count=2)
+        assert table.replace_all('2', 'x') == 2
+        assert table.get_values()['array'].tolist() == [['1x3', 'ax'], ['4.5', 'b'], ['7', 'c']]
+        table.undo()
+        assert table.get_values()['array'][:, 0].tolist() == ['123', '4.5', '7']
+    finally:
+        table.destroy()
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from themed_table import _CellStyle, _CellStyles, _ProviderStore, _SparseStore
+
+
+def test_sparse_store_keeps_only_filled_cells():
+    store = _SparseStore(1000, 3)
+    store.set(10, 1, 'a')
+    store.set_many(np.array([5, 500]), 2, ['b', 'c'])
+    assert store.count() == 3
+    assert store.get(10, 1) == 'a' and store.get(11, 1) == ''
+    assert store.values(np.array([5, 6, 500]), 2).tolist() == ['b', '', 'c']
+    store.set(10, 1, '')
+    assert store.count() == 2
+
+
+def test_sparse_store_rows_and_snapshot():
+    store = _SparseStore(5, 2)
+    store.set(3, 1, 'x')
+    snapshot = store.snapshot()
+    store.insert_rows(0, 2)
+    assert store.rows == 7 and store.get(5, 1) == 'x'
+    store.delete_rows([0, 1, 5])
+    assert store.rows == 4 and store.count() == 0
+    store.restore(snapshot)
+    assert store.rows == 5 and store.get(3, 1) == 'x'
+
+
+def test_cell_styles_interned():
+    styles = _CellStyles(4, 2)
+    bold = styles.intern(_CellStyle(bold=True))
+    assert styles.intern(_CellStyle(bold=True)) == bold != 0
+    assert styles.columns == [None, None]  # Nothing styled yet
+    styles.set([1, 2], 1, bold)
+    assert styles.columns[1].dtype == np.uint16
+    assert styles.ids(np.arange(4), 1).tolist() == [0, bold, bold, 0]
+    assert styles.get(0, 0) == 0
+
+
+def test_cell_styles_follow_rows_and_columns():
+    styles = _CellStyles(3, 2)
+    red = styles.intern(_CellStyle(fg='red'))
+    styles.set([0], 0, red)
+    styles.insert_rows(0)
+    styles.insert_cols(0)
+    assert styles.get(1, 1) == red and styles.rows == 4
+    snapshot = styles.snapshot()
+    styles.delete_rows([1])
+    styles.swap_cols(0, 1)
+    assert styles.ids(np.arange(3), 0).tolist() == [0, 0, 0]
+    styles.restore(snapshot)
+    assert styles.get(1, 1) == red
+    assert styles.intern(_CellStyle(fg='red')) == red
+
+
+def test_cell_styles_journal_replays():
+    records = []
+    styles = _CellStyles(3, 1)
+    styles.journal = records.append
+    bold = styles.intern(_CellStyle(bold=True))
+    styles.set([2], 0, bold)
+    styles.update(bold, _CellStyle(bold=True, bg='yellow'))
+
+    replayed = _CellStyles(3, 1)
+    for kind, method, *args in records:
+        assert kind == 'style'
+        getattr(replayed, method)(*args)
+    assert replayed.styles == styles.styles
+    assert replayed.get(2, 0) == bold
+
+
+def test_too_many_styles():
+    styles = _CellStyles(1, 1)
+    styles.styles.extend([None] * 65535)
+    with pytest.raises(ValueError):
+        styles.intern(_CellStyle(bold=True))
+
+
+class ListProvider:
+    def __init__(self, rows):
+        self.rows = [list(row) for row in rows]
+        self.row_count = len(rows)
+        self.column_count = len(rows[0])
+
+    def get_block(self, row_start, row_stop, cols):
+        return [[row[col] for col in cols] for row in self.rows[row_start:row_stop]]
+
+    def set_value(self, row, col, value):
+        self.rows[row][col] = value
+
+
+def test_provider_undo_writes_back_the_original():
+    provider = ListProvider([[1, 'a'], [2, 'b']])
+    store = _ProviderStore(provider, block_rows=1, write_back=True)
+    before = store.snapshot()
+    store.set(0, 0, '10')
+    edited = store.snapshot()
+    store.set(0, 0, '20')
+    assert provider.rows[0][0] == '20'
+    store.restore(edited)
+    assert provider.rows[0][0] == '10' and store.get(0, 0) == '10'
+    store.restore(before)
+    assert provider.rows[0][0] == 1 and store.get(0, 0) == '1'
+    assert before == {} and edited == {(0, 0): '10'}  # Snapshots are left as they were
+    store.restore(edited)  # Redo
+    assert provider.rows[0][0] == '10'
+
+
+def test_provider_overlay_without_write_back():
+    provider = ListProvider([[1, 'a'], [2, 'b']])
+    store = _ProviderStore(provider)
+    before = store.snapshot()
+    store.set(1, 1, 'x')
+    assert store.get(1, 1) == 'x' and provider.rows[1][1] == 'b'
+    store.restore(before)
+    assert store.get(1, 1) == 'b'
@@ -0,0 +1,134 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from themed_table import Table, _WORKBOOK_ALIGN, _WORKBOOK_MAGIC
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        assert f.read(len(_WORKBOOK_MAGIC)) == _WORKBOOK_MAGIC
+        length, = struct.unpack('<Q', f.read(8))
+        return json.loads(f.read(length).decode('utf-8'))
+
+
+@pytest.fixture
+def table(root):
+    table = Table(root, rows=4, cols=3, spreadsheet_mode=True)
+    table.paste("1\t2\n3\t\0nul\nx\t=A1+A2", 0, 0)
+    table.merge_cells(3, 0, 1, 2)
+    table.set_cell_style(0, 1, table.define_style(bold=True, bg='yellow'))
+    yield table
+    table.destroy()
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_save_load_round_trip(tmp_path, root, table, compress):
+    path = tmp_path / "sheet.tbl"
+    table.save(path, compress=compress)
+    header = read_header(path)
+    assert (header['rows'], header['cols']) == (4, 3)
+    assert [entry['kind'] for entry in header['columns']] == ['text', 'json', 'text']
+    assert all(entry['offset'] % _WORKBOOK_ALIGN == 0 for entry in header['columns'])
+    assert header['style_columns'][0] is None and header['style_columns'][1] is not None
+
+    loaded = Table.load(path, root)
+    try:
+        assert loaded.get_values()['array'].tolist() == table.get_values()['array'].tolist()
+        assert loaded.formulas == {(2, 1): '=A1+A2'}
+        assert float(loaded.get_cell(2, 1)['value']) == 4
+        assert loaded.merged_cells == {(3, 0): (1, 2)}
+        assert loaded.get_style(loaded.get_cell_style(0, 1)) == table.get_style(table.get_cell_style(0, 1))
+        assert loaded.get_cell_style(1, 1) == 0
+    finally:
+        loaded.destroy()
+
+
+def test_load_keeps_string_font(tmp_path, root, table):
+    table.current_theme = dict(table.current_theme, font='Courier 10 bold')
+    table.save(tmp_path / "sheet.tbl")
+    loaded = Table.load(tmp_path / "sheet.tbl", root)
+    try:
+        assert loaded.current_theme['font'] == 'Courier 10 bold'
+    finally:
+        loaded.destroy()
+
+
+def test_load_rejects_other_files(tmp_path, root, table):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b'not a workbook')
+    with pytest.raises(ValueError):
+        table.load_workbook(path)
+
+
+def test_array_columns_keep_dtype(tmp_path, root):
+    table = Table(root, rows=0, cols=0)
+    table.load_array(np.arange(12, dtype=np.int32).reshape(4, 3))
+    table.save(tmp_path / "array.tbl")
+    assert {entry['dtype'] for entry in read_header(tmp_path / "array.tbl")['columns']} == {'<i4'}
+    loaded = Table.load(tmp_path / "array.tbl", root)
+    try:
+        assert loaded.get_values()['array'].tolist() == table.get_values()['array'].tolist()
+    finally:
+        loaded.destroy()
+        table.destroy()
+
+
+def test_autosave_recover(tmp_path, root, table):
+    path = tmp_path / "sheet.journal"
+    table.enable_autosave(path)
+    table.set_cell(1, 2, 'after checkpoint')
+    table.set_cell_style(1, 2, {'italic': True})
+    table.disable_autosave()
+    recovered = Table.recover(path, root)
+    try:
+        assert recovered.get_values()['array'].tolist() == table.get_values()['array'].tolist()
+        assert recovered.get_style(recovered.get_cell_style(1, 2))['italic']
+        assert recovered.get_style(recovered.get_cell_style(0, 1))['bg'] == 'yellow'
+    finally:
+        recovered.destroy()
+
+
+def test_workbook_sheets_keep_their_autosave(tmp_path, root):
+    from themed_table import Workbook
+    workbook = Workbook(root, sheets=['Data', 'Other'], rows=3, cols=2)
+    try:
+        table = workbook.table
+        path = tmp_path / "data.journal"
+        table.enable_autosave(path)
+        table.set_cell(0, 0, 'before')
+        workbook.activate('Other')
+        table.set_cell(0, 0, 'other sheet')
+        workbook.activate('Data')
+        assert table._journal is not None
+        table.set_cell(1, 0, 'after')
+        table.disable_autosave()
+        recovered = Table.recover(path, root)
+        try:
+            assert recovered.get_values()['array'][:, 0].tolist() == ['before', 'after', '']
+        finally:
+            recovered.destroy()
+    finally:
+        workbook.destroy()
+
+
+def test_autosave_journals_layout_with_the_change(tmp_path, root, table):
+    path = tmp_path / "sheet.journal"
+    table.enable_autosave(path, interval=60000)
+    journal = table._journal
+    table.select_cell(0, 0)
+    table.insert_row("above")
+    table.update_idletasks()  # The change is complete; no autosave tick has run
+    # Crash: nothing more reaches the journal
+    table._journal = None
+    table._store.journal = table._store.styles.journal = None
+    journal.close()
+    recovered = Table.recover(path, root)
+    try:
+        assert recovered.rows == 5
+        assert recovered.merged_cells == {(4, 0): (1, 2)}
+        assert recovered.formulas == table.formulas == {(3, 1): '=A1+A2'}
+    finally:
+        recovered.destroy()
@@ -4,817 +4,4408 @@ import pandas as pd
 import numpy as np
 from tkinter import messagebox
 from tkinter.font import Font
+import csv
+import io
 import math
+import os
+import re
+import sys
+import threading
+import warnings
+import json
+import pickle
+import queue
+import struct
+import zlib
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 
-class Table(ttk.Frame):
-    def __init__(self, parent, rows=10, cols=5, cell_width=120, cell_height=30, theme='default',spreadsheet_mode=False, **kwargs):
-        super().__init__(parent)
-        self.parent = parent
+# Extra rows drawn above and below the visible area
+_RENDER_MARGIN = 5
+
+# Spreadsheet-mode row/column headers
+_HEADER_BG = '#f0f0f0'
+_HEADER_FONT = ('Arial', 10, 'bold')
+_HEADER_HEIGHT = 22
+
+# Workbook files (Table.save): magic, header size, JSON header, then data blocks
+# aligned to _WORKBOOK_ALIGN bytes so they can be memory-mapped in place
+_WORKBOOK_MAGIC = b'TKTABLE\x01'
+_WORKBOOK_ALIGN = 64
+
+# A1 / A1:B5 references, skipping over quoted string literals and sheet names
+_REFERENCE_PATTERN = re.compile(
+    r'"[^"]*"'
+    r"|'[^']*'"
+    r'|(?<![A-Z0-9_.!:])([A-Z]{1,3})([0-9]+)(?::([A-Z]{1,3})([0-9]+))?(?![A-Z0-9_(!])'
+)
+
+# References to another sheet of a Workbook: SHEET2!A1, 'MY SHEET'!A1:B5
+_SHEET_REFERENCE_PATTERN = re.compile(
+    r'"[^"]*"'
+    r"|(?<![A-Z0-9_.])('[^'\"!]+'|[A-Z_][A-Z0-9_]*)!"
+    r'([A-Z]{1,3})([0-9]+)(?::([A-Z]{1,3})([0-9]+))?(?![A-Z0-9_(])'
+)
+
+# Table attributes holding one sheet's data and everything derived from it
+_SHEET_STATE = (
+    '_store', 'rows', 'cols', 'row_heights', 'col_widths', '_row_offsets', '_custom_rows',
+    '_custom_tops', '_custom_shift', '_row_order', '_view_index', '_filters', '_data_visible',
+    '_indexes', '_search_index', '_run_index', '_formats', 'merged_cells', 'selected_cells', 'selection_start',
+    'undo_stack', 'redo_stack', 'formulas', 'calculated_values', 'column_formulas',
+    '_column_results', '_dirty_formulas', '_formula_graph_cache', '_formula_templates',
+    '_formulas_version',
+)
+
+
+def _column_letter(col):
+    """Convert a 0-based column index to spreadsheet letters (0 -> A, 26 -> AA)"""
+    letters = ""
+    col += 1
+    while col > 0:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _column_index(letters):
+    """Convert spreadsheet column letters to a 0-based column index"""
+    col = 0
+    for letter in letters.upper():
+        col = col * 26 + (ord(letter) - 64)
+    return col - 1
+
+
+@lru_cache(maxsize=65536)
+def _parse_reference(ref):
+    """(row, col) of an A1 reference, or None if it isn't one"""
+    match = re.fullmatch(r'([A-Z]{1,3})([0-9]+)', ref.strip().upper())
+    if match is None or match.group(2) == '0' * len(match.group(2)):
+        return None
+    return int(match.group(2)) - 1, _column_index(match.group(1))
+
+
+def _sheet_reference(match):
+    """(sheet name, r1, c1, r2, c2) of a _SHEET_REFERENCE_PATTERN match"""
+    row1, col1 = int(match.group(3)) - 1, _column_index(match.group(2))
+    row2, col2 = row1, col1
+    if match.group(4) is not None:
+        row2, col2 = int(match.group(5)) - 1, _column_index(match.group(4))
+    return (match.group(1).strip("'"), min(row1, row2), min(col1, col2),
+            max(row1, row2), max(col1, col2))
+
+
+def _sheet_calls(expr):
+    """Replace the other-sheet references of (uppercased) formula text with _sheet_ref/_sheet_range calls"""
+    def replace(match):
+        if match.group(1) is None:
+            return match.group(0)  # String literal
+        name, r1, c1, r2, c2 = _sheet_reference(match)
+        if match.group(4) is None:
+            return f'_sheet_ref("{name}", {r1}, {c1})'
+        return f'_sheet_range("{name}", {r1}, {c1}, {r2}, {c2})'
+
+    return _SHEET_REFERENCE_PATTERN.sub(replace, expr)
+
+
+@lru_cache(maxsize=65536)
+def _sheet_references(formula):
+    """(sheet name, r1, c1, r2, c2) rectangles a formula reads on other sheets"""
+    return tuple(_sheet_reference(match)
+                 for match in _SHEET_REFERENCE_PATTERN.finditer(formula[1:].upper())
+                 if match.group(1) is not None)
+
+
+class _Range(np.lib.mixins.NDArrayOperatorsMixin):
+    """
+    A rectangle of cells as seen by a formula
+
+    `numbers` is a 2-D float array holding NaN for empty and text cells;
+    the raw values (for COUNTA and text criteria) are only built when a
+    function asks for them. Arithmetic and NumPy functions work on the
+    numbers, so A1:A9*B1:B9 is an element-wise array expression.
+    """
+
+    def __init__(self, numbers, values):
+        self.numbers = numbers
+        self._values = values  # Object array, or a function building it
+
+    @property
+    def values(self):
+        """Raw cell values ('' for empty cells)"""
+        if callable(self._values):
+            self._values = self._values()
+        return self._values
+
+    def __array__(self, dtype=None, copy=None):
+        return self.numbers if dtype is None else self.numbers.astype(dtype)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = [x.numbers if isinstance(x, _Range) else x for x in inputs]
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+
+def _numeric_parts(args):
+    """Float arrays of the formula arguments, NaN where a cell holds no number"""
+    parts = []
+    for arg in args:
+        if isinstance(arg, _Range):
+            parts.append(arg.numbers)
+        elif isinstance(arg, np.ndarray):
+            parts.append(arg.astype(np.float64))
+        elif isinstance(arg, (list, tuple)):
+            parts.extend(_numeric_parts(arg))
+        elif isinstance(arg, (int, float)) and not isinstance(arg, bool):
+            parts.append(np.array([arg], dtype=np.float64))
+    return parts
+
+
+def _numeric_values(args):
+    """Flatten formula arguments into one float array of their numbers (text and empty cells are left out)"""
+    parts = [part.ravel() for part in _numeric_parts(args)]
+    values = np.concatenate(parts) if parts else np.empty(0)
+    return values[~np.isnan(values)]
+
+
+def _raw_values(args):
+    """Flatten formula arguments into one object array of their values"""
+    parts = []
+    for arg in args:
+        if isinstance(arg, _Range):
+            parts.append(arg.values.ravel())
+        else:
+            parts.append(np.array(np.ravel(arg), dtype=object))
+    return np.concatenate(parts) if parts else np.empty(0, dtype=object)
+
+
+def _scalar(value):
+    """NumPy scalars back to plain Python values"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# The plain aggregates reduce each argument in place, without copying out its numbers
+
+def _formula_sum(*args):
+    return float(sum(np.nansum(part) for part in _numeric_parts(args)))
+
+
+def _formula_count(*args):
+    return int(sum(np.count_nonzero(~np.isnan(part)) for part in _numeric_parts(args)))
+
+
+def _formula_avg(*args):
+    count = _formula_count(*args)
+    return _formula_sum(*args) / count if count else 0
+
+
+def _formula_min(*args):
+    parts = [part for part in _numeric_parts(args) if part.size]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN parts
+        lowest = min((np.nanmin(part) for part in parts), default=np.nan)
+    return 0 if np.isnan(lowest) else float(lowest)
+
+
+def _formula_max(*args):
+    parts = [part for part in _numeric_parts(args) if part.size]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN parts
+        highest = max((np.nanmax(part) for part in parts), default=np.nan)
+    return 0 if np.isnan(highest) else float(highest)
+
+
+def _formula_counta(*args):
+    return int((_raw_values(args) != '').sum())
+
+
+def _formula_countblank(*args):
+    return int((_raw_values(args) == '').sum())
+
+
+def _formula_median(*args):
+    values = _numeric_values(args)
+    if not len(values):
+        raise ValueError("MEDIAN of no numbers")
+    return float(np.median(values))
+
+
+def _formula_stdev(*args):
+    values = _numeric_values(args)
+    if len(values) < 2:
+        raise ValueError("STDEV needs at least two numbers")
+    return float(values.std(ddof=1))
+
+
+def _formula_product(*args):
+    values = _numeric_values(args)
+    return float(values.prod()) if len(values) else 0
+
+
+def _formula_sumproduct(*arrays):
+    product = None
+    for array in arrays:
+        numbers = np.nan_to_num(np.asarray(array, dtype=np.float64))
+        if product is not None and numbers.shape != product.shape:
+            raise ValueError("SUMPRODUCT ranges must have the same size")
+        product = numbers if product is None else product * numbers
+    return float(product.sum()) if product is not None else 0
+
+
+# Comparison prefix of a SUMIF/COUNTIF criterion: ">5", "<>done", ...
+_CRITERION_PATTERN = re.compile(r'(<=|>=|<>|<|>|=)?(.*)', re.S)
+
+
+def _criteria_mask(cells, criterion):
+    """Bool mask of the cells of a _Range matching a spreadsheet criterion"""
+    if isinstance(criterion, (int, float)) and not isinstance(criterion, bool):
+        return cells.numbers == criterion
+    operator, operand = _CRITERION_PATTERN.fullmatch(str(criterion)).groups()
+    operator = operator or '='
+    try:
+        number = float(operand)
+    except ValueError:
+        number = None
+    if number is not None:
+        numbers = cells.numbers
+        with np.errstate(invalid='ignore'):
+            return {
+                '=': numbers == number, '<>': ~(numbers == number),
+                '<': numbers < number, '>': numbers > number,
+                '<=': numbers <= number, '>=': numbers >= number,
+            }[operator]
+
+    # Text criteria compare case-insensitively; = and <> accept * and ? wildcards
+    values = pd.Series(cells.values.ravel(), dtype=object).astype(str).str.lower()
+    operand = operand.lower()
+    if operator in ('=', '<>'):
+        if '*' in operand or '?' in operand:
+            pattern = re.escape(operand).replace('\\*', '.*').replace('\\?', '.')
+            mask = values.str.fullmatch(pattern)
+        else:
+            mask = values == operand
+        mask = mask.to_numpy(dtype=bool)
+        if operator == '<>':
+            mask = ~mask
+    else:
+        is_text = np.isnan(cells.numbers.ravel()) & (values != '').to_numpy(dtype=bool)
+        mask = {
+            '<': values < operand, '>': values > operand,
+            '<=': values <= operand, '>=': values >= operand,
+        }[operator].to_numpy(dtype=bool) & is_text
+    return mask.reshape(cells.numbers.shape)
+
+
+def _criteria_numbers(cells, criterion, value_cells):
+    """Numbers of value_cells (default: cells) where cells match the criterion"""
+    mask = _criteria_mask(cells, criterion)
+    numbers = (value_cells if value_cells is not None else cells).numbers
+    if numbers.shape != mask.shape:
+        # Like spreadsheets, a differently sized sum range starts at its top-left cell
+        height = min(mask.shape[0], numbers.shape[0])
+        width = min(mask.shape[1], numbers.shape[1])
+        mask, numbers = mask[:height, :width], numbers[:height, :width]
+    selected = numbers[mask]
+    return selected[~np.isnan(selected)]
+
+
+def _formula_sumif(cells, criterion, sum_cells=None):
+    return float(_criteria_numbers(cells, criterion, sum_cells).sum())
+
+
+def _formula_countif(cells, criterion):
+    return int(_criteria_mask(cells, criterion).sum())
+
+
+def _formula_averageif(cells, criterion, average_cells=None):
+    values = _criteria_numbers(cells, criterion, average_cells)
+    return float(values.mean()) if len(values) else 0
+
+
+def _formula_round(value, digits=0):
+    # Half away from zero, like spreadsheets (not NumPy's half to even)
+    scale = 10.0 ** int(digits)
+    return _scalar(np.sign(value) * np.floor(np.abs(value) * scale + 0.5) / scale)
+
+
+def _formula_if(condition, if_true=True, if_false=False):
+    if isinstance(condition, (np.ndarray, _Range)):
+        return np.where(np.asarray(condition, dtype=bool), if_true, if_false)
+    return if_true if condition else if_false
+
+
+def _elementwise(function):
+    """Wrap a NumPy ufunc so it returns plain Python numbers for scalar input"""
+    return lambda *args: _scalar(function(*args))
+
+
+# Functions available inside formulas (names are matched upper-case)
+_FORMULA_FUNCTIONS = {
+    'SUM': _formula_sum,
+    'AVG': _formula_avg,
+    'AVERAGE': _formula_avg,
+    'MIN': _formula_min,
+    'MAX': _formula_max,
+    'COUNT': _formula_count,
+    'COUNTA': _formula_counta,
+    'COUNTBLANK': _formula_countblank,
+    'MEDIAN': _formula_median,
+    'STDEV': _formula_stdev,
+    'PRODUCT': _formula_product,
+    'SUMPRODUCT': _formula_sumproduct,
+    'SUMIF': _formula_sumif,
+    'COUNTIF': _formula_countif,
+    'AVERAGEIF': _formula_averageif,
+    'ROUND': _formula_round,
+    'ABS': _elementwise(np.abs),
+    'SQRT': _elementwise(np.sqrt),
+    'INT': _elementwise(np.floor),
+    'MOD': _elementwise(np.mod),
+    'POWER': _elementwise(np.power),
+    'IF': _formula_if,
+    'AND': lambda *args: bool(np.all([np.all(arg) for arg in args])),
+    'OR': lambda *args: bool(np.any([np.any(arg) for arg in args])),
+    'NOT': _elementwise(np.logical_not),
+    'TRUE': True,
+    'FALSE': False,
+}
+
+# R1C1-style references of formula templates: R[-1]C[2] or R[0]C[0]:R[4]C[0]
+_RELATIVE_PATTERN = re.compile(
+    r'"[^"]*"'
+    r'|R\[(-?[0-9]+)\]C\[(-?[0-9]+)\](?::R\[(-?[0-9]+)\]C\[(-?[0-9]+)\])?'
+)
+
+# Names a template may use to be evaluated for many cells at once (element-wise only)
+_BATCH_NAMES = frozenset(('_ref', '_row', '_col', 'ROUND', 'ABS', 'SQRT', 'INT', 'MOD', 'POWER',
+                          'TRUE', 'FALSE'))
+
+# Bare column letters of column formulas (=A*B+1), skipping string literals
+_COLUMN_PATTERN = re.compile(r'"[^"]*"|(?<![A-Z0-9_.])([A-Z]{1,3})(?![A-Z0-9_(])')
+
+# Spreadsheet operators outside string literals: <> and = compare, ^ raises to a power
+_OPERATOR_PATTERN = re.compile(r'"[^"]*"|<>|(?<![<>=!])=(?!=)|\^')
+_OPERATORS = {'<>': '!=', '=': '==', '^': '**'}
+
+
+@lru_cache(maxsize=65536)
+def _compile_formula(formula):
+    """
+    Translate formula text into a code object
+
+    References become `_ref(row, col)` calls and ranges become
+    `_range(r1, c1, r2, c2)` calls, so the same compiled formula can be
+    evaluated against any value source (widgets, shared memory, ...).
+    The spreadsheet operators =, <> and ^ are mapped to Python's.
+
+    Returns:
+        tuple: (code, ranges) where ranges lists the (r1, c1, r2, c2)
+               rectangles the formula reads
+    """
+    expr, ranges, _ = _translate_formula(formula)
+    return _compile_expression(expr, ('_ref', '_range', '_sheet_ref', '_sheet_range')), ranges
+
+
+@lru_cache(maxsize=1024)
+def _compile_column_formula(formula):
+    """
+    Translate a column formula into a code object
+
+    Bare column letters (=A*B+1) become `_col(col)` calls that stand for
+    the whole column; A1 references and ranges work as in cell formulas.
+
+    Returns:
+        tuple: (code, columns) where columns lists every column the formula reads
+    """
+    expr, ranges, columns = _translate_formula(formula, whole_columns=True)
+    read = set(columns)
+    for r1, c1, r2, c2 in ranges:
+        read.update(range(c1, c2 + 1))
+    return _compile_expression(expr, ('_ref', '_range', '_col')), tuple(sorted(read))
+
+
+def _translate_formula(formula, whole_columns=False):
+    """
+    Rewrite formula text as a Python expression
+
+    Returns:
+        tuple: (expr, ranges, columns) - the (r1, c1, r2, c2) rectangles of
+               its references, and the columns used whole (whole_columns only)
+    """
+    ranges = []
+    columns = []
+
+    def replace(match):
+        if match.group(1) is None:
+            return match.group(0)  # String literal
+        row1, col1 = int(match.group(2)) - 1, _column_index(match.group(1))
+        if match.group(3) is None:
+            ranges.append((row1, col1, row1, col1))
+            return f"_ref({row1}, {col1})"
+        row2, col2 = int(match.group(4)) - 1, _column_index(match.group(3))
+        r1, r2 = min(row1, row2), max(row1, row2)
+        c1, c2 = min(col1, col2), max(col1, col2)
+        ranges.append((r1, c1, r2, c2))
+        return f"_range({r1}, {c1}, {r2}, {c2})"
+
+    def replace_column(match):
+        if match.group(1) is None:
+            return match.group(0)  # String literal
+        col = _column_index(match.group(1))
+        columns.append(col)
+        return f"_col({col})"
+
+    expr = _REFERENCE_PATTERN.sub(replace, _sheet_calls(formula[1:].strip().upper()))
+    if whole_columns:
+        expr = _COLUMN_PATTERN.sub(replace_column, expr)
+    expr = _OPERATOR_PATTERN.sub(lambda m: _OPERATORS.get(m.group(0), m.group(0)), expr)
+    return expr, tuple(ranges), tuple(columns)
+
+
+def _compile_expression(expr, helpers):
+    """Compile a translated formula, refusing names other than formula functions and helpers"""
+    code = compile(expr, '<formula>', 'eval')
+    for name in code.co_names:
+        if name not in _FORMULA_FUNCTIONS and name not in helpers:
+            raise NameError(f"Use of {name} not allowed")
+    return code
+
+
+@lru_cache(maxsize=65536)
+def _formula_ranges(formula):
+    """Return the (r1, c1, r2, c2) rectangles a formula reads, or () if invalid"""
+    try:
+        return _translate_formula(formula)[1]
+    except Exception:
+        return ()
+
+
+def _relative_formula(formula, row, col):
+    """
+    Rewrite a formula's references relative to its cell (R1C1 style)
+
+    "=A1*B1" in cell (0, 2) becomes "=R[0]C[-2]*R[0]C[-1]", the same
+    template as "=A2*B2" in cell (1, 2), so every copy of a filled formula
+    shares one compiled template.
+    """
+    def replace(match):
+        if match.group(1) is None:
+            return match.group(0)  # String literal
+        row1, col1 = int(match.group(2)) - 1, _column_index(match.group(1))
+        if match.group(3) is None:
+            return f"R[{row1 - row}]C[{col1 - col}]"
+        row2, col2 = int(match.group(4)) - 1, _column_index(match.group(3))
+        r1, r2 = min(row1, row2), max(row1, row2)
+        c1, c2 = min(col1, col2), max(col1, col2)
+        return f"R[{r1 - row}]C[{c1 - col}]:R[{r2 - row}]C[{c2 - col}]"
+
+    return sys.intern('=' + _REFERENCE_PATTERN.sub(replace, formula[1:].strip().upper()))
+
+
+@lru_cache(maxsize=4096)
+def _template_parts(template):
+    """
+    Split an R1C1 template into text and references
+
+    Returns:
+        tuple: (parts, ranges) - literal strings and (row offset, col offset)
+               pairs in order, plus the (dr1, dc1, dr2, dc2) rectangles read
+    """
+    parts = []
+    ranges = []
+    position = 0
+    for match in _RELATIVE_PATTERN.finditer(template):
+        if match.group(1) is None:
+            continue  # String literal
+        parts.append(template[position:match.start()])
+        start = (int(match.group(1)), int(match.group(2)))
+        end = start if match.group(3) is None else (int(match.group(3)), int(match.group(4)))
+        parts.append(start)
+        if match.group(3) is not None:
+            parts.extend((':', end))
+        ranges.append(start + end)
+        position = match.end()
+    parts.append(template[position:])
+    return tuple(parts), tuple(ranges)
+
+
+def _absolute_formula(template, row, col):
+    """A1 text of an R1C1 template placed in cell (row, col), or None if a reference falls off the sheet"""
+    text = []
+    for part in _template_parts(template)[0]:
+        if isinstance(part, str):
+            text.append(part)
+            continue
+        r, c = row + part[0], col + part[1]
+        if r < 0 or c < 0:
+            return None
+        text.append(f"{_column_letter(c)}{r + 1}")
+    return ''.join(text)
+
+
+@lru_cache(maxsize=4096)
+def _compile_template(template):
+    """
+    Compile an R1C1 formula template once for all the cells sharing it
+
+    References become `_ref(_row + dr, _col + dc)` calls (ranges likewise),
+    so the code runs for any cell given its `_row` and `_col`, or for many
+    cells at once given arrays of them.
+    """
+    def replace(match):
+        if match.group(1) is None:
+            return match.group(0)  # String literal
+        start = f"_row + {match.group(1)}, _col + {match.group(2)}"
+        if match.group(3) is None:
+            return f"_ref({start})"
+        return f"_range({start}, _row + {match.group(3)}, _col + {match.group(4)})"
+
+    expr = _RELATIVE_PATTERN.sub(replace, _sheet_calls(template[1:]))
+    expr = _OPERATOR_PATTERN.sub(lambda m: _OPERATORS.get(m.group(0), m.group(0)), expr)
+    return _compile_expression(expr, ('_ref', '_range', '_row', '_col', '_sheet_ref', '_sheet_range'))
+
+
+def _evaluate_formula(formula, get_value, get_range=None):
+    """
+    Evaluate formula text against a value getter
+
+    Args:
+        formula (str): Formula text starting with '='
+        get_value (callable): get_value(row, col) returning a float, the
+                              raw string, or None for empty cells (read as
+                              0 on their own, as blanks in ranges)
+        get_range (callable): get_range(r1, c1, r2, c2) returning a _Range
+                              (default: built cell by cell from get_value)
+    """
+    if not formula.startswith('='):
+        return formula
+
+    try:
+        code, _ = _compile_formula(formula)
+        namespace = dict(_FORMULA_FUNCTIONS)
+        if get_range is None:
+            # None marks empty cells, so COUNTA/COUNTBLANK see them as the table does
+            def get_range(r1, c1, r2, c2, get_value=get_value):
+                return _range_from_values(
+                    [[get_value(r, c) for c in range(c1, c2 + 1)] for r in range(r1, r2 + 1)])
+
+            def get_number(row, col, get_value=get_value):
+                value = get_value(row, col)
+                return 0 if value is None else value
+
+            get_value = get_number
+        namespace['_ref'] = get_value
+        namespace['_range'] = get_range
+        with np.errstate(all='ignore'):
+            return _scalar(eval(code, {'__builtins__': {}}, namespace))
+    except Exception as e:
+        return f"#ERROR: {str(e)}"
+
+
+def _range_from_values(rows):
+    """_Range from nested lists of get_value() results (None for empty cells)"""
+    values = np.empty((len(rows), len(rows[0]) if rows else 0), dtype=object)
+    values[:] = rows
+    numbers = np.full(values.shape, np.nan)
+    for index, value in np.ndenumerate(values):
+        if value is None:
+            values[index] = ''
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            numbers[index] = value
+    return _Range(numbers, values)
+
+
+def _grid_range(grid, text_values, r1, c1, r2, c2):
+    """_Range over a float grid (NaN for empty and text cells) plus {(row, col): text}"""
+    numbers = grid[r1:r2 + 1, c1:c2 + 1]
+
+    def values():
+        raw = np.full(numbers.shape, '', dtype=object)
+        is_number = ~np.isnan(numbers)
+        raw[is_number] = numbers[is_number]
+        for (row, col), text in text_values.items():
+            if r1 <= row <= r2 and c1 <= col <= c2:
+                raw[row - r1, col - c1] = text
+        return raw
+
+    return _Range(numbers, values)
+
+
+def _evaluate_formula_values(grid, text_values, batch):
+    """Evaluate (row, col, formula) items against a numeric grid plus text overrides"""
+    rows, cols = grid.shape
+
+    def get_value(row, col):
+        if (row, col) in text_values:
+            return text_values[(row, col)]
+        if 0 <= row < rows and 0 <= col < cols:
+            value = float(grid[row, col])
+            return 0 if math.isnan(value) else value
+        return 0
+
+    def get_range(r1, c1, r2, c2):
+        return _grid_range(grid, text_values, r1, c1, min(r2, rows - 1), min(c2, cols - 1))
+
+    return [(row, col, _evaluate_formula(formula, get_value, get_range))
+            for row, col, formula in batch]
+
+
+def _text_values_by_column(text_values):
+    """Group {(row, col): text} as {col: (sorted rows array, texts)} for range lookups"""
+    by_column = {}
+    for (row, col), value in sorted(text_values.items(), key=lambda item: (item[0][1], item[0][0])):
+        rows, values = by_column.setdefault(col, ([], []))
+        rows.append(row)
+        values.append(value)
+    return {col: (np.array(rows, dtype=np.int64), values) for col, (rows, values) in by_column.items()}
+
+
+def _evaluate_formula_batch(shm_name, shape, text_values, batch):
+    """Process-pool entry point: evaluate a batch against the shared value grid"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        grid = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        results = _evaluate_formula_values(grid, text_values, batch)
+        del grid  # Release the buffer export before closing
+        return results
+    finally:
+        shm.close()
+
+
+def _format_values(values, chunk=1 << 20):
+    """Object array of display strings for a NumPy array ('' for NaN)"""
+    values = np.asarray(values)
+    if len(values) > chunk:
+        # Format piecewise to keep the fixed-width intermediate small
+        text = np.empty(len(values), dtype=object)
+        for start in range(0, len(values), chunk):
+            text[start:start + chunk] = _format_values(values[start:start + chunk])
+        return text
+    if values.dtype.kind == 'S':
+        text = np.char.decode(values, 'utf-8', 'replace')
+    else:
+        text = values.astype(str)
+    text = text.astype(object)
+    if values.dtype.kind == 'f':
+        text[np.isnan(values)] = ''
+    return text
+
+
+def _parse_number(value):
+    """Float value of a cell, NaN when it is empty or not a number"""
+    try:
+        return float(value) if value != '' else np.nan
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def _replace_values(values, expression, substitute, case_sensitive=False):
+    """
+    Regex replacement over an array of cell values
+
+    Values that aren't strings (numbers from a provider or a live feed)
+    are matched as text, as the search index does, and written back as
+    text like set_cell() does, so a number is only touched when its text
+    matches.
+
+    Returns:
+        tuple: (new text values, bool array of the values that changed)
+    """
+    text = pd.Series(values, dtype=object).astype(str)
+    new = text.str.replace(expression, substitute, regex=True, case=case_sensitive)
+    text, new = text.to_numpy(dtype=object), new.to_numpy(dtype=object)
+    return new, text != new
+
+
+def _run_jump(edges, size, position, step):
+    """
+    Spreadsheet Ctrl+Arrow target along a line of cells
+
+    From inside a run of filled cells the jump goes to the run's last
+    cell; otherwise it goes to the next filled cell, or to the end of
+    the line if there is none.
+
+    Args:
+        edges: Sorted positions where a run of empty or filled cells starts
+               (see _RunIndex)
+        size (int): Number of cells in the line
+        position (int): Cell to jump from
+        step (int): +1 or -1
+    """
+    target = position + step
+    if not 0 <= target < size:
+        return position
+    before = int(np.searchsorted(edges, target, side='right'))  # Edges at or before target
+    target_filled = before % 2 == 1
+    position_filled = int(np.searchsorted(edges, position, side='right')) % 2 == 1
+    if step > 0:
+        end = int(edges[before]) if before < len(edges) else size  # Start of the next run
+        if target_filled:
+            return end - 1 if position_filled else target
+        return min(end, size - 1)
+    start = int(edges[before - 1]) if before else 0  # Start of the target's run
+    if target_filled:
+        return start if position_filled else target
+    return max(start - 1, 0)
+
+
+def _mask_edges(filled):
+    """Run starts (see _run_jump) of a bool mask"""
+    return np.flatnonzero(np.diff(filled.astype(np.int8), prepend=np.int8(0)))
+
+
+# A cell style; None/False attributes fall back to the theme
+_CellStyle = namedtuple('_CellStyle', 'bold italic underline fg bg align',
+                        defaults=(False, False, False, None, None, None))
+
+
+class _CellStyles:
+    """
+    Interned cell styles and the style id of every cell
+
+    Each distinct style is stored once in `styles`, id 0 being the plain
+    style. Cells hold just the id: a uint16 array per column over data
+    rows - two bytes a cell - made when a cell of the column is first
+    styled. The column store keeps the arrays in step with its row and
+    column changes. `fonts` holds the named font drawn for each id, so
+    changing a style reconfigures every widget using it at once.
+    """
+
+    def __init__(self, rows, cols):
         self.rows = rows
-        self.cols = cols
-        self.theme = theme
-        self.cell_width = kwargs.get('cell_width', 120)
-        self.cell_height = kwargs.get('cell_height', 30)
-        self.auto_scroll = True
-        self.selection_mode = "single"  # Add this line
-        self.default_cell_width = cell_width
-        self.default_cell_height = cell_height
-        self.row_heights = [self.default_cell_height] * rows
-        self.font = Font(font=('Calibre', 11))
-        self.spreadsheet_mode = spreadsheet_mode
+        self.columns = [None] * cols  # None while every cell of the column is plain
+        self.styles = [_CellStyle()]
+        self._ids = {_CellStyle(): 0}
+        self.fonts = {}  # {style id: Font}, made by the table when drawn
+        self.font_spec = None  # Theme font the fonts were made from
+        self.journal = None  # Called with ('style', method, *args) records (see _Journal)
+
+    def intern(self, style):
+        """Id of a style, added to the table if new"""
+        style_id = self._ids.get(style)
+        if style_id is None:
+            if len(self.styles) > np.iinfo(np.uint16).max:
+                raise ValueError("Too many distinct cell styles")
+            style_id = self._ids[style] = len(self.styles)
+            self.styles.append(style)
+            if self.journal is not None:
+                self.journal(('style', 'intern', style))
+        return style_id
+
+    def update(self, style_id, style):
+        """Change what a style id looks like"""
+        if self.journal is not None:
+            self.journal(('style', 'update', style_id, style))
+        old = self.styles[style_id]
+        if self._ids.get(old) == style_id:
+            del self._ids[old]
+        self.styles[style_id] = style
+        self._ids.setdefault(style, style_id)
+
+    def get(self, row, col):
+        column = self.columns[col]
+        return 0 if column is None else int(column[row])
+
+    def ids(self, rows, col):
+        """Style ids of some data rows of a column"""
+        column = self.columns[col]
+        return np.zeros(len(rows), dtype=np.uint16) if column is None else column[rows]
+
+    def set(self, rows, col, style_id):
+        if self.journal is not None:
+            self.journal(('style', 'set', np.array(rows, dtype=np.int64), col, style_id))
+        column = self.columns[col]
+        if column is None:
+            if not np.any(style_id):
+                return
+            column = self.columns[col] = np.zeros(self.rows, dtype=np.uint16)
+        column[rows] = style_id
+
+    def resize(self, rows, cols):
+        if rows != self.rows:
+            grown = np.zeros(max(0, rows - self.rows), dtype=np.uint16)
+            self.columns = [None if column is None else np.concatenate((column[:rows], grown))
+                            for column in self.columns]
+            self.rows = rows
+        self.columns = self.columns[:cols] + [None] * (cols - len(self.columns))
+
+    def insert_rows(self, at, count=1):
+        self.columns = [None if column is None else np.insert(column, at, np.zeros(count, dtype=np.uint16))
+                        for column in self.columns]
+        self.rows += count
+
+    def delete_rows(self, rows):
+        self.columns = [None if column is None else np.delete(column, rows) for column in self.columns]
+        self.rows -= len(rows)
+
+    def insert_cols(self, at, count=1):
+        self.columns[at:at] = [None] * count
+
+    def delete_cols(self, cols):
+        for col in sorted(cols, reverse=True):
+            del self.columns[col]
+
+    def swap_cols(self, a, b):
+        self.columns[a], self.columns[b] = self.columns[b], self.columns[a]
+
+    def snapshot(self):
+        return (self.rows, list(self.styles), [None if column is None else column.copy()
+                                               for column in self.columns])
+
+    def restore(self, snapshot):
+        if self.journal is not None:
+            self.journal(('style', 'restore', snapshot))  # Undo snapshots are never modified
+        self.rows, styles, columns = snapshot
+        self.styles = list(styles)
+        self._ids = {}
+        for style_id, style in enumerate(self.styles):
+            self._ids.setdefault(style, style_id)
+        self.columns = [None if column is None else column.copy() for column in columns]
+        self.fonts = {}
+
+
+class _ColumnStore:
+    """
+    Column-oriented cell values backing the table
+
+    Each column is a NumPy object array of strings indexed by data row.
+    The Text widgets only display these values, so reordering the view
+    never has to rewrite cell contents. Every write bumps the column
+    version, which keys the cached typed (numeric) view of the column.
+    Single-cell writes are also reported to `watchers` (objects with a
+    cell_changed(row, col, old, new) method) so derived structures can
+    patch themselves instead of rebuilding.
+    """
+
+    read_only = False
+    resizable = True
+    paged = False
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.columns = [self._empty(rows) for _ in range(cols)]
+        self.styles = _CellStyles(rows, cols)  # Style id of each cell
+        self.versions = [0] * cols
+        self.layout_version = 0  # Bumped when columns are added/removed/moved
+        self.watchers = []
+        self.journal = None  # Called with a record of every change (see _Journal)
+        self._numeric_cache = {}
+
+    @staticmethod
+    def _empty(rows):
+        column = np.empty(rows, dtype=object)
+        column.fill('')
+        return column
+
+    @property
+    def cols(self):
+        return len(self.columns)
+
+    def get(self, row, col):
+        return self.columns[col][row]
+
+    def _put(self, row, col, value):
+        """Store one value, returning the one it replaces"""
+        old = self.columns[col][row]
+        self.columns[col][row] = value
+        return old
+
+    def _put_many(self, rows, col, values):
+        self.columns[col][rows] = values
+
+    def set(self, row, col, value):
+        old = self._put(row, col, value)
+        cached = self._numeric_cache.get(col)
+        self.touch(col)
+        if cached is not None and cached[0] == self.versions[col] - 1:
+            # Patch the float view instead of reparsing the column
+            cached[1][row] = _parse_number(value)
+            self._numeric_cache[col] = (self.versions[col], cached[1])
+        for watcher in self.watchers:
+            watcher.cell_changed(row, col, old, value)
+        if self.journal is not None:
+            self.journal(('set', row, col, value))
+
+    def set_many(self, rows, col, values):
+        """
+        Write several cells of one column at once
+        
+        Small batches are reported to watchers cell by cell; large ones
+        only bump the column version so watchers rebuild on next use.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) <= 256 and self.watchers:
+            for row, value in zip(rows.tolist(), values):
+                self.set(row, col, value)
+            return
+        self._put_many(rows, col, values)
+        if self.journal is not None:
+            self.journal(('set_many', rows.copy(), col, self.values(rows, col)))
+        cached = self._numeric_cache.get(col)
+        self.touch(col)
+        if cached is not None and cached[0] == self.versions[col] - 1 and len(rows) < self.rows // 4:
+            # Patch the float view instead of reparsing the column
+            numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+            cached[1][rows] = numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+            self._numeric_cache[col] = (self.versions[col], cached[1])
+
+    def prime_numeric(self, col, rows, numbers):
+        """Record the float values of rows just written, if the column's float view is current"""
+        cached = self._numeric_cache.get(col)
+        if cached is not None and cached[0] == self.versions[col]:
+            cached[1][rows] = numbers
+        elif len(rows) == self.rows:
+            self._numeric_cache[col] = (self.versions[col], np.array(numbers, dtype=np.float64))
+
+    def column(self, col):
+        """Object array of the column's values (do not modify in place)"""
+        return self.columns[col]
+
+    def values(self, rows, col):
+        """Values of some rows of a column"""
+        return self.columns[col][rows]
+
+    def blank(self, col):
+        """Bool mask of the empty cells of a column"""
+        return self.columns[col] == ''
+
+    def filled(self, col):
+        """(data rows, values) of the non-empty cells of a column"""
+        column = self.column(col)
+        rows = np.flatnonzero(column != '')
+        return rows, column[rows]
+
+    def line_counts(self, rows, col):
+        """Number of text lines of some rows of a column"""
+        values = pd.Series(self.values(rows, col), dtype=object)
+        return values.str.count('\n').fillna(0).to_numpy(dtype=np.int64) + 1
+
+    def touch(self, col):
+        """Mark a column as changed"""
+        self.versions[col] += 1
+
+    def numeric(self, col):
+        """Float view of a column: NaN where the value is empty or not a number"""
+        cached = self._numeric_cache.get(col)
+        if cached is not None and cached[0] == self.versions[col]:
+            return cached[1]
+        column = self.column(col)
+        filled = column != ''
+        values = np.full(len(column), np.nan)
+        try:
+            # Fast path: every non-empty value parses as a number
+            values[filled] = column[filled].astype(np.float64)
+        except (ValueError, TypeError):
+            # Parse each distinct string once
+            codes, uniques = pd.factorize(column)
+            numbers = pd.to_numeric(pd.Series(uniques), errors='coerce')
+            values = numbers.to_numpy(dtype=np.float64, na_value=np.nan)[codes]
+            values[~filled] = np.nan
+        self._numeric_cache[col] = (self.versions[col], values)
+        return values
+
+    def resize(self, rows, cols):
+        """Grow or shrink to rows x cols, keeping existing values"""
+        if self.journal is not None:
+            self.journal(('resize', rows, cols))
+        if rows != self.rows:
+            for col in range(self.cols):
+                old = self.columns[col]
+                column = self._empty(rows)
+                keep = min(rows, self.rows)
+                column[:keep] = old[:keep]
+                self.columns[col] = column
+                self.touch(col)
+            self.rows = rows
+        if self.cols != cols:
+            self.layout_version += 1
+        while self.cols < cols:
+            self.columns.append(self._empty(self.rows))
+            self.versions.append(0)
+        if self.cols > cols:
+            del self.columns[cols:]
+            del self.versions[cols:]
+            self._numeric_cache = {c: v for c, v in self._numeric_cache.items() if c < cols}
+        self.styles.resize(rows, cols)
+
+    def append_rows(self, block):
+        """Add rows at the end; block is a 2-D object array with one column per store column"""
+        if self.journal is not None:
+            self.journal(('append_rows', np.array(block, dtype=object)))
+        for col in range(self.cols):
+            self.columns[col] = np.concatenate((self.columns[col], block[:, col]))
+            self.touch(col)
+        self.styles.insert_rows(self.rows, len(block))
+        self.rows += len(block)
+
+    def insert_rows(self, at, count=1):
+        if self.journal is not None:
+            self.journal(('insert_rows', at, count))
+        for col in range(self.cols):
+            self.columns[col] = np.insert(self.columns[col], at, [''] * count)
+            self.touch(col)
+        self.styles.insert_rows(at, count)
+        self.rows += count
+
+    def delete_rows(self, rows):
+        rows = sorted(rows)
+        if self.journal is not None:
+            self.journal(('delete_rows', rows))
+        for col in range(self.cols):
+            self.columns[col] = np.delete(self.columns[col], rows)
+            self.touch(col)
+        self.styles.delete_rows(rows)
+        self.rows -= len(rows)
+
+    def insert_cols(self, at, count=1):
+        if self.journal is not None:
+            self.journal(('insert_cols', at, count))
+        for _ in range(count):
+            self.columns.insert(at, self._empty(self.rows))
+            self.versions.insert(at, 0)
+        self.styles.insert_cols(at, count)
+        self.layout_version += 1
+        self._numeric_cache = {}
+
+    def delete_cols(self, cols):
+        if self.journal is not None:
+            self.journal(('delete_cols', sorted(cols)))
+        for col in sorted(cols, reverse=True):
+            del self.columns[col]
+            del self.versions[col]
+        self.styles.delete_cols(cols)
+        self.layout_version += 1
+        self._numeric_cache = {}
+
+    def swap_cols(self, a, b):
+        if self.journal is not None:
+            self.journal(('swap_cols', a, b))
+        self.columns[a], self.columns[b] = self.columns[b], self.columns[a]
+        self.styles.swap_cols(a, b)
+        self.touch(a)
+        self.touch(b)
+        self.layout_version += 1
+
+    def prefetch(self, top, bottom, left, right, direction):
+        """Load data the view is likely to need next (paged stores only)"""
+
+    def snapshot(self):
+        """Copy of all values, for the undo stack"""
+        return [column.copy() for column in self.columns]
+
+    def restore(self, snapshot):
+        if self.journal is not None:
+            self.journal(('restore', snapshot))  # Undo snapshots are never modified
+        self.columns = [column.copy() for column in snapshot]
+        self.rows = len(self.columns[0]) if self.columns else self.rows
+        self.versions = [version + 1 for version in self.versions[:len(self.columns)]]
+        self.versions += [0] * (len(self.columns) - len(self.versions))
+        self.styles.resize(self.rows, self.cols)
+        self.layout_version += 1
+        self._numeric_cache = {}
+
+
+class _ArrayStore(_ColumnStore):
+    """
+    Read-only column store over NumPy arrays, typically memory-mapped
+
+    Values are formatted as text only when they are displayed (or when a
+    whole column is needed, e.g. to sort), so opening a file reads no
+    data and only the pages behind the rows in view are ever touched.
+    """
+
+    read_only = True
+    resizable = False
+
+    def __init__(self, arrays):
+        self.arrays = list(arrays)
+        self.rows = len(self.arrays[0]) if self.arrays else 0
+        self.styles = _CellStyles(self.rows, len(self.arrays))
+        self.versions = [0] * len(self.arrays)
+        self.layout_version = 0
+        self.watchers = []
+        self._numeric_cache = {}
+
+    @property
+    def cols(self):
+        return len(self.arrays)
+
+    def get(self, row, col):
+        return _format_values(self.arrays[col][row:row + 1])[0]
+
+    def values(self, rows, col):
+        return _format_values(self.arrays[col][rows])
+
+    def column(self, col):
+        return _format_values(self.arrays[col])
+
+    def blank(self, col):
+        array = self.arrays[col]
+        if array.dtype.kind == 'f':
+            return np.isnan(array)
+        if array.dtype.kind in 'biumM':
+            return np.zeros(len(array), dtype=bool)
+        return self.column(col) == ''
+
+    def line_counts(self, rows, col):
+        if self.arrays[col].dtype.kind in 'biufmM':
+            return np.ones(len(rows), dtype=np.int64)  # Numbers are one line
+        return super().line_counts(rows, col)
+
+    def numeric(self, col):
+        array = self.arrays[col]
+        if array.dtype.kind not in 'biuf':
+            return super().numeric(col)
+        cached = self._numeric_cache.get(col)
+        if cached is None:
+            cached = self._numeric_cache[col] = (0, np.asarray(array, dtype=np.float64))
+        return cached[1]
+
+    def _read_only(self, *args, **kwargs):
+        raise ValueError("Table data is read-only")
+
+    set = set_many = resize = _read_only
+    insert_rows = delete_rows = insert_cols = delete_cols = swap_cols = _read_only
+
+    def snapshot(self):
+        return None  # Nothing in the data can change
+
+    def restore(self, snapshot):
+        pass
+
+
+class DataProvider:
+    """
+    Interface for data sources a Table can page through (see Table.load_provider)
+
+    Subclassing is optional: any object with `row_count` and `get_block`
+    works. Providers are only called from the Tk thread.
+
+    Attributes:
+        row_count (int): Number of rows
+        column_count (int): Number of columns (default: width of the first block)
+
+    Examples:
+        class SQLiteProvider(DataProvider):
+            def __init__(self, connection, table):
+                self.connection, self.table = connection, table
+                self.row_count = connection.execute(
+                    f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+            def get_block(self, row_start, row_stop, cols):
+                return self.connection.execute(
+                    f"SELECT * FROM {self.table} LIMIT ? OFFSET ?",
+                    (row_stop - row_start, row_start)).fetchall()
+    """
+
+    row_count = 0
+
+    def get_block(self, row_start, row_stop, cols):
+        """
+        Return rows row_start..row_stop-1 as a 2-D sequence (rows of values)
+
+        Rows may hold every column or exactly the requested `cols` (a
+        list of column indexes), in that order.
+        """
+        raise NotImplementedError
+
+    def set_value(self, row, col, value):
+        """Store an edited value (only called with write_back=True)"""
+        raise NotImplementedError
+
+
+class _CallableProvider(DataProvider):
+    """Adapts a get_block(row_start, row_stop, cols) function to DataProvider"""
+
+    def __init__(self, get_block, row_count, column_count=None):
+        self.get_block = get_block
+        self.row_count = row_count
+        if column_count is not None:
+            self.column_count = column_count
+
+
+def _sparse_array(rows, values, length, fill):
+    """pandas SparseArray of `length` holding `values` at sorted `rows`"""
+    dtype = pd.SparseDtype(object if isinstance(fill, str) else np.float64, fill)
+    try:
+        from pandas._libs.sparse import IntIndex
+    except ImportError:  # Private in pandas; densify if it ever moves
+        column = np.full(length, fill, dtype=dtype.subtype)
+        column[rows] = values
+        return pd.arrays.SparseArray(column, fill_value=fill, dtype=dtype)
+    index = IntIndex(length, np.asarray(rows, dtype=np.int32))
+    return pd.arrays.SparseArray(np.asarray(values, dtype=dtype.subtype), sparse_index=index,
+                                 fill_value=fill, dtype=dtype)
+
+
+def _display_text(value):
+    """Text shown for a value fetched from a data provider"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+class _ProviderStore(_ColumnStore):
+    """
+    Column store that pages values in from a DataProvider
+
+    Values are fetched in fixed-size row blocks (of up to COL_BLOCK columns)
+    and kept in a size-bounded LRU cache. Edits live in an overlay on top
+    of the provider; with write_back they are also passed on to it, and
+    undoing a cell's first edit passes back the value the provider had.
+    """
+
+    resizable = False
+    paged = True
+    COL_BLOCK = 32
+
+    def __init__(self, provider, block_rows=256, cache_blocks=64, write_back=False):
+        self.provider = provider
+        self.block_rows = block_rows
+        self.cache_blocks = cache_blocks
+        self.write_back = write_back
+        self.rows = int(provider.row_count)
+        self._cols = getattr(provider, 'column_count', None)
+        self._cache = OrderedDict()  # (row block, col block) -> object array
+        self._overlay = {}  # (row, col) -> edited value
+        self._originals = {}  # (row, col) -> provider value before the first write_back, for undo
+        if self._cols is None:
+            self._cols = self._fetch(0, 0).shape[1] if self.rows else 0
+        self.styles = _CellStyles(self.rows, self._cols)
+        self.versions = [0] * self._cols
+        self.layout_version = 0
+        self.watchers = []
+        self._numeric_cache = {}
+
+    @property
+    def cols(self):
+        return self._cols
+
+    def _fetch(self, row_block, col_block):
+        """Read one block from the provider (not cached)"""
+        start = row_block * self.block_rows
+        stop = min(start + self.block_rows, self.rows)
+        first = col_block * self.COL_BLOCK
+        cols = list(range(first, first + self.COL_BLOCK))
+        if self._cols is not None:
+            cols = [col for col in cols if col < self._cols]
+        result = self.provider.get_block(start, stop, cols)
+        if hasattr(result, 'to_numpy'):
+            result = result.to_numpy(dtype=object)
+        block = np.empty((stop - start, 0), dtype=object)
+        rows = [list(row) for row in result]
+        if rows:
+            width = max(len(row) for row in rows)
+            block = np.full((stop - start, width), '', dtype=object)
+            for i, row in enumerate(rows[:stop - start]):
+                block[i, :len(row)] = [_display_text(value) for value in row]
+        if self._cols is not None and block.shape[1] > len(cols):
+            block = block[:, cols]  # Provider returned every column
+        return block
+
+    def _block(self, row_block, col_block):
+        key = (row_block, col_block)
+        block = self._cache.get(key)
+        if block is None:
+            block = self._cache[key] = self._fetch(row_block, col_block)
+            while len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return block
+
+    def get(self, row, col):
+        value = self._overlay.get((row, col))
+        if value is not None:
+            return value
+        block = self._block(row // self.block_rows, col // self.COL_BLOCK)
+        r, c = row % self.block_rows, col % self.COL_BLOCK
+        return block[r, c] if r < block.shape[0] and c < block.shape[1] else ''
+
+    def set(self, row, col, value):
+        old = self.get(row, col)
+        if self.write_back and (row, col) not in self._overlay and (row, col) not in self._originals:
+            self._originals[(row, col)] = self._fetch_value(row, col)
+        self._overlay[(row, col)] = value
+        if self.write_back:
+            self.provider.set_value(row, col, value)
+        self.touch(col)
+        for watcher in self.watchers:
+            watcher.cell_changed(row, col, old, value)
+
+    def set_many(self, rows, col, values):
+        for row, value in zip(np.asarray(rows).tolist(), values):
+            self.set(row, col, value)
+
+    def _fetch_value(self, row, col):
+        """Raw value of one cell as the provider has it (not cached)"""
+        result = self.provider.get_block(row, row + 1, [col])
+        if hasattr(result, 'to_numpy'):
+            result = result.to_numpy(dtype=object)
+        rows = [list(row) for row in result]
+        if not rows:
+            return ''
+        index = 0 if len(rows[0]) == 1 else col
+        return rows[0][index] if len(rows[0]) > index else ''
+
+    def values(self, rows, col):
+        return np.array([self.get(row, col) for row in np.asarray(rows).tolist()], dtype=object)
+
+    def column(self, col):
+        """Whole column, read in large uncached chunks"""
+        column = np.empty(self.rows, dtype=object)
+        chunk = max(self.block_rows, 1 << 16)
+        for start in range(0, self.rows, chunk):
+            stop = min(start + chunk, self.rows)
+            result = self.provider.get_block(start, stop, [col])
+            if hasattr(result, 'to_numpy'):
+                result = result.to_numpy(dtype=object)
+            rows = [list(row) for row in result]
+            index = 0 if all(len(row) == 1 for row in rows) else col
+            column[start:stop] = [_display_text(row[index]) if len(row) > index else ''
+                                  for row in rows[:stop - start]]
+        for (row, c), value in self._overlay.items():
+            if c == col:
+                column[row] = value
+        return column
+
+    def blank(self, col):
+        return self.column(col) == ''
+
+    def prefetch(self, top, bottom, left, right, direction):
+        """Load the next block in the scroll direction into the cache"""
+        if not direction:
+            return
+        edge = bottom + self.block_rows if direction > 0 else top - self.block_rows
+        if not 0 <= edge < self.rows:
+            return
+        for col_block in range(left // self.COL_BLOCK, right // self.COL_BLOCK + 1):
+            self._block(edge // self.block_rows, col_block)
+
+    def _fixed_size(self, *args, **kwargs):
+        raise ValueError("The rows and columns of a data provider can't be changed")
+
+    resize = insert_rows = delete_rows = insert_cols = delete_cols = swap_cols = _fixed_size
+
+    def snapshot(self):
+        return dict(self._overlay)
+
+    def restore(self, snapshot):
+        changed = {key for key in self._overlay.keys() | snapshot.keys()
+                   if self._overlay.get(key) != snapshot.get(key)}
+        if self.write_back:
+            for row, col in changed:
+                value = snapshot.get((row, col))
+                if value is None:
+                    # Back to before the first edit: put the provider's own value back
+                    value = self._originals.get((row, col), '')
+                    self._cache.pop((row // self.block_rows, col // self.COL_BLOCK), None)
+                self.provider.set_value(row, col, value)
+        self._overlay = dict(snapshot)
+        for col in {col for row, col in changed}:
+            self.touch(col)
+
+
+class _SparseStore(_ColumnStore):
+    """
+    Cell values of mostly empty tables, storing only the filled cells
+
+    Each column keeps the data rows of its filled cells as a sorted int64
+    array with their values alongside, so memory follows the number of
+    filled cells instead of rows x cols. Single writes go to a small dict
+    per column and are merged into the arrays in bulk. Whole columns are
+    only built for the operations that need them (sort, filter, ...),
+    one column at a time, and only a few float views are cached.
+    The arrays are never modified in place, so undo snapshots share them.
+    """
+
+    MERGE_AT = 4096  # Pending single writes per column before they are merged
+    NUMERIC_CACHE = 8  # Columns whose float view is kept
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.keys = [np.zeros(0, dtype=np.int64) for _ in range(cols)]
+        self.data = [np.zeros(0, dtype=object) for _ in range(cols)]
+        self._edits = [{} for _ in range(cols)]  # {row: value} not merged yet ('' clears)
+        self.styles = _CellStyles(rows, cols)
+        self.versions = [0] * cols
+        self.layout_version = 0
+        self.watchers = []
+        self.journal = None
+        self._numeric_cache = {}
+
+    @property
+    def cols(self):
+        return len(self.keys)
+
+    def count(self):
+        """Number of filled cells"""
+        for col in range(self.cols):
+            self._merge(col)
+        return sum(len(keys) for keys in self.keys)
+
+    def _merge(self, col):
+        """Apply the pending single writes of a column to its arrays"""
+        edits = self._edits[col]
+        if edits:
+            self._edits[col] = {}
+            values = np.empty(len(edits), dtype=object)
+            values[:] = list(edits.values())
+            self._write(col, np.fromiter(edits, dtype=np.int64, count=len(edits)), values)
+
+    def _write(self, col, rows, values):
+        """Replace the values of distinct rows of a column ('' removes the cell)"""
+        keys, data = self.keys[col], self.data[col]
+        keep = ~np.isin(keys, rows)
+        filled = values != ''
+        keys = np.concatenate((keys[keep], rows[filled]))
+        data = np.concatenate((data[keep], values[filled]))
+        order = np.argsort(keys, kind='stable')
+        self.keys[col], self.data[col] = keys[order], data[order]
+
+    def get(self, row, col):
+        edits = self._edits[col]
+        if row in edits:
+            return edits[row]
+        keys = self.keys[col]
+        at = int(np.searchsorted(keys, row))
+        return self.data[col][at] if at < len(keys) and keys[at] == row else ''
+
+    def _put(self, row, col, value):
+        old = self.get(row, col)
+        self._edits[col][row] = value
+        if len(self._edits[col]) >= self.MERGE_AT:
+            self._merge(col)
+        return old
+
+    def _put_many(self, rows, col, values):
+        self._merge(col)
+        column = np.empty(len(rows), dtype=object)
+        column[:] = values
+        # Last write wins for repeated rows, as with array assignment
+        rows, last = np.unique(rows[::-1], return_index=True)
+        self._write(col, rows, column[::-1][last])
+
+    def prime_numeric(self, col, rows, numbers):
+        cached = self._numeric_cache.get(col)
+        if cached is not None and cached[0] == self.versions[col]:
+            cached[1][rows] = numbers
+
+    def filled(self, col):
+        self._merge(col)
+        return self.keys[col], self.data[col]
+
+    def column(self, col):
+        self._merge(col)
+        column = self._empty(self.rows)
+        column[self.keys[col]] = self.data[col]
+        return column
+
+    def values(self, rows, col):
+        self._merge(col)
+        rows = np.asarray(rows, dtype=np.int64)
+        keys = self.keys[col]
+        at = np.minimum(np.searchsorted(keys, rows), max(len(keys) - 1, 0))
+        found = keys[at] == rows if len(keys) else np.zeros(len(rows), dtype=bool)
+        values = self._empty(len(rows))
+        values[found] = self.data[col][at[found]]
+        return values
+
+    def blank(self, col):
+        self._merge(col)
+        mask = np.ones(self.rows, dtype=bool)
+        mask[self.keys[col]] = False
+        return mask
+
+    def numeric(self, col):
+        cached = self._numeric_cache.get(col)
+        if cached is not None and cached[0] == self.versions[col]:
+            return cached[1]
+        self._merge(col)
+        values = np.full(self.rows, np.nan)
+        numbers = pd.to_numeric(pd.Series(self.data[col], dtype=object), errors='coerce')
+        values[self.keys[col]] = numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+        self._numeric_cache.pop(col, None)
+        self._numeric_cache[col] = (self.versions[col], values)
+        while len(self._numeric_cache) > self.NUMERIC_CACHE:
+            del self._numeric_cache[next(iter(self._numeric_cache))]
+        return values
+
+    def _shift_rows(self, col, keys, data):
+        self.keys[col], self.data[col] = keys, data
+        self.touch(col)
+
+    def resize(self, rows, cols):
+        if self.journal is not None:
+            self.journal(('resize', rows, cols))
+        if rows != self.rows:
+            for col in range(self.cols):
+                self._merge(col)
+                keep = self.keys[col] < rows
+                self._shift_rows(col, self.keys[col][keep], self.data[col][keep])
+            self.rows = rows
+        if self.cols != cols:
+            self.layout_version += 1
+        while self.cols < cols:
+            self.keys.append(np.zeros(0, dtype=np.int64))
+            self.data.append(np.zeros(0, dtype=object))
+            self._edits.append({})
+            self.versions.append(0)
+        if self.cols > cols:
+            del self.keys[cols:], self.data[cols:], self._edits[cols:], self.versions[cols:]
+            self._numeric_cache = {c: v for c, v in self._numeric_cache.items() if c < cols}
+        self.styles.resize(rows, cols)
+
+    def append_rows(self, block):
+        if self.journal is not None:
+            self.journal(('append_rows', np.array(block, dtype=object)))
+        for col in range(self.cols):
+            self._merge(col)
+            column = np.asarray(block[:, col], dtype=object)
+            rows = np.flatnonzero(column != '')
+            self._shift_rows(col, np.concatenate((self.keys[col], rows + self.rows)),
+                             np.concatenate((self.data[col], column[rows])))
+        self.styles.insert_rows(self.rows, len(block))
+        self.rows += len(block)
+
+    def insert_rows(self, at, count=1):
+        if self.journal is not None:
+            self.journal(('insert_rows', at, count))
+        for col in range(self.cols):
+            self._merge(col)
+            keys = self.keys[col]
+            self._shift_rows(col, np.where(keys >= at, keys + count, keys), self.data[col])
+        self.styles.insert_rows(at, count)
+        self.rows += count
+
+    def delete_rows(self, rows):
+        rows = sorted(rows)
+        if self.journal is not None:
+            self.journal(('delete_rows', rows))
+        deleted = np.array(rows, dtype=np.int64)
+        for col in range(self.cols):
+            self._merge(col)
+            keys = self.keys[col]
+            keep = ~np.isin(keys, deleted)
+            keys = keys[keep]
+            self._shift_rows(col, keys - np.searchsorted(deleted, keys), self.data[col][keep])
+        self.styles.delete_rows(rows)
+        self.rows -= len(rows)
+
+    def insert_cols(self, at, count=1):
+        if self.journal is not None:
+            self.journal(('insert_cols', at, count))
+        for _ in range(count):
+            self.keys.insert(at, np.zeros(0, dtype=np.int64))
+            self.data.insert(at, np.zeros(0, dtype=object))
+            self._edits.insert(at, {})
+            self.versions.insert(at, 0)
+        self.styles.insert_cols(at, count)
+        self.layout_version += 1
+        self._numeric_cache = {}
+
+    def delete_cols(self, cols):
+        if self.journal is not None:
+            self.journal(('delete_cols', sorted(cols)))
+        for col in sorted(cols, reverse=True):
+            del self.keys[col], self.data[col], self._edits[col], self.versions[col]
+        self.styles.delete_cols(cols)
+        self.layout_version += 1
+        self._numeric_cache = {}
+
+    def swap_cols(self, a, b):
+        if self.journal is not None:
+            self.journal(('swap_cols', a, b))
+        for columns in (self.keys, self.data, self._edits):
+            columns[a], columns[b] = columns[b], columns[a]
+        self.styles.swap_cols(a, b)
+        self.touch(a)
+        self.touch(b)
+        self.layout_version += 1
+
+    def snapshot(self):
+        for col in range(self.cols):
+            self._merge(col)
+        return (self.rows, list(self.keys), list(self.data))
+
+    def restore(self, snapshot):
+        if self.journal is not None:
+            self.journal(('restore', snapshot))
+        self.rows, keys, data = snapshot
+        self.keys, self.data = list(keys), list(data)
+        self._edits = [{} for _ in keys]
+        self.versions = [version + 1 for version in self.versions[:len(keys)]]
+        self.versions += [0] * (len(keys) - len(self.versions))
+        self.styles.resize(self.rows, self.cols)
+        self.layout_version += 1
+        self._numeric_cache = {}
+
+
+class _Journal:
+    """
+    Append-only change journal, written by a background thread
+
+    The table only puts records (tuples) on a queue, which costs well
+    under a microsecond per change; the writer thread pickles them and
+    appends each one to the file framed by its length, flushing after
+    every batch. A checkpoint record holds a whole table state: it starts
+    a new file that atomically replaces the old one, which compacts the
+    journal. A record cut short by a crash is ignored on recovery.
+    If a record can't be written (unpicklable value, disk full, ...) the
+    writer keeps draining the queue without writing anything more, and
+    the error is raised by check() and close().
+    """
+
+    def __init__(self, path, sync=False):
+        self.path = os.fspath(path)
+        self.sync = sync
+        self.size = 0  # Bytes written since the last checkpoint
+        self.queue = queue.SimpleQueue()
+        self.record = self.queue.put
+        self._file = None
+        self.error = None  # First exception of the writer thread
+        self._thread = threading.Thread(target=self._run, name='table-journal', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Write out everything queued so far and stop the writer"""
+        self.queue.put(None)
+        self._thread.join()
+        self.check()
+
+    def check(self):
+        """Raise the error that stopped the writer, if any"""
+        if self.error is not None:
+            raise OSError(f"Autosave journal {self.path!r} stopped: {self.error!r}") from self.error
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < 4096:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            done = any(record is None for record in batch)
+            if self.error is None:
+                try:
+                    for record in batch:
+                        if record is None:
+                            break
+                        self._write(record)
+                    if self._file is not None:
+                        self._file.flush()
+                        if self.sync:
+                            os.fsync(self._file.fileno())
+                except Exception as error:
+                    # Later records would replay onto a journal missing this
+                    # one, so stop writing; the queue is still drained
+                    self.error = error
+            if done:
+                if self._file is not None:
+                    try:
+                        self._file.close()
+                    except Exception as error:
+                        self.error = self.error or error
+                return
+
+    def _write(self, record):
+        data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        data = struct.pack('<I', len(data)) + data
+        if record[0] == 'checkpoint':
+            replacement = open(self.path + '.tmp', 'wb')
+            replacement.write(data)
+            replacement.flush()
+            os.fsync(replacement.fileno())
+            os.replace(self.path + '.tmp', self.path)
+            if self._file is not None:
+                self._file.close()
+            self._file = replacement
+            self.size = 0
+        elif self._file is None:
+            raise ValueError("Journal record written before the first checkpoint")
+        else:
+            self._file.write(data)
+        self.size += len(data)
+
+    @staticmethod
+    def read(path):
+        """Yield the complete records of a journal file"""
+        with open(path, 'rb') as f:
+            while True:
+                frame = f.read(4)
+                if len(frame) < 4:
+                    return
+                length, = struct.unpack('<I', frame)
+                data = f.read(length)
+                if len(data) < length:
+                    return  # Cut short by a crash
+                try:
+                    yield pickle.loads(data)
+                except Exception:
+                    return
+
+
+class _RowHeights:
+    """
+    Per-row heights stored as a default plus the rows that differ from it
+
+    Behaves like the list of heights it replaces (len, indexing, insert,
+    del) but only costs memory for rows given a custom height, so very
+    tall tables pay nothing per row for their geometry.
+    """
+
+    def __init__(self, count, default, overrides=None):
+        self.count = count
+        self.default = default
+        self.overrides = dict(overrides or {})
+
+    def __len__(self):
+        return self.count
+
+    def _index(self, row):
+        if not -self.count <= row < self.count:
+            raise IndexError("row height index out of range")
+        return row % self.count
+
+    def __getitem__(self, row):
+        return self.overrides.get(self._index(row), self.default)
+
+    def __setitem__(self, row, height):
+        row = self._index(row)
+        if height == self.default:
+            self.overrides.pop(row, None)
+        else:
+            self.overrides[row] = height
+
+    def __delitem__(self, row):
+        self.delete([self._index(row)])
+
+    def set_many(self, rows, heights):
+        """Set the heights of several rows at once"""
+        rows = np.asarray(rows, dtype=np.int64)
+        heights = np.asarray(heights, dtype=np.int64)
+        if self.overrides:
+            reset = np.intersect1d(rows[heights == self.default], list(self.overrides))
+            for row in reset.tolist():
+                del self.overrides[row]
+        custom = heights != self.default
+        self.overrides.update(zip(rows[custom].tolist(), heights[custom].tolist()))
+
+    def __iter__(self):
+        return (self.overrides.get(row, self.default) for row in range(self.count))
+
+    def insert(self, row, height=None):
+        self.overrides = {(r + 1 if r >= row else r): h for r, h in self.overrides.items()}
+        self.count += 1
+        if height is not None:
+            self[row] = height
+
+    def delete(self, rows):
+        """Remove several rows at once"""
+        deleted = np.unique(np.asarray(list(rows), dtype=np.int64))
+        removed = set(deleted.tolist())
+        self.overrides = {
+            r - int(np.searchsorted(deleted, r)): h
+            for r, h in self.overrides.items() if r not in removed
+        }
+        self.count -= len(deleted)
+
+    def resize(self, count):
+        if count < self.count:
+            self.overrides = {r: h for r, h in self.overrides.items() if r < count}
+        self.count = count
+
+    def copy(self):
+        return type(self)(self.count, self.default, self.overrides)
+
+    def permuted(self, order):
+        """Heights rearranged so that new row i has the height of old row order[i]"""
+        if not self.overrides:
+            return self.copy()
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        return type(self)(self.count, self.default,
+                          {int(position[r]): h for r, h in self.overrides.items()})
+
+    def to_array(self):
+        heights = np.full(self.count, self.default, dtype=np.int64)
+        if self.overrides:
+            heights[list(self.overrides)] = list(self.overrides.values())
+        return heights
+
+
+class _ColumnWidths(_RowHeights):
+    """
+    Per-column widths with prefix sums of the column x positions
+
+    The x offsets are rebuilt (one cumsum) after a width changes, so the
+    position of a column is a lookup and the column at an x coordinate a
+    binary search, whatever the number of columns.
+    """
+
+    def __init__(self, count, default, overrides=None):
+        self._offsets = None
+        super().__init__(count, default, overrides)
+
+    @property
+    def default(self):
+        return self._default
+
+    @default.setter
+    def default(self, width):
+        self._default = width
+        self._offsets = None
+
+    def __setitem__(self, col, width):
+        super().__setitem__(col, width)
+        self._offsets = None
+
+    def insert(self, col, width=None):
+        super().insert(col, width)
+        self._offsets = None
+
+    def delete(self, cols):
+        super().delete(cols)
+        self._offsets = None
+
+    def resize(self, count):
+        if count != self.count:
+            super().resize(count)
+            self._offsets = None
+
+    def swap(self, a, b):
+        width_a, width_b = self[a], self[b]
+        self[a], self[b] = width_b, width_a
+
+    def offsets(self):
+        """x of the left edge of every column, plus the total width at the end"""
+        if self._offsets is None:
+            self._offsets = np.concatenate(([0], np.cumsum(self.to_array()))).astype(np.int64)
+        return self._offsets
+
+    def left(self, col):
+        """x of the left edge of a column (col == count gives the total width)"""
+        return int(self.offsets()[col])
+
+    def total(self):
+        return int(self.offsets()[-1])
+
+    def at(self, x):
+        """Column under x, clamped to the existing columns"""
+        col = int(np.searchsorted(self.offsets(), x, side='right')) - 1
+        return min(max(col, 0), max(self.count - 1, 0))
+
+
+class _ColumnIndex:
+    """
+    Cached lookup structure for one column, used by row filters
+
+    A 'hash' index maps each distinct value to the data rows holding it;
+    a 'sorted' index keeps the numeric values of the column in sorted
+    order for range queries. Single-cell edits are recorded as patches
+    on top of the built index; bulk changes to the column (detected
+    through the store's column version) trigger a rebuild on next use.
+    """
+
+    def __init__(self, store, col, kind='hash'):
+        if kind not in ('hash', 'sorted'):
+            raise ValueError("Index kind must be 'hash' or 'sorted'")
+        self.store = store
+        self.col = col
+        self.kind = kind
+        self._built_version = None
+        store.watchers.append(self)
+
+    def close(self):
+        """Stop tracking edits"""
+        if self in self.store.watchers:
+            self.store.watchers.remove(self)
+
+    def cell_changed(self, row, col, old, new):
+        if col != self.col or self._built_version is None:
+            return
+        self._patches[row] = new
+        self._expected_version += 1
+        if len(self._patches) > max(1024, self.store.rows // 20):
+            self._built_version = None  # Cheaper to rebuild than to patch
+
+    def _ensure_built(self):
+        version = self.store.versions[self.col]
+        if self._built_version is not None and version == self._expected_version:
+            return
+        column = self.store.column(self.col)
+        if self.kind == 'hash':
+            codes, uniques = pd.factorize(column)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self._buckets = {
+                value: order[bounds[i]:bounds[i + 1]]
+                for i, value in enumerate(uniques)
+            }
+        else:
+            numbers = self.store.numeric(self.col)
+            rows = np.flatnonzero(~np.isnan(numbers))
+            self._rows = rows[np.argsort(numbers[rows], kind='stable')]
+            self._keys = numbers[self._rows]
+        self._patches = {}
+        self._built_version = self._expected_version = version
+
+    def _patched(self, rows, matches):
+        """Drop edited rows from an index result and add back those that now match"""
+        if not self._patches:
+            return rows
+        edited = np.fromiter(self._patches, dtype=np.int64, count=len(self._patches))
+        rows = rows[~np.isin(rows, edited)]
+        added = [row for row, value in self._patches.items() if matches(value)]
+        return np.concatenate([rows, np.array(added, dtype=np.int64)]) if added else rows
+
+    def rows_equal(self, values):
+        """Data rows whose value is one of `values` (strings)"""
+        self._ensure_built()
+        wanted = set(values)
+        parts = [self._buckets[value] for value in wanted if value in self._buckets]
+        rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        return self._patched(rows, lambda value: value in wanted)
+
+    def rows_between(self, low=None, high=None):
+        """Data rows whose numeric value lies in [low, high]"""
+        self._ensure_built()
+        start = 0 if low is None else np.searchsorted(self._keys, low, side='left')
+        stop = len(self._keys) if high is None else np.searchsorted(self._keys, high, side='right')
+
+        def matches(value):
+            try:
+                number = float(value)
+            except ValueError:
+                return False
+            return ((low is None or number >= low) and (high is None or number <= high))
+
+        return self._patched(self._rows[start:stop], matches)
+
+
+class _RunIndex:
+    """
+    Runs of empty and filled cells of each column, for Ctrl+Arrow jumps
+
+    A column is kept as the sorted data rows where a run starts: row r is
+    an edge when it is filled and row r - 1 isn't, or the other way round
+    (row -1 counts as empty). A row is filled when an odd number of edges
+    lie at or before it, so any run boundary is found by bisection. An
+    edit that empties or fills a cell flips the edges at its row and the
+    next; flips are merged in on the next lookup, and bulk changes
+    (detected through the column version) rebuild the column.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._columns = {}  # {col: [version, edges, pending flips]}
+        store.watchers.append(self)
+
+    def close(self):
+        """Stop tracking edits"""
+        if self in self.store.watchers:
+            self.store.watchers.remove(self)
+
+    def cell_changed(self, row, col, old, new):
+        entry = self._columns.get(col)
+        if entry is None or entry[0] != self.store.versions[col] - 1:
+            return  # Rebuilt on next use
+        entry[0] += 1
+        if (old == '') != (new == ''):
+            entry[2] ^= {row, row + 1}
+
+    def edges(self, col):
+        """Sorted data rows where a run of empty or filled cells of the column starts"""
+        entry = self._columns.get(col)
+        if entry is None or entry[0] != self.store.versions[col]:
+            entry = self._columns[col] = [self.store.versions[col], _mask_edges(~self.store.blank(col)), set()]
+        elif entry[2]:
+            flips = np.fromiter(entry[2], dtype=np.int64, count=len(entry[2]))
+            entry[1] = np.setxor1d(entry[1], flips[flips < self.store.rows])
+            entry[2] = set()
+        return entry[1]
+
+
+class _SearchIndex:
+    """
+    Inverted value/token index over the column store, used by find/replace
+
+    Each column is factorized into distinct values once; a token
+    vocabulary maps lower-case words to the distinct values containing
+    them. A search tests the pattern against distinct values only
+    (through the vocabulary for plain text, with vectorized pandas string
+    methods for regexes) and maps the hits back to rows in one vectorized
+    lookup. Cells edited after a column was indexed are kept as per-row
+    patches and tested directly, so the index stays in step with edits
+    without being rebuilt.
+    """
+
+    _TOKEN = re.compile(r'\w+')
+
+    def __init__(self, store):
+        self.store = store
+        self._columns = {}
+        store.watchers.append(self)
+
+    def close(self):
+        """Stop tracking edits"""
+        if self in self.store.watchers:
+            self.store.watchers.remove(self)
+
+    def cell_changed(self, row, col, old, new):
+        entry = self._columns.get(col)
+        if entry is None:
+            return
+        if (entry['layout'] != self.store.layout_version
+                or entry['version'] != self.store.versions[col] - 1):
+            del self._columns[col]
+            return
+        entry['patches'][row] = new
+        entry['version'] += 1
+        if len(entry['patches']) > max(1024, self.store.rows // 20):
+            del self._columns[col]  # Cheaper to rebuild than to patch
+
+    def _column(self, col):
+        entry = self._columns.get(col)
+        if (entry is not None and entry['layout'] == self.store.layout_version
+                and entry['version'] == self.store.versions[col]):
+            return entry
+        codes, uniques = pd.factorize(self.store.column(col))
+        entry = {
+            'codes': codes,
+            'values': pd.Series(uniques, dtype=object).astype(str),
+            'lowered': None,  # Built on first use, like the token vocabulary
+            'vocabulary': None,
+            'patches': {},
+            'version': self.store.versions[col],
+            'layout': self.store.layout_version,
+        }
+        self._columns[col] = entry
+        return entry
+
+    @staticmethod
+    def _lowered(entry):
+        if entry['lowered'] is None:
+            entry['lowered'] = entry['values'].str.lower()
+        return entry['lowered']
+
+    def _vocabulary(self, entry):
+        """Token vocabulary of a column, or None when it would not narrow searches"""
+        if entry['vocabulary'] is None:
+            if len(entry['values']) > max(1024, len(entry['codes']) // 2):
+                entry['vocabulary'] = False  # Mostly distinct values: scan them directly
+                return None
+            tokens = self._lowered(entry).str.findall(self._TOKEN.pattern).explode().dropna()
+            token_codes, vocabulary = pd.factorize(tokens.to_numpy())
+            order = np.argsort(token_codes, kind='stable')
+            entry['vocabulary'] = pd.Series(vocabulary, dtype=object).astype(str)
+            entry['postings'] = tokens.index.to_numpy()[order]  # Value ids grouped by token...
+            # ...token i owns postings[bounds[i]:bounds[i + 1]]
+            entry['bounds'] = np.searchsorted(token_codes[order], np.arange(len(vocabulary) + 1))
+        return entry['vocabulary'] if entry['vocabulary'] is not False else None
+
+    @staticmethod
+    def matches(value, pattern, regex=False, case_sensitive=False):
+        """Test a single value the same way the index does"""
+        value = str(value)
+        if regex:
+            return re.search(pattern, value, 0 if case_sensitive else re.IGNORECASE) is not None
+        if case_sensitive:
+            return pattern in value
+        return pattern.lower() in value.lower()
+
+    def _matching_values(self, entry, pattern, regex, case_sensitive):
+        """Ids of the distinct values that contain the pattern"""
+        values = entry['values']
+        if regex:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)  # Patterns with groups
+                hits = values.str.contains(pattern, regex=True, case=case_sensitive)
+            return np.flatnonzero(hits.to_numpy(dtype=bool))
+        
+        words = self._TOKEN.findall(pattern.lower())
+        vocabulary = self._vocabulary(entry) if words else None
+        if vocabulary is None:
+            hits = values.str.contains(pattern, regex=False, case=case_sensitive)
+            return np.flatnonzero(hits.to_numpy(dtype=bool))
+        
+        # Candidates: values with a token containing the longest pattern word
+        key = max(words, key=len)
+        token_hits = np.flatnonzero(
+            vocabulary.str.contains(key, regex=False).to_numpy(dtype=bool))
+        if not len(token_hits):
+            return np.empty(0, dtype=np.int64)
+        bounds = entry['bounds']
+        candidates = np.unique(np.concatenate(
+            [entry['postings'][bounds[i]:bounds[i + 1]] for i in token_hits]))
+        texts = values if case_sensitive else self._lowered(entry)
+        needle = pattern if case_sensitive else pattern.lower()
+        found = texts.iloc[candidates].str.contains(needle, regex=False)
+        return candidates[found.to_numpy(dtype=bool)]
+
+    def find_rows(self, col, pattern, regex=False, case_sensitive=False):
+        """Sorted data rows of `col` whose value contains the pattern"""
+        entry = self._column(col)
+        ids = self._matching_values(entry, pattern, regex, case_sensitive)
+        hit = np.zeros(len(entry['values']) + 1, dtype=bool)
+        hit[ids] = True
+        rows = np.flatnonzero(hit[entry['codes']])
+        if entry['patches']:
+            edited = np.fromiter(entry['patches'], dtype=np.int64, count=len(entry['patches']))
+            rows = rows[~np.isin(rows, edited)]
+            added = [row for row, value in entry['patches'].items()
+                     if self.matches(value, pattern, regex, case_sensitive)]
+            if added:
+                rows = np.sort(np.concatenate([rows, np.array(added, dtype=np.int64)]))
+        return rows
+
+
+def _scale_colors(colors, steps):
+    """`steps` '#rrggbb' shades running evenly through the given colours"""
+    stops = np.array([[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in colors], dtype=np.float64)
+    positions = np.linspace(0, len(colors) - 1, steps)
+    shades = np.column_stack([np.interp(positions, np.arange(len(colors)), stops[:, channel])
+                              for channel in range(3)])
+    return ['#%02x%02x%02x' % tuple(shade) for shade in np.rint(shades).astype(int)]
+
+
+class _ConditionalFormats:
+    """
+    Conditional formatting rules, evaluated as masks over whole columns
+
+    Each rule gives every data row of its column a style code (-1 for
+    none), an index into the rule's list of (bg, fg) styles: thresholds
+    and duplicates have one style, colour scales SCALE_STEPS shades. The
+    codes are cached per column version. Single edits patch them where
+    the rule allows it - a threshold re-tests the edited cell, duplicates
+    keep per-value counts, a colour scale re-buckets the cell unless it
+    moves the column's min or max - and anything else (bulk writes, row
+    inserts, undo) rebuilds the rule on next use.
+    """
+
+    SCALE_STEPS = 32
+
+    def __init__(self, store):
+        self.store = store
+        self.rules = []  # Dicts with col, kind, options, styles and cache
+        self.styled = {}  # {col: column version its visible cells were styled at}
+        store.watchers.append(self)
+
+    def close(self):
+        """Stop tracking edits"""
+        if self in self.store.watchers:
+            self.store.watchers.remove(self)
+
+    def columns(self):
+        return {rule['col'] for rule in self.rules}
+
+    def add(self, col, kind, options, styles):
+        self.rules.append({'col': col, 'kind': kind, 'options': options, 'styles': styles, 'cache': None})
+        self.styled.pop(col, None)
+
+    def remove(self, col=None):
+        self.rules = [rule for rule in self.rules if col is not None and rule['col'] != col]
+        self.styled = {}
+
+    def remap(self, remap):
+        """Follow column inserts/deletes/moves; remap(col) returns the new col or None"""
+        rules = []
+        for rule in self.rules:
+            target = remap(rule['col'])
+            if target is not None:
+                rule['col'], rule['cache'] = target, None
+                rules.append(rule)
+        self.rules = rules
+        self.styled = {}
+
+    def cell_changed(self, row, col, old, new):
+        for rule in self.rules:
+            cache = rule['cache']
+            if rule['col'] != col or cache is None:
+                continue
+            if cache['version'] == self.store.versions[col] - 1 and self._patch(rule, cache, row, old, new):
+                cache['version'] += 1
+            else:
+                rule['cache'] = None
+
+    def style(self, row, col):
+        """(bg, fg) the rules of a column give a data row (None where no rule applies)"""
+        bg = fg = None
+        for rule in self.rules:
+            if rule['col'] != col:
+                continue
+            code = self.codes(rule)[row]
+            if code >= 0:
+                rule_bg, rule_fg = rule['styles'][code]
+                bg = bg or rule_bg
+                fg = fg or rule_fg
+        return bg, fg
+
+    def codes(self, rule):
+        """Style code of every data row of the rule's column"""
+        col = rule['col']
+        cache = rule['cache']
+        if (cache is None or cache['version'] != self.store.versions[col]
+                or len(cache['codes']) != self.store.rows):
+            cache = rule['cache'] = {'version': self.store.versions[col]}
+            cache['codes'] = getattr(self, '_build_' + rule['kind'])(rule, cache)
+        return cache['codes']
+
+    def _build_threshold(self, rule, cache):
+        options = rule['options']
+        numbers = self.store.numeric(rule['col'])
+        mask = np.ones(self.store.rows, dtype=bool)
+        equals = options['equals']
+        if isinstance(equals, (int, float)) and not isinstance(equals, bool):
+            mask &= numbers == equals
+        elif equals is not None:
+            mask &= self.store.column(rule['col']) == str(equals)
+        if options['min_value'] is not None:
+            mask &= numbers >= options['min_value']
+        if options['max_value'] is not None:
+            mask &= numbers <= options['max_value']
+        return np.where(mask, 0, -1).astype(np.int16)
+
+    def _build_duplicates(self, rule, cache):
+        column = self.store.column(rule['col'])
+        factors, uniques = pd.factorize(column)
+        counts = np.bincount(factors, minlength=len(uniques))
+        cache['counts'] = None  # {value: count}, made on the first edit
+        return np.where((counts[factors] > 1) & (column != ''), 0, -1).astype(np.int16)
+
+    def _build_scale(self, rule, cache):
+        numbers = self.store.numeric(rule['col'])
+        codes = np.full(self.store.rows, -1, dtype=np.int16)
+        filled = ~np.isnan(numbers)
+        if not filled.any():
+            cache['range'] = (np.nan, np.nan)
+            return codes
+        low, high = float(numbers[filled].min()), float(numbers[filled].max())
+        cache['range'] = (low, high)
+        codes[filled] = self._buckets(numbers[filled], low, high)
+        return codes
+
+    def _buckets(self, numbers, low, high):
+        if high == low:
+            return np.full(np.shape(numbers), self.SCALE_STEPS // 2, dtype=np.int16)
+        return np.rint((numbers - low) / (high - low) * (self.SCALE_STEPS - 1)).astype(np.int16)
+
+    def _patch(self, rule, cache, row, old, new):
+        """Update cached codes for one edited cell; False when the rule must be rebuilt"""
+        codes = cache['codes']
+        if row >= len(codes):
+            return False
+        if rule['kind'] == 'threshold':
+            options = rule['options']
+            equals = options['equals']
+            number = _parse_number(new)
+            if isinstance(equals, (int, float)) and not isinstance(equals, bool):
+                match = number == equals
+            else:
+                match = equals is None or new == str(equals)
+            if options['min_value'] is not None:
+                match = match and number >= options['min_value']
+            if options['max_value'] is not None:
+                match = match and number <= options['max_value']
+            codes[row] = 0 if match else -1
+        elif rule['kind'] == 'duplicates':
+            counts = cache['counts']
+            if counts is None:
+                # Counted from the column as it is after this edit
+                counts = cache['counts'] = pd.Series(self.store.column(rule['col'])).value_counts().to_dict()
+            else:
+                if old != '':
+                    counts[old] -= 1
+                if new != '':
+                    counts[new] = counts.get(new, 0) + 1
+            column = None
+            if old != '' and counts.get(old) == 1:
+                column = self.store.column(rule['col'])
+                codes[column == old] = -1  # The value left behind is unique now
+            if new != '' and counts.get(new) == 2:
+                column = self.store.column(rule['col']) if column is None else column
+                codes[column == new] = 0
+            codes[row] = 0 if new != '' and counts.get(new, 0) > 1 else -1
+        else:
+            low, high = cache['range']
+            before, after = _parse_number(old), _parse_number(new)
+            if before in (low, high) or not (np.isnan(after) or low <= after <= high):
+                return False  # The scale's range moves
+            codes[row] = -1 if np.isnan(after) else self._buckets(after, low, high)
+        return True
+
+
+class Table(ttk.Frame):
+    def __init__(self, parent, rows=10, cols=5, cell_width=120, cell_height=30, theme='default',spreadsheet_mode=False, sparse=False, **kwargs):
+        super().__init__(parent)
+        self.parent = parent
+        self.rows = rows
+        self.cols = cols
+        self.theme = theme
+        self.col_widths = _ColumnWidths(cols, cell_width)  # Default: cell_width
+        self.cell_height = cell_height
+        self.auto_scroll = True
+        self.selection_mode = "single"  # Add this line
+        self.default_cell_width = cell_width
+        self.default_cell_height = cell_height
+        self.row_heights = _RowHeights(rows, self.default_cell_height)
+        self._row_offsets = None  # Row y positions when a filter hides rows (see _layout_rows)
+        self._custom_rows = np.zeros(0, dtype=np.int64)  # Rows with a custom height...
+        self._custom_tops = np.zeros(0, dtype=np.int64)  # ...their y positions...
+        self._custom_shift = np.zeros(1, dtype=np.int64)  # ...and the extra height above each
+        self._viewport = None  # (top, bottom, left, right) cells currently drawn
+        self._render_job = None
+        self._scroll_callbacks = {}
+        # Live updates (see push_updates), handed over from any thread
+        self.update_interval = 16  # ms between applied batches
+        self._live_lock = threading.Lock()
+        self._pending_updates = {}  # {(data row, col): value}, last write wins
+        self._pending_rows = []  # Blocks of appended rows
+        self._live_scheduled = False
+        self._tail_rows = None  # Rows kept in tail mode
+        self._tail_follow = True
+        self.font = Font(font=('Calibre', 11))
+        self._cell_fonts = {}  # Font objects by theme font, for measuring
+        self._text_widths = {}  # {(font, text): pixels}
+        self.spreadsheet_mode = spreadsheet_mode
+
+        # Initialize the canvas and scrollbars
+        # Configure grid weights for proper expansion
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self._setup_canvas()
+        self._bind_delegated_events()
+        self._update_canvas_size()
+        # self._setup_event_bindings()  
+
+        # Theme configuration
+        self.themes = {
+            'default': {
+                'bg': 'white', 'fg': 'black',
+                'select_bg': '#a6d2ff', 'select_fg': 'black',
+                'even': 'white', 'odd': '#f0f0f0',
+                'grid': 'gray', 'font': ('Arial', 10)
+            },
+            'dark': {
+                'bg': '#2d2d2d', 'fg': 'white',
+                'select_bg': '#3a5f8a', 'select_fg': 'white',
+                'even': '#2d2d2d', 'odd': '#3d3d3d',
+                'grid': '#555555', 'font': ('Arial', 10)
+            },
+            'blue': {
+                'bg': '#e6f3ff', 'fg': 'black',
+                'select_bg': '#0078d7', 'select_fg': 'white',
+                'even': '#e6f3ff', 'odd': '#cce7ff',
+                'grid': '#99ceff', 'font': ('Segoe UI', 10)
+            },
+            'green': {
+                'bg': '#f0fff0', 'fg': 'black',
+                'select_bg': '#2e8b57', 'select_fg': 'white',
+                'even': '#f0fff0', 'odd': '#d0ffd0',
+                'grid': '#a0d0a0', 'font': ('Calibri', 10)
+            }
+        }
+        
+        # Initialize data structures
+        # Cell values by data row; a sparse table stores only its filled cells
+        self._store = (_SparseStore if sparse else _ColumnStore)(rows, cols)
+        self._row_order = None  # View row -> data row (None = identity)
+        self._view_index = None  # Cached inverse of _row_order
+        self._filters = {}  # {col: criteria} set through set_filter
+        self._data_visible = None  # Bool mask over data rows (None = all shown)
+        self._indexes = {}  # {(col, kind): _ColumnIndex}
+        self._search_index = None  # _SearchIndex, built on first find()
+        self._run_index = None  # _RunIndex, built on the first Ctrl+Arrow jump
+        self._formats = None  # _ConditionalFormats, made by the first conditional format
+        self.cells = {}
+        self._widget_cells = {}  # {cell Text widget: (view row, col)}, for the delegated handlers
+        self.merged_cells = {}
+        self.selected_cells = set()
+        self.undo_stack = []
+        self.redo_stack = []
+        self.max_undo_steps = 100
+        self.selection_rect = None
+        self.selection_start = None
+
+        self.formulas = {}  # Stores formulas: {(row,col): "=A1+B2"}
+        self._formulas_version = 0  # Bumped whenever self.formulas changes; keys the graph caches
+        self.calculated_values = {}  # Stores computed values
+        self.column_formulas = {}  # {col: (formula, start row, stop row or None)}
+        self._column_results = {}  # {col: (inputs key, last result array)}
+        self.calculation_enabled = True  # Master switch
+        self.workbook = None  # Workbook whose sheets this table shows (see Workbook)
+
+        # Opt-in multi-core recalculation (see enable_parallel_recalc)
+        self.parallel_recalc = False
+        self.parallel_recalc_workers = None
+        self.parallel_recalc_threshold = 10000
+        self.parallel_recalc_chunk = 2000
+        self._recalc_executor = None
+        
+        # Opt-in lazy recalculation (see enable_lazy_recalc)
+        self.lazy_recalc = False
+        self._dirty_formulas = set()  # Data cells whose stored result is stale
+        self._formula_graph_cache = None
+        self._formula_templates = {}  # {cell: (formula, shared R1C1 template)}
+
+        # Opt-in crash recovery journal (see enable_autosave)
+        self._journal = None
+        self._journal_state = {}  # Table state last written to the journal
+        self._autosave_job = None
+        self._layout_job = None  # Pending _flush_journal_layout (see _journal_layout_soon)
+        self.autosave_interval = 1000
+        self.checkpoint_bytes = 64 << 20
+        
+        if spreadsheet_mode:
+            self._setup_event_bindings()
+        
+        # Apply initial theme
+        self.current_theme = self.themes[theme]
+        self.create_grid()
+
+        # Create initial grid
+        self.resize_grid(rows, cols)
+        
+        # Bind events
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_drag_end)
+
+    def _bind_delegated_events(self):
+        """
+        Bind the handlers of all cells and the table's shortcuts, once
+
+        Cell Text widgets only get this table's bind tags (see _create_cell)
+        and each handler finds the cell from the widget the event came
+        from, so creating a cell registers no callbacks. Shortcuts are
+        bound to a tag carried by the cells and the canvas only, so they
+        act on the table that has the focus rather than on every table.
+        """
+        self._cell_tag = f"TableCell{self}"
+        self._shortcut_tag = f"Table{self}"
+        cell_events = {
+            '<Button-1>': self._delegate(self.on_click_cell),
+            '<FocusOut>': self._delegate(lambda event, row, col: self.process_cell_edit(row, col)),
+            '<Return>': self._delegate(lambda event, row, col: self.process_cell_edit(row, col)),
+            '<Up>': self._delegate(self._navigate_cell, 'up'),
+            '<Down>': self._delegate(self._navigate_cell, 'down'),
+            '<Left>': self._delegate(self._navigate_cell, 'left'),
+            '<Right>': self._delegate(self._navigate_cell, 'right'),
+            '<Tab>': self._delegate(self._navigate_cell, 'tab'),
+            '<Shift-Tab>': self._delegate(self._navigate_cell, 'shift_tab'),
+        }
+        shortcuts = {
+            '<Control-z>': self.undo,
+            '<Control-y>': self.redo,
+            '<Control-Shift-Z>': self.redo,
+            '<Control-Button-1>': self.on_ctrl_click,
+            '<Shift-Button-1>': self.on_shift_click,
+            '<Control-c>': self._copy_selected,
+            '<Control-v>': self._paste_to_selected,
+            '<Control-d>': self._fill_down_selected,
+            '<Control-r>': self._fill_right_selected,
+            '<Control-Up>': lambda event: self._jump_selected(event, 'up'),
+            '<Control-Down>': lambda event: self._jump_selected(event, 'down'),
+            '<Control-Left>': lambda event: self._jump_selected(event, 'left'),
+            '<Control-Right>': lambda event: self._jump_selected(event, 'right'),
+            '<Control-Home>': lambda event: self._jump_selected(event, 'home'),
+            '<Control-End>': lambda event: self._jump_selected(event, 'end'),
+            '<Prior>': lambda event: self._jump_selected(event, 'page_up'),
+            '<Next>': lambda event: self._jump_selected(event, 'page_down'),
+        }
+        for tag, events in ((self._cell_tag, cell_events), (self._shortcut_tag, shortcuts)):
+            for sequence, handler in events.items():
+                self.bind_class(tag, sequence, handler)
+        self._delegated_events = [(self._cell_tag, sequence) for sequence in cell_events]
+        self._delegated_events += [(self._shortcut_tag, sequence) for sequence in shortcuts]
+        # After the canvas' own bindings, so a Ctrl+click isn't undone by on_click
+        tags = self.canvas.bindtags()
+        self.canvas.bindtags(tags[:1] + (self._shortcut_tag,) + tags[1:])
+
+    def _delegate(self, handler, *args):
+        """Event handler calling handler(event, row, col, *args) for the cell whose widget got the event"""
+        def delegated(event):
+            cell = self._widget_cells.get(event.widget)
+            if cell is None or cell not in self.cells:
+                return None
+            return handler(event, *cell, *args)
+        return delegated
+
+    def _setup_canvas(self):
+        """Initialize canvas with optional reference headers"""
+        self.grid_frame = ttk.Frame(self)
+        self.grid_frame.grid(row=0, column=0, sticky='nsew')
+    
+        # Main table canvas
+        self.canvas = tk.Canvas(
+            self.grid_frame,
+            highlightthickness=0,
+            width=self.col_widths.total(),
+            height=self.rows * self.cell_height
+        )
+        self.canvas.grid(row=1, column=1, sticky='nsew')
+        # self.h_scroll = ttk.Scrollbar(self, orient='horizontal', command=self.canvas.xview)
+        # self.v_scroll = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        
+        # Reference headers (A, B, C... and 1, 2, 3...) are drawn on their
+        # own canvases, only for the cells in view, and scroll with the grid
+        self.col_header_canvas = tk.Canvas(
+            self.grid_frame, highlightthickness=0, height=_HEADER_HEIGHT, bg=_HEADER_BG)
+        self.row_header_canvas = tk.Canvas(
+            self.grid_frame, highlightthickness=0, width=self._row_header_width(), bg=_HEADER_BG)
+        if self.spreadsheet_mode:
+            self._setup_reference_headers()
+
+        # Configure grid weights: the table canvas takes any extra space
+        self.grid_frame.rowconfigure(1, weight=1)
+        self.grid_frame.columnconfigure(1, weight=1)
+
+        # Redraw the cells in view whenever the canvas scrolls
+        self.canvas.configure(yscrollcommand=self._on_yscroll, xscrollcommand=self._on_xscroll)
+
+        # Delegate canvas methods to the table instance
+        self.yview = self.canvas.yview
+        self.xview = self.canvas.xview
+        self.yview_moveto = self.canvas.yview_moveto
+        self.xview_moveto = self.canvas.xview_moveto
+        self.configure = self._configure_canvas
+        self.itemconfig = self.canvas.itemconfig
+        self.create_rectangle = self.canvas.create_rectangle
+        self.create_window = self.canvas.create_window
+        self.create_line = self.canvas.create_line
+        self.delete = self.canvas.delete  # This fixes the AttributeError
+
+        # # Configure canvas scrolling
+        # self.canvas.configure(
+        #     xscrollcommand=self.h_scroll.set,
+        #     yscrollcommand=self.v_scroll.set
+        # )
+        
+        # # Grid layout
+        # self.canvas.grid(row=0, column=0, sticky='nsew')
+        # self.v_scroll.grid(row=0, column=1, sticky='ns')
+        # self.h_scroll.grid(row=1, column=0, sticky='ew')
+
+        # # Bind resize event
+        self.canvas.bind("<Configure>", self._on_canvas_resize)
+        self.parent.bind('<Configure>', lambda e: self._update_canvas_size())
+
+    # def _setup_canvas(self):
+    #     """Initialize canvas and scrollbars with proper delegation"""
+    #     self.canvas = tk.Canvas(self, highlightthickness=0)
+    #     self.h_scroll = ttk.Scrollbar(self, orient='horizontal', command=self.canvas.xview)
+    #     self.v_scroll = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        
+    #     # Configure canvas scrolling
+    #     self.canvas.configure(
+    #         xscrollcommand=self.h_scroll.set,
+    #         yscrollcommand=self.v_scroll.set
+    #     )
+        
+    #     # Grid layout
+    #     self.canvas.grid(row=0, column=0, sticky='nsew')
+    #     self.v_scroll.grid(row=0, column=1, sticky='ns')
+    #     self.h_scroll.grid(row=1, column=0, sticky='ew')
+        
+    #     # Configure resizing
+    #     self.grid_rowconfigure(0, weight=1)
+    #     self.grid_columnconfigure(0, weight=1)
+        
+    #     # Delegate canvas methods to the table instance
+    #     self.yview = self.canvas.yview
+    #     self.xview = self.canvas.xview
+    #     self.yview_moveto = self.canvas.yview_moveto
+    #     self.xview_moveto = self.canvas.xview_moveto
+    #     self.configure = self.canvas.configure
+    #     self.itemconfig = self.canvas.itemconfig
+    #     self.create_rectangle = self.canvas.create_rectangle
+    #     self.create_window = self.canvas.create_window
+    #     self.create_line = self.canvas.create_line
+    #     self.delete = self.canvas.delete  # This fixes the AttributeError
+
+    #     # Bind resize event
+        self.canvas.bind("<Configure>", self._on_canvas_resize)
+
+    @property
+    def cell_width(self):
+        """Width of the columns that weren't given one of their own"""
+        return self.col_widths.default
+
+    @cell_width.setter
+    def cell_width(self, width):
+        self.col_widths.default = width
+
+    def _configure_canvas(self, cnf=None, **kwargs):
+        """canvas.configure that keeps the table's own scroll callbacks in the chain"""
+        options = dict(cnf or {}, **kwargs)
+        for option in ('yscrollcommand', 'xscrollcommand'):
+            if option in options:
+                self._scroll_callbacks[option] = options.pop(option)
+        if options or not (cnf or kwargs):
+            return self.canvas.configure(**options)
+
+    def _on_yscroll(self, first, last):
+        callback = self._scroll_callbacks.get('yscrollcommand')
+        if callback:
+            callback(first, last)
+        if self.spreadsheet_mode:
+            self.row_header_canvas.configure(scrollregion=self.canvas.cget('scrollregion'))
+            self.row_header_canvas.yview_moveto(first)
+        self._schedule_render()
+
+    def _on_xscroll(self, first, last):
+        callback = self._scroll_callbacks.get('xscrollcommand')
+        if callback:
+            callback(first, last)
+        if self.spreadsheet_mode:
+            self.col_header_canvas.configure(scrollregion=self.canvas.cget('scrollregion'))
+            self.col_header_canvas.xview_moveto(first)
+        self._schedule_render()
+
+    def auto_scroll_to_selection(self):
+        """Automatically scroll to keep selection visible"""
+        if not self.auto_scroll or not self.selected_cells:
+            return
+        
+        # Get the first selected cell for scrolling
+        row, col = next(iter(self.selected_cells))
+        self.see_cell(row, col)
+        
+    def see_cell(self, row, col):
+        """Scroll the least amount needed to bring view cell (row, col) on screen"""
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return
+        total_width = self.col_widths.total()
+        total_height = self._total_height()
+        view_width, view_height = self._view_size()
+        
+        y1, y2 = self._row_top(row), self._row_top(row + 1)
+        top = self.canvas.canvasy(0)
+        if total_height and y1 < top:
+            self.yview_moveto(y1 / total_height)
+        elif total_height and y2 > top + view_height:
+            self.yview_moveto(max(0, y2 - view_height) / total_height)
+
+        x1, x2 = self.col_widths.left(col), self.col_widths.left(col + 1)
+        left = self.canvas.canvasx(0)
+        if total_width and x1 < left:
+            self.xview_moveto(x1 / total_width)
+        elif total_width and x2 > left + view_width:
+            self.xview_moveto(max(0, x2 - view_width) / total_width)
+        self._render_viewport()
+
+    def update_selection(self, row, col):
+        """Update the selected cell and focus"""
+        # Truncate all previously selected cells
+        for r, c in self.selected_cells.copy():
+            if (r, c) in self.cells and not (r == row and c == col):
+                self._truncate_text(r, c)
+        
+        # Skip if cell is merged (select the merge origin instead)
+        if self.is_merged_cell(row, col):
+            for (r, c), (span_r, span_c) in self.merged_cells.items():
+                if (r <= row < r + span_r) and (c <= col < c + span_c):
+                    row, col = r, c
+                    break
+        
+        # Validate coordinates
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return
+        if not self._is_row_visible(row):
+            return
+        if (row, col) not in self.cells:
+            self.see_cell(row, col)  # Cells are only drawn while in view
+        
+        # Reset previous selection
+        for r, c in self.selected_cells.copy():
+            self._paint_cell(r, c, selected=False)
+        
+        # Set new selection (single selection)
+        self.selected_cells = {(row, col)}
+        current_cell = self.cells.get((row, col))
+        if current_cell:
+            self._render_cell(row, col)  # Show the full, untruncated value
+            self.canvas.itemconfig(current_cell['rect'], 
+                                 fill=self.current_theme['select_bg'])
+            current_cell['text'].config(bg=self.current_theme['select_bg'])
+            current_cell['text'].focus_set()
+            # Set cursor to end for Text widget
+            current_cell['text'].mark_set("insert", "end")
+            current_cell['text'].see("insert")  # Ensure cursor is visible
+            self.auto_scroll_to_selection()
+
+    def on_click_cell(self, event, row, col):
+        """Handle cell click events"""
+        self.update_selection(row, col)
+
+        if (row, col) in self.cells:
+            text_widget = self.cells[(row, col)]['text']
+            text_widget.focus_set()
+            # Place cursor at click position or end of text
+            text_widget.icursor(tk.END)
+
+    # ... (keep all other methods the same, but ensure they use self.selected_cells)
+
+    def draw_grid_lines(self):
+        """Draw the grid lines of the area in view"""
+        self.canvas.delete('grid_line')
+        if self._viewport is None:
+            return
+        top, bottom, left, right = self._viewport
+        
+        # Row boundaries (hidden rows collapse onto the same line)
+        y_positions = sorted({self._row_top(row) for row in range(top, bottom + 2)})
+        x_first, x_last = self.col_widths.left(left), self.col_widths.left(right + 1)
+        
+        # Horizontal lines
+        for y in y_positions:
+            self.canvas.create_line(
+                x_first, y,
+                x_last, y,
+                fill=self.current_theme['grid'],
+                tags="grid_line"
+            )
+        
+        # Vertical lines
+        for col in range(left, right + 2):
+            x = self.col_widths.left(col)
+            self.canvas.create_line(
+                x, y_positions[0],
+                x, y_positions[-1],
+                fill=self.current_theme['grid'],
+                tags="grid_line"
+            )
+        self.canvas.tag_raise('grid_line')
+
+    # def _setup_canvas(self):
+    #     """Initialize canvas with resize binding"""
+    #     self.canvas = tk.Canvas(self, highlightthickness=0)
+    #     self.h_scroll = ttk.Scrollbar(self, orient='horizontal', command=self.canvas.xview)
+    #     self.v_scroll = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        
+    #     self.canvas.configure(
+    #         xscrollcommand=self.h_scroll.set,
+    #         yscrollcommand=self.v_scroll.set
+    #     )
+        
+    #     self.canvas.grid(row=0, column=0, sticky='nsew')
+    #     self.v_scroll.grid(row=0, column=1, sticky='ns')
+    #     self.h_scroll.grid(row=1, column=0, sticky='ew')
+        
+    #     self.grid_rowconfigure(0, weight=1)
+    #     self.grid_columnconfigure(0, weight=1)
+        
+    #     # Bind resize event
+    #     self.canvas.bind("<Configure>", self._on_canvas_resize)
+
+    def _draw_reference_headers(self):
+        """Draw the row and column headers of the area in view"""
+        if not self.spreadsheet_mode:
+            return
+        self.row_header_canvas.delete('all')
+        self.col_header_canvas.delete('all')
+        if self._viewport is None:
+            return
+        top, bottom, left, right = self._viewport
+        width = self._row_header_width()
+        for row in (np.flatnonzero(self._visible_rows_mask(top, bottom + 1)) + top).tolist():
+            y1, y2 = self._row_top(row), self._row_top(row + 1)
+            self.row_header_canvas.create_rectangle(
+                0, y1, width, y2, fill=_HEADER_BG, outline=self.current_theme['grid'])
+            self.row_header_canvas.create_text(
+                width - 4, (y1 + y2) // 2, text=str(row + 1), anchor='e', font=_HEADER_FONT)
+        for col in range(left, right + 1):
+            x1, x2 = self.col_widths.left(col), self.col_widths.left(col + 1)
+            self.col_header_canvas.create_rectangle(
+                x1, 0, x2, _HEADER_HEIGHT,
+                fill=_HEADER_BG, outline=self.current_theme['grid'])
+            self.col_header_canvas.create_text(
+                (x1 + x2) // 2, _HEADER_HEIGHT // 2,
+                text=_column_letter(col), anchor='center', font=_HEADER_FONT)
+
+    def _row_header_width(self):
+        """Width of the row header canvas, enough for the largest row number"""
+        return max(40, self.font.measure(str(max(self.rows, 1))) + 12)
+
+    def _on_canvas_resize(self, event):
+        """Handle canvas resize - retruncate all text"""
+        for (row, col) in self.cells:
+            self._truncate_text(row, col)
+        self._schedule_render()
+
+
+    def create_grid(self):
+        """Lay out the grid and draw the cells in view"""
+        self._commit_focused_edit()
+        for key in list(self.cells):
+            self._destroy_cell(key)
+        self.canvas.delete("all")
+        self._viewport = None
+        self._layout_rows()
+        self.canvas.configure(
+            scrollregion=(0, 0, 
+                         self.col_widths.total(), 
+                         self._total_height())
+        )
+        self._render_viewport()
+
+    def _layout_rows(self):
+        """Recompute row positions after row heights, count or visibility changed"""
+        self.row_heights.resize(self.rows)
+        self.col_widths.resize(self.cols)
+        if self._data_visible is not None:
+            # Rows hidden by a filter take no space
+            heights = np.where(self._visible_rows_mask(), self.row_heights.to_array(), 0)
+            self._row_offsets = np.concatenate(([0], np.cumsum(heights))).astype(np.int64)
+            return
+        # Every row shown: positions follow from the default height and the
+        # (few) rows with a custom height, without any per-row storage
+        self._row_offsets = None
+        default = self.row_heights.default
+        rows = sorted(self.row_heights.overrides)
+        extra = [self.row_heights.overrides[row] - default for row in rows]
+        self._custom_rows = np.array(rows, dtype=np.int64)
+        self._custom_shift = np.concatenate(([0], np.cumsum(extra))).astype(np.int64)
+        self._custom_tops = self._custom_rows * default + self._custom_shift[:-1]
+
+    def _row_top(self, row):
+        """Canvas y of the top of view row `row` (row == self.rows gives the total height)"""
+        if self._row_offsets is not None:
+            return int(self._row_offsets[row])
+        before = int(np.searchsorted(self._custom_rows, row, side='left'))
+        return row * self.row_heights.default + int(self._custom_shift[before])
+
+    def _total_height(self):
+        """Height of all displayed rows"""
+        return self._row_top(self.rows)
+
+    def _view_size(self):
+        """(width, height) of the visible part of the canvas"""
+        if self.canvas.winfo_ismapped():
+            return self.canvas.winfo_width(), self.canvas.winfo_height()
+        # Not on screen yet: assume it may become as large as the screen
+        return self.winfo_screenwidth(), self.winfo_screenheight()
+
+    def _viewport_bounds(self):
+        """(top, bottom, left, right) view cells to draw: the visible area plus a margin"""
+        width, height = self._view_size()
+        x0, y0 = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        top = max(0, self._row_at_y(y0) - _RENDER_MARGIN)
+        bottom = min(self.rows - 1, self._row_at_y(y0 + height) + _RENDER_MARGIN)
+        left = max(0, self.col_widths.at(x0) - 1)
+        right = min(self.cols - 1, self.col_widths.at(x0 + width) + 1)
+        return top, bottom, left, right
+
+    def _schedule_render(self):
+        """Redraw the cells in view once the current event has been handled"""
+        if self._render_job is None:
+            self._render_job = self.after_idle(self._render_viewport)
+
+    def _render_viewport(self):
+        """
+        Create cell widgets for the area in view and drop the ones scrolled away
+
+        Only the visible rows and columns (plus a small margin) ever have
+        widgets, so drawing cost is independent of the table size.
+        """
+        self._render_job = None
+        if not self.rows or not self.cols:
+            return
+        top, bottom, left, right = self._viewport_bounds()
+
+        # Merged blocks reaching into view are drawn from their origin
+        covered = set()
+        origins = set()
+        for (r, c), (span_r, span_c) in self.merged_cells.items():
+            if r > bottom or r + span_r <= top or c > right or c + span_c <= left:
+                continue
+            origins.add((r, c))
+            covered.update(
+                (row, col)
+                for row in range(max(r, top), min(r + span_r, bottom + 1))
+                for col in range(max(c, left), min(c + span_c, right + 1))
+            )
+        visible = np.flatnonzero(self._visible_rows_mask(top, bottom + 1)) + top
+        wanted = {
+            (row, col)
+            for row in visible.tolist()
+            for col in range(left, right + 1)
+            if (row, col) not in covered
+        }
+        wanted.update(cell for cell in origins if self._is_row_visible(cell[0]))
+
+        for key in [key for key in self.cells if key not in wanted]:
+            self._destroy_cell(key)
+        for row, col in sorted(wanted - self.cells.keys()):
+            self._create_cell(row, col)
+        if self._store.paged and self._viewport is not None:
+            # Warm the cache for where the user is scrolling to
+            direction = int(np.sign(top - self._viewport[0]))
+            self.after_idle(self._store.prefetch, top, bottom, left, right, direction)
+        self._viewport = (top, bottom, left, right)
+        self.draw_grid_lines()
+        self._draw_reference_headers()
+
+    def _create_cell(self, row, col):
+        """Create the rectangle and Text widget of one view cell"""
+        span_rows, span_cols = self.get_merged_span(row, col)
+        x1 = self.col_widths.left(col)
+        y1 = self._row_top(row)
+        x2 = self.col_widths.left(min(col + span_cols, self.cols))  # Spanned columns
+        y2 = self._row_top(min(row + span_rows, self.rows))  # Spanned rows
+
+        style_id = self._store.styles.get(self._data_row(row), col)
+        colors = self._cell_colors(row, col)
+        fill = self.current_theme['select_bg'] if (row, col) in self.selected_cells else colors[0]
+
+        rect = self.canvas.create_rectangle(
+            x1, y1, x2, y2,
+            fill=fill,
+            outline='',
+            tags=f"cell_{row}_{col}"
+        )
+
+        text = tk.Text(
+            self.canvas,
+            bg=fill,
+            fg=colors[1],
+            font=self._style_font(style_id),
+            relief='flat',
+            borderwidth=0,
+            height=1,
+            width=max(1, int((x2-x1)/7)),
+            wrap=tk.NONE,  # Disable wrapping
+            highlightthickness=0,
+            selectbackground=self.current_theme['select_bg'],
+            selectforeground=self.current_theme['select_fg'],
+            exportselection=0  # Important for proper selection handling
+        )
+        text.tag_configure('align', justify=self._store.styles.styles[style_id].align or 'left')
+        if self._dirty_formulas:
+            self._resolve_formulas([(self._data_row(row), col)])
+        text.insert("1.0", self._store.get(self._data_row(row), col), 'align')
+        text.edit_modified(False)
+
+        text_window = self.canvas.create_window(
+            x1 + 2, y1 + 2,
+            window=text,
+            anchor='nw',
+            width=x2 - x1 - 4,
+            height=y2 - y1 - 4,
+            tags=f"text_{row}_{col}"
+        )
+
+        self.cells[(row, col)] = {
+            'rect': rect,
+            'text': text,
+            'text_window': text_window,
+            'style': style_id,
+            'colors': colors,  # (bg, fg) when not selected
+            'span_rows': span_rows,
+            'span_cols': span_cols
+        }
+
+        # Handled by the table's delegated bindings (see _bind_delegated_events)
+        self._widget_cells[text] = (row, col)
+        text.bindtags((self._cell_tag, self._shortcut_tag) + text.bindtags())
+
+    def _destroy_cell(self, key):
+        """Remove the widgets of a view cell, keeping any edit typed into it"""
+        self.process_cell_edit(*key)
+        cell = self.cells.pop(key)
+        self.canvas.delete(cell['rect'], cell['text_window'])
+        del self._widget_cells[cell['text']]
+        cell['text'].destroy()
+
+    def _data_row(self, row):
+        """Map a view row (as displayed) to the data row it shows"""
+        if self._row_order is None:
+            return row
+        return int(self._row_order[row])
+
+    def _view_row(self, data_row):
+        """Map a data row to the view row it is displayed at"""
+        if self._row_order is None:
+            return data_row
+        if self._view_index is None:
+            self._view_index = np.argsort(self._row_order)
+        return int(self._view_index[data_row])
+
+    def _view_rows(self, data_rows):
+        """Vectorized _view_row for an array of data rows"""
+        if self._row_order is None:
+            return np.asarray(data_rows)
+        self._view_row(0)  # Builds the inverse permutation
+        return self._view_index[data_rows]
+
+    def _set_row_order(self, order):
+        """Install a view row -> data row mapping (None restores data order)"""
+        self._row_order = order
+        self._view_index = None
+        self._journal_layout_soon()
+
+    def _render_cell(self, row, col, truncate=False):
+        """Show the stored value of view cell (row, col) in its Text widget"""
+        if (self._formats is not None and col in self._formats.columns()
+                and self._formats.styled.get(col, -1) not in (None, self._store.versions[col])):
+            # The edit may restyle other cells of the column (duplicates, scales)
+            self._formats.styled[col] = None
+            self.after_idle(self._restyle_formats)
+        cell = self.cells.get((row, col))
+        if cell is None:
+            return
+        text_widget = cell['text']
+        if self._dirty_formulas:
+            self._resolve_formulas([(self._data_row(row), col)])
+        value = str(self._store.get(self._data_row(row), col))
+        
+        if truncate:
+            # Calculate available width in characters
+            cell_width = int(float(self.canvas.itemcget(cell['text_window'], 'width')))
+            avg_char_width = self.font.measure("M")
+            max_chars = max(3, int(cell_width / avg_char_width)) if avg_char_width > 0 else 20
+            if len(value) > max_chars:
+                value = value[:max_chars-3] + "..."
+        
+        text_widget.delete("1.0", "end")
+        text_widget.insert("1.0", value, 'align')
+        text_widget.edit_modified(False)
+
+    def _commit_focused_edit(self):
+        """Store an edit still pending in the focused cell before widgets are rebuilt"""
+        try:
+            focused = self.focus_get()
+        except (KeyError, tk.TclError):
+            return
+        cell = self._widget_cells.get(focused)
+        if cell is not None:
+            self.process_cell_edit(*cell)
+
+    def _navigate_cell(self, event, current_row, current_col, direction):
+        """Handle keyboard navigation between cells"""
+        new_row, new_col = current_row, current_col
+        
+        if direction == 'up':
+            new_row = max(0, current_row - 1)
+        elif direction == 'down':
+            new_row = min(self.rows - 1, current_row + 1)
+        elif direction == 'left':
+            new_col = max(0, current_col - 1)
+        elif direction == 'right':
+            new_col = min(self.cols - 1, current_col + 1)
+        elif direction == 'tab':
+            if event.state & 0x0001:  # Shift key (Shift+Tab)
+                new_col = current_col - 1
+                if new_col < 0:
+                    new_col = self.cols - 1
+                    new_row = max(0, current_row - 1)
+            else:  # Regular Tab
+                new_col = current_col + 1
+                if new_col >= self.cols:
+                    new_col = 0
+                    new_row = min(self.rows - 1, current_row + 1)
+        elif direction == 'shift_tab':
+            new_col = current_col - 1
+            if new_col < 0:
+                new_col = self.cols - 1
+                new_row = max(0, current_row - 1)
+        
+        # Skip rows hidden by a filter
+        if not self._is_row_visible(new_row):
+            step = -1 if new_row < current_row else 1
+            new_row = self._next_visible_row(new_row, step, default=current_row)
+        
+        # Skip merged cells (except the top-left cell of a merged range)
+        while self.is_merged_cell(new_row, new_col) and not ((new_row, new_col) in self.merged_cells):
+            # Adjust position based on direction
+            if direction in ['up', 'down']:
+                new_row = max(0, new_row - 1) if direction == 'up' else min(self.rows - 1, new_row + 1)
+            else:
+                new_col = max(0, new_col - 1) if direction in ['left', 'shift_tab'] else min(self.cols - 1, new_col + 1)
+        
+        # Only move if we're actually changing cells
+        if (new_row != current_row) or (new_col != current_col):
+            self.update_selection(new_row, new_col)
+        
+        return 'break'  # Prevent default behavior
 
-        # Initialize the canvas and scrollbars
-        # Configure grid weights for proper expansion
-        self.grid_rowconfigure(0, weight=1)
-        self.grid_columnconfigure(0, weight=1)
-        self._setup_canvas()
-        self._update_canvas_size()
-        # self._setup_event_bindings()  
+    def _jump_selected(self, event, direction):
+        """Ctrl+Arrow, Ctrl+Home/End and PageUp/PageDown handler"""
+        cell = self._widget_cells.get(event.widget)
+        if cell is None:
+            if self.selection_start is not None:
+                cell = self.selection_start
+            elif self.selected_cells:
+                cell = min(self.selected_cells)
+            else:
+                cell = (0, 0)
+        self.update_selection(*self.jump_target(*cell, direction))
+        return 'break'
+
+    def jump_target(self, row, col, direction):
+        """
+        Cell reached from view cell (row, col) by a spreadsheet navigation key
+
+        Args:
+            direction (str): 'up', 'down', 'left', 'right' (Ctrl+Arrow: to
+                             the edge of the current block of filled cells,
+                             or to the next filled cell), 'home', 'end'
+                             (Ctrl+Home/End: first cell, last used cell),
+                             'page_up' or 'page_down'
+
+        Returns:
+            tuple: (view row, col)
+        """
+        if not self.rows or not self.cols:
+            return row, col
+        if direction in ('up', 'down'):
+            step = -1 if direction == 'up' else 1
+            if self._row_order is None and self._data_visible is None:
+                if self._run_index is None:
+                    self._run_index = _RunIndex(self._store)
+                return _run_jump(self._run_index.edges(col), self.rows, row, step), col
+            # Sorted or filtered: runs follow the displayed order
+            shown = np.flatnonzero(self._visible_rows_mask())
+            filled = ~self._store.blank(col)[self._data_row_array(shown)]
+            position = int(np.searchsorted(shown, row))
+            return int(shown[_run_jump(_mask_edges(filled), len(shown), position, step)]), col
+        if direction in ('left', 'right'):
+            data_row = self._data_row(row)
+            filled = np.array([self._store.get(data_row, c) != '' for c in range(self.cols)])
+            return row, _run_jump(_mask_edges(filled), self.cols, col, -1 if direction == 'left' else 1)
+        if direction in ('page_up', 'page_down'):
+            height = self._view_size()[1]
+            y = self._row_top(row) + (height if direction == 'page_down' else -height)
+            return self._row_at_y(min(max(y, 0), self._total_height() - 1)), col
+        if direction == 'home':
+            return self._next_visible_row(0, 1, default=0), 0
+        if direction == 'end':
+            return self._last_used_cell()
+        raise ValueError(f"Unknown direction {direction!r}")
+
+    def _last_used_cell(self):
+        """(view row, col) of the last displayed row and column holding a value"""
+        last_row = last_col = 0
+        identity = self._row_order is None and self._data_visible is None
+        if identity and self._run_index is None:
+            self._run_index = _RunIndex(self._store)
+        shown = None if identity else np.flatnonzero(self._visible_rows_mask())
+        for col in range(self.cols):
+            if identity:
+                edges = self._run_index.edges(col)
+                if not len(edges):
+                    continue
+                # An odd number of edges means the last run reaches the end
+                row = self.rows - 1 if len(edges) % 2 else int(edges[-1]) - 1
+            else:
+                filled = np.flatnonzero(~self._store.blank(col)[self._data_row_array(shown)])
+                if not len(filled):
+                    continue
+                row = int(shown[filled[-1]])
+            last_row, last_col = max(last_row, row), col
+        return last_row, last_col
+
+    def _setup_event_bindings(self):
+        """Add hover effects for references"""
+        # Highlight the column or row under the pointer on a header
+        self.col_header_canvas.bind("<Motion>", self._on_col_header_motion)
+        self.col_header_canvas.bind("<Leave>", lambda e: self._remove_highlight())
+        self.row_header_canvas.bind("<Motion>", self._on_row_header_motion)
+        self.row_header_canvas.bind("<Leave>", lambda e: self._remove_highlight())
+        
+    def _on_col_header_motion(self, event):
+        col = self.col_widths.at(self.col_header_canvas.canvasx(event.x))
+        self._remove_highlight()
+        if 0 <= col < self.cols:
+            self._highlight_column(col)
+
+    def _on_row_header_motion(self, event):
+        row = self._row_at_y(self.row_header_canvas.canvasy(event.y))
+        self._remove_highlight()
+        if 0 <= row < self.rows:
+            self._highlight_row(row)
+
+    def _highlight_column(self, col):
+        """Visual feedback for column reference"""
+        for (row, c), cell in self.cells.items():
+            if c == col:
+                self.canvas.itemconfig(
+                    cell['rect'],
+                    fill='#e6f3ff'  # Light blue highlight
+                )
+
+    def _highlight_row(self, row):
+        """Visual feedback for row reference"""
+        for col in range(self.cols):
+            if (row, col) in self.cells:
+                self.canvas.itemconfig(
+                    self.cells[(row, col)]['rect'],
+                    fill='#e6f3ff'  # Light blue highlight
+                )
+
+    def _remove_highlight(self):
+        """Remove visual highlights"""
+        for (row, col), cell in self.cells.items():
+            self.canvas.itemconfig(cell['rect'], fill=cell['colors'][0])
+
+    def _truncate_text(self, row, col):
+        """Truncate text with ellipsis if it's too long for the cell"""
+        self.process_cell_edit(row, col)  # Don't lose an uncommitted edit
+        self._render_cell(row, col, truncate=(row, col) not in self.selected_cells)
 
-        # Add header style
-        style = ttk.Style()
-        style.configure('Header.TLabel', 
-                        background='#f0f0f0',
-                        foreground='black',
-                        font=('Arial', 10, 'bold'))
+    def on_click_cell(self, event, row, col):
+        """Handle cell click - show full text when selected"""
+        self.update_selection(row, col)
         
-        # Theme configuration
-        self.themes = {
-            'default': {
-                'bg': 'white', 'fg': 'black',
-                'select_bg': '#a6d2ff', 'select_fg': 'black',
-                'even': 'white', 'odd': '#f0f0f0',
-                'grid': 'gray', 'font': ('Arial', 10)
-            },
-            'dark': {
-                'bg': '#2d2d2d', 'fg': 'white',
-                'select_bg': '#3a5f8a', 'select_fg': 'white',
-                'even': '#2d2d2d', 'odd': '#3d3d3d',
-                'grid': '#555555', 'font': ('Arial', 10)
-            },
-            'blue': {
-                'bg': '#e6f3ff', 'fg': 'black',
-                'select_bg': '#0078d7', 'select_fg': 'white',
-                'even': '#e6f3ff', 'odd': '#cce7ff',
-                'grid': '#99ceff', 'font': ('Segoe UI', 10)
-            },
-            'green': {
-                'bg': '#f0fff0', 'fg': 'black',
-                'select_bg': '#2e8b57', 'select_fg': 'white',
-                'even': '#f0fff0', 'odd': '#d0ffd0',
-                'grid': '#a0d0a0', 'font': ('Calibri', 10)
-            }
-        }
+        if (row, col) in self.cells:
+            text_widget = self.cells[(row, col)]['text']
+            # For Text widget, set cursor at click position
+            text_widget.focus_set()
+            text_widget.mark_set("insert", f"@{event.x},{event.y}")
+            text_widget.see("insert")
+
+
+    def add_theme(self, name, config):
+        """
+        Add a custom theme configuration
         
-        # Initialize data structures
-        self.cells = {}
-        self.merged_cells = {}
-        self.selected_cells = set()
-        self.undo_stack = []
-        self.redo_stack = []
-        self.max_undo_steps = 100
-        self.selection_rect = None
-        self.selection_start = None
+        Args:
+            name (str): Theme name
+            config (dict): Theme configuration with keys:
+                - bg: background color
+                - fg: text color
+                - select_bg: selection background
+                - select_fg: selection text
+                - even: even row color
+                - odd: odd row color
+                - grid: grid line color
+                - font: text font
+        """
+        required_keys = ['bg', 'fg', 'select_bg', 'select_fg', 'even', 'odd', 'grid', 'font']
+        if all(key in config for key in required_keys):
+            self.themes[name] = config
+        else:
+            raise ValueError("Theme config must contain all required keys")
 
-        self.formulas = {}  # Stores formulas: {(row,col): "=A1+B2"}
-        self.calculated_values = {}  # Stores computed values
-        self.calculation_enabled = True  # Master switch
+    def get_available_themes(self):
+        """Return list of available theme names"""
+        return list(self.themes.keys())
+
+    def is_merged_cell(self, row, col):
+        """Check if cell is part of a merged range"""
+        for (r, c), (span_r, span_c) in self.merged_cells.items():
+            if (r <= row < r + span_r) and (c <= col < c + span_c) and not (r == row and c == col):
+                return True
+        return False
+
+    def get_merged_span(self, row, col):
+        """Get merged span for cell (default 1x1 if not merged)"""
+        return self.merged_cells.get((row, col), (1, 1))
+
+    def merge_cells(self, start_row, start_col, span_rows=1, span_cols=1):
+        """Merge a range of cells"""
+        # Validate merge area
+        self.save_state(f"Merge cells at ({start_row},{start_col})")
+        if (start_row + span_rows > self.rows or start_col + span_cols > self.cols):
+            raise ValueError("Merge area exceeds grid dimensions")
+            
+        # Clear existing merged cells in this range
+        for r in range(start_row, start_row + span_rows):
+            for c in range(start_col, start_col + span_cols):
+                if (r, c) in self.merged_cells:
+                    self.unmerge_cells(r, c)
         
-        if spreadsheet_mode:
-            self._init_cell_references()
-            self._setup_event_bindings()
+        # Store merge info
+        self.merged_cells[(start_row, start_col)] = (span_rows, span_cols)
         
-        # Apply initial theme
-        self.current_theme = self.themes[theme]
+        # Recreate grid with new merged cells
         self.create_grid()
+        
+        # Update selection to the merged cell
+        if self.selected_cells:
+            # Get the first selected cell's row
+            first_selected_row = next(iter(self.selected_cells))[0]
+            first_selected_col = next(iter(self.selected_cells))[1]
+            self.update_selection(min(start_row, first_selected_row), 
+                                min(start_col, first_selected_col))
+        # After merging:
+        
+        self.refresh_grid()
 
-        # Create initial grid
-        self.resize_grid(rows, cols)
+    def merge_selected(self):
+        """Merge currently selected cells"""
+        if not self.selected_cells:
+            return
+            
+        # Find bounding rectangle of selection
+        rows = {r for r, c in self.selected_cells}
+        cols = {c for r, c in self.selected_cells}
         
-        # Bind events
-        self.canvas.bind("<Button-1>", self.on_click)
-        self.canvas.bind("<B1-Motion>", self.on_drag)
-        self.canvas.bind("<ButtonRelease-1>", self.on_drag_end)
-        self.bind_all("<Control-z>", self.undo)
-        self.bind_all("<Control-y>", self.redo)
-        self.bind_all("<Control-Shift-Z>", self.redo)
-        self.bind_all("<Control-Button-1>", self.on_ctrl_click)
-        self.bind_all("<Shift-Button-1>", self.on_shift_click)
-        # Add to clipboard
-        self.bind_all("<Control-c>", lambda e: self._copy_selected())
-        self.bind_all("<Control-v>", lambda e: self._paste_to_selected())
-
-        def _copy_selected(self):
-            """Copy selected cells to clipboard"""
-            if not self.selected_cells:
-                return
-            values = [self.get_cell(r, c)['value'] for r, c in self.selected_cells]
-            self.clipboard_clear()
-            self.clipboard_append("\t".join(values))
-            return "break"
+        min_row, max_row = min(rows), max(rows)
+        min_col, max_col = min(cols), max(cols)
+        
+        # Merge the rectangular area
+        self.merge_cells(
+            min_row, min_col,
+            max_row - min_row + 1,
+            max_col - min_col + 1
+        )
 
-        def _paste_to_selected(self):
-            """Paste clipboard content to selected cells"""
-            if not self.selected_cells:
-                return
-            try:
-                data = self.clipboard_get()
-                values = data.split("\t")
-                for (r, c), value in zip(sorted(self.selected_cells), values):
-                    self.set_cell(r, c, value)
-            except tk.TclError:
-                pass
-            return "break"
+    def auto_merge_runs(self, columns, respect_parent_group=True):
+        """
+        Merge the runs of equal values down some columns, like pivot-table row headers
 
-    def _setup_canvas(self):
-        """Initialize canvas with optional reference headers"""
-        self.grid_frame = ttk.Frame(self)
-        self.grid_frame.grid(row=0, column=0, sticky='nsew')
-    
-        # Create headers only if in spreadsheet mode
-        self.col_headers = []
-        self.row_headers = []
-    
-        if self.spreadsheet_mode:
-            # Column headers (A, B, C...)
-            for col in range(self.cols):
-                header = ttk.Label(
-                    self.grid_frame,
-                    text=chr(65 + col),
-                    width=self.cell_width//7,
-                    anchor='center',
-                    style='Header.TLabel'
-                )
-                header.grid(row=0, column=col+1, sticky='nsew')
-                self.col_headers.append(header)
-        
-            # Row headers (1, 2, 3...)
-            for row in range(self.rows):
-                header = ttk.Label(
-                    self.grid_frame,
-                    text=str(row + 1),
-                    width=4,
-                    anchor='e',
-                    style='Header.TLabel'
-                )
-                header.grid(row=row+1, column=0, sticky='nsew')
-                self.row_headers.append(header)
-    
-        # Main table canvas
-        canvas_row = 1 if self.spreadsheet_mode else 0
-        canvas_col = 1 if self.spreadsheet_mode else 0
-        canvas_colspan = self.cols if self.spreadsheet_mode else self.cols + 1
-        canvas_rowspan = self.rows if self.spreadsheet_mode else self.rows + 1
-    
-        self.canvas = tk.Canvas(
-            self.grid_frame,
-            highlightthickness=0,
-            width=self.cols * self.cell_width,
-            height=self.rows * self.cell_height
-        )
-        self.canvas.grid(
-            row=canvas_row, 
-            column=canvas_col, 
-            columnspan=canvas_colspan, 
-            rowspan=canvas_rowspan, 
-            sticky='nsew'
-        )
-        # self.h_scroll = ttk.Scrollbar(self, orient='horizontal', command=self.canvas.xview)
-        # self.v_scroll = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
-        
+        Runs are found for each column in one vectorized pass over its
+        values in view order; all merges are added together, the grid is
+        drawn once and a single undo step removes them. Empty cells and
+        rows hidden by a filter end a run and are never merged. Merges
+        already touching the columns are replaced.
 
-    
-        # Configure grid weights
-        for i in range(self.rows + (1 if self.spreadsheet_mode else 0)):
-            self.grid_frame.rowconfigure(i, weight=1)
-        for i in range(self.cols + (1 if self.spreadsheet_mode else 0)):
-            self.grid_frame.columnconfigure(i, weight=1)
+        Args:
+            columns: Column index, column letter, or a list of them,
+                     outermost group first
+            respect_parent_group (bool): Also end a column's runs where
+                                         the runs of the columns before it
+                                         end, so the merges nest
 
-        # Delegate canvas methods to the table instance
-        self.yview = self.canvas.yview
-        self.xview = self.canvas.xview
-        self.yview_moveto = self.canvas.yview_moveto
-        self.xview_moveto = self.canvas.xview_moveto
-        self.configure = self.canvas.configure
-        self.itemconfig = self.canvas.itemconfig
-        self.create_rectangle = self.canvas.create_rectangle
-        self.create_window = self.canvas.create_window
-        self.create_line = self.canvas.create_line
-        self.delete = self.canvas.delete  # This fixes the AttributeError
+        Returns:
+            int: Number of merges added
+
+        Examples:
+            table.auto_merge_runs(['A', 'B'])
+        """
+        if not isinstance(columns, (list, tuple)):
+            columns = [columns]
+        columns = [_column_index(c) if isinstance(c, str) else c for c in columns]
+        for col in columns:
+            if not 0 <= col < self.cols:
+                raise IndexError(f"Column {col} out of bounds (table has {self.cols} columns)")
+        if self.rows < 2:
+            return 0
+        self._commit_focused_edit()
+        self._resolve_formulas(columns=set(columns))
 
-        # # Configure canvas scrolling
-        # self.canvas.configure(
-        #     xscrollcommand=self.h_scroll.set,
-        #     yscrollcommand=self.v_scroll.set
-        # )
-        
-        # # Grid layout
-        # self.canvas.grid(row=0, column=0, sticky='nsew')
-        # self.v_scroll.grid(row=0, column=1, sticky='ns')
-        # self.h_scroll.grid(row=1, column=0, sticky='ew')
+        rows = self._data_row_array(np.arange(self.rows))
+        visible = self._visible_rows_mask()
+        # breaks[i]: a run can't continue from view row i to row i + 1
+        hidden = ~(visible[1:] & visible[:-1])
+        breaks = hidden
+        merges = {}
+        for col in columns:
+            values = self._store.values(rows, col)
+            own = (values[1:] != values[:-1]) | hidden
+            breaks = breaks | own if respect_parent_group else own
+            starts = np.flatnonzero(np.concatenate(([True], breaks)))
+            lengths = np.diff(np.append(starts, self.rows))
+            runs = (lengths > 1) & (values[starts] != '')
+            for row, length in zip(starts[runs].tolist(), lengths[runs].tolist()):
+                merges[(row, col)] = (length, 1)
 
-        # # Bind resize event
-        self.canvas.bind("<Configure>", self._on_canvas_resize)
-        self.parent.bind('<Configure>', lambda e: self._update_canvas_size())
+        self._push_undo(self._row_order_state("Merge runs"))
+        wanted = set(columns)
+        self.merged_cells = {
+            (r, c): span for (r, c), span in self.merged_cells.items()
+            if not wanted.intersection(range(c, c + span[1]))
+        }
+        self.merged_cells.update(merges)
+        self.refresh_grid()
+        return len(merges)
 
-    # def _setup_canvas(self):
-    #     """Initialize canvas and scrollbars with proper delegation"""
-    #     self.canvas = tk.Canvas(self, highlightthickness=0)
-    #     self.h_scroll = ttk.Scrollbar(self, orient='horizontal', command=self.canvas.xview)
-    #     self.v_scroll = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
-        
-    #     # Configure canvas scrolling
-    #     self.canvas.configure(
-    #         xscrollcommand=self.h_scroll.set,
-    #         yscrollcommand=self.v_scroll.set
-    #     )
+    def unmerge_cells(self, row, col):
+        """Unmerge cells starting at row,col"""
+        self.save_state(f"Unmerge cells at ({row},{col})")
+        if (row, col) in self.merged_cells:
+            del self.merged_cells[(row, col)]
+            self.create_grid()
+            self.update_selection(row, col)
+        self.refresh_grid()
+
+
+    def select_cell(self, row, col):
+        """Select a single cell (maintaining single selection)"""
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return
+            
+        self.update_selection(row, col)  # Reuse the unified method
+
+    def select_range(self, start_row, start_col, end_row, end_col):
+        """Select range of cells (for multiple selection mode)"""
+        if self.selection_mode == "single":
+            self.update_selection(end_row, end_col)
+            return
+            
+        # For multiple selection mode
+        new_selection = set()
+        for row in range(min(start_row, end_row), max(start_row, end_row) + 1):
+            for col in range(min(start_col, end_col), max(start_col, end_col) + 1):
+                if (row, col) in self.cells:
+                    new_selection.add((row, col))
         
-    #     # Grid layout
-    #     self.canvas.grid(row=0, column=0, sticky='nsew')
-    #     self.v_scroll.grid(row=0, column=1, sticky='ns')
-    #     self.h_scroll.grid(row=1, column=0, sticky='ew')
+        # Clear previous selection
+        for r, c in self.selected_cells - new_selection:
+            self._paint_cell(r, c, selected=False)
         
-    #     # Configure resizing
-    #     self.grid_rowconfigure(0, weight=1)
-    #     self.grid_columnconfigure(0, weight=1)
+        # Set new selection
+        for r, c in new_selection:
+            cell = self.cells.get((r, c))
+            if cell:
+                self.canvas.itemconfig(cell['rect'], fill=self.current_theme['select_bg'])
+                cell['text'].config(bg=self.current_theme['select_bg'])
         
-    #     # Delegate canvas methods to the table instance
-    #     self.yview = self.canvas.yview
-    #     self.xview = self.canvas.xview
-    #     self.yview_moveto = self.canvas.yview_moveto
-    #     self.xview_moveto = self.canvas.xview_moveto
-    #     self.configure = self.canvas.configure
-    #     self.itemconfig = self.canvas.itemconfig
-    #     self.create_rectangle = self.canvas.create_rectangle
-    #     self.create_window = self.canvas.create_window
-    #     self.create_line = self.canvas.create_line
-    #     self.delete = self.canvas.delete  # This fixes the AttributeError
+        self.selected_cells = new_selection
+        if new_selection:
+            self.auto_scroll_to_selection(*next(iter(new_selection)))
 
-    #     # Bind resize event
-        self.canvas.bind("<Configure>", self._on_canvas_resize)
+    def clear_selection(self):
+        """Clear all selections using selected_cells"""
+        for row, col in self.selected_cells.copy():
+            self._paint_cell(row, col, selected=False)
+        self.selected_cells.clear()
 
-    def auto_scroll_to_selection(self):
-        """Automatically scroll to keep selection visible"""
-        if not self.auto_scroll or not self.selected_cells:
+    def get_selected_cell(self):
+        """Get the primary selected cell (for single selection)"""
+        if not self.selected_cells:
+            return None
+        return next(iter(self.selected_cells))
+
+
+    def on_resize(self, event):
+        """Improved resize handler for clean redraw"""
+        if event.width < 100 or event.height < 100:
             return
         
-        # Get the first selected cell for scrolling
-        row, col = next(iter(self.selected_cells))
-        
-        # Calculate visible area
-        x_pos = col / self.cols
-        y_pos = row / self.rows
+        # Calculate new cell sizes (ensuring whole numbers)
+        new_cell_width = max(50, int(event.width / self.cols))
+        new_cell_height = max(20, int(event.height / self.rows))
         
-        self.xview_moveto(max(0, min(x_pos, 1)))
-        self.yview_moveto(max(0, min(y_pos, 1)))
+        if (new_cell_width != self.cell_width or 
+            new_cell_height != self.cell_height):
+            self.cell_width = new_cell_width
+            self.cell_height = new_cell_height
+            self.create_grid()
+            self.configure_scroll()
 
-    def update_selection(self, row, col):
-        """Update the selected cell and focus"""
-        # Truncate all previously selected cells
-        for r, c in self.selected_cells.copy():
-            if (r, c) in self.cells and not (r == row and c == col):
-                self._truncate_text(r, c)
+    def on_click(self, event):
+        """Handle mouse clicks on the canvas"""
+        self.canvas.focus_set()  # Shortcuts go to the table clicked last
+        row, col = self._cell_at_event(event)
+        self.update_selection(row, col)
+
+    def _cell_at_event(self, event):
+        """Map a mouse event to the (view row, col) under the pointer"""
+        x, y = event.x, event.y
+        if event.widget is not self.canvas:
+            # Event reported by a child (cell Text widget): use root coordinates
+            x = event.x_root - self.canvas.winfo_rootx()
+            y = event.y_root - self.canvas.winfo_rooty()
+        x = self.canvas.canvasx(x)
+        y = self.canvas.canvasy(y)
+        col = self.col_widths.at(x)
+        return self._row_at_y(y), col
+
+    def _row_at_y(self, y):
+        """View row at canvas y; rows hidden by a filter are never returned"""
+        if self._row_offsets is not None:
+            row = int(np.searchsorted(self._row_offsets, y, side='right')) - 1
+        else:
+            default = self.row_heights.default
+            before = int(np.searchsorted(self._custom_tops, y, side='right')) - 1
+            if before < 0:
+                row = int(y // default)
+            else:
+                custom = int(self._custom_rows[before])
+                bottom = int(self._custom_tops[before]) + self.row_heights[custom]
+                row = custom if y < bottom else custom + 1 + int((y - bottom) // default)
+        return min(max(0, row), self.rows - 1)
+
+    def on_key(self, event):
+        """Handle keyboard navigation"""
+        row, col = self.selected_cells
         
-        # Skip if cell is merged (select the merge origin instead)
-        if self.is_merged_cell(row, col):
-            for (r, c), (span_r, span_c) in self.merged_cells.items():
-                if (r <= row < r + span_r) and (c <= col < c + span_c):
-                    row, col = r, c
-                    break
+        if event.keysym == 'Up':
+            row = max(0, row - 1)
+        elif event.keysym == 'Down':
+            row = min(self.rows - 1, row + 1)
+        elif event.keysym == 'Left':
+            col = max(0, col - 1)
+        elif event.keysym == 'Right':
+            col = min(self.cols - 1, col + 1)
+        elif event.keysym == 'Tab':
+            if event.state & 0x0001:  # Shift+Tab
+                col -= 1
+                if col < 0:
+                    col = self.cols - 1
+                    row = max(0, row - 1)
+            else:  # Regular Tab
+                col += 1
+                if col >= self.cols:
+                    col = 0
+                    row = min(self.rows - 1, row + 1)
+        else:
+            return  # Let other keys be handled normally
         
-        # Validate coordinates
-        if not (0 <= row < self.rows and 0 <= col < self.cols):
-            return
+        self.update_selection(row, col)
+        return 'break'
+
+    def set_auto_scroll(self, enabled):
+        """Enable/disable auto-scroll to selection"""
+        self.auto_scroll = enabled
+
+    def get_values(self, visible_only=False):
+        """
+        Return table data in multiple formats
         
-        # Reset previous selection
-        for r, c in self.selected_cells.copy():
-            cell = self.cells.get((r, c))
-            if cell:
-                self.canvas.itemconfig(cell['rect'], fill=cell['bg_color'])
-                cell['text'].config(bg=cell['bg_color'])
+        Args:
+            visible_only (bool): Leave out rows hidden by a filter
+        """
+        self._commit_focused_edit()
+        self._resolve_formulas()
+        order = self._row_order if self._row_order is not None else slice(None)
+        if self.cols:
+            block = np.column_stack([self._store.column(col)[order] for col in range(self.cols)])
+        else:
+            block = np.empty((self.rows, 0), dtype=object)
+        # Cells hidden under a merge read as empty
+        for (r, c), (span_r, span_c) in self.merged_cells.items():
+            origin = block[r, c]
+            block[r:r + span_r, c:c + span_c] = ""
+            block[r, c] = origin
+        if visible_only:
+            block = block[self._visible_rows_mask()]
+        data = block.tolist()
         
-        # Set new selection (single selection)
-        self.selected_cells = {(row, col)}
-        current_cell = self.cells.get((row, col))
-        if current_cell:
-            self.canvas.itemconfig(current_cell['rect'], 
-                                 fill=self.current_theme['select_bg'])
-            current_cell['text'].config(bg=self.current_theme['select_bg'])
-            current_cell['text'].focus_set()
-            # Set cursor to end for Text widget
-            current_cell['text'].mark_set("insert", "end")
-            current_cell['text'].see("insert")  # Ensure cursor is visible
-            self.auto_scroll_to_selection()
+        return {
+            'dict': {f'Row {i}': row for i, row in enumerate(data)},
+            'dataframe': pd.DataFrame(data),
+            'array': np.array(data)
+        }
+
+    def export(self, path, format=None, chunk_rows=65536, formulas=False,
+               visible_only=False, header=None):
+        """
+        Write the table to a CSV, Parquet or Feather file, a block of rows at a time
+
+        Rows are read straight from the table's columns in view order and
+        written `chunk_rows` at a time, so memory use stays bounded by one
+        block whatever the size of the table. Parquet and Feather need
+        pyarrow; their columns are named A, B, C, ... and hold strings,
+        except the NumPy columns of a table opened with load_array(), which
+        keep their type.
+
+        Args:
+            path: File to write
+            format (str): 'csv', 'parquet' or 'feather' (default: from the
+                          file extension, else 'csv')
+            chunk_rows (int): Rows per written block
+            formulas (bool): Write formula text instead of formula results
+            visible_only (bool): Leave out rows hidden by a filter
+            header (bool): Write the column letters as a first CSV row
+                           (default: False for CSV; Parquet and Feather
+                           always name their columns)
+
+        Examples:
+            table.export("data.csv")
+            table.export("data.parquet", chunk_rows=100000)
+        """
+        if format is None:
+            format = os.path.splitext(os.fspath(path))[1].lstrip('.').lower() or 'csv'
+        if format not in ('csv', 'parquet', 'feather'):
+            raise ValueError(f"Unknown export format {format!r} (use 'csv', 'parquet' or 'feather')")
+        self._commit_focused_edit()
+        if not formulas:
+            self._resolve_formulas()
+
+        rows = self._data_row_array(np.arange(self.rows))
+        if visible_only:
+            rows = rows[self._visible_rows_mask()]
+        # Formula cells by column, as sorted data rows, to overlay on each block
+        formula_cells = {}
+        if formulas:
+            for (row, col), formula in self.formulas.items():
+                formula_cells.setdefault(col, []).append((row, formula))
+            for col, cells in formula_cells.items():
+                cells.sort()
+                formula_cells[col] = (np.array([row for row, _ in cells], dtype=np.int64),
+                                      [formula for _, formula in cells])
+        chunk_rows = max(1, chunk_rows)
+        blocks = (self._export_block(rows[start:start + chunk_rows], formula_cells)
+                  for start in range(0, len(rows), chunk_rows))
+        names = [_column_letter(col) for col in range(self.cols)]
+
+        if format == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if header:
+                    writer.writerow(names)
+                for columns in blocks:
+                    writer.writerows(zip(*columns))
+            return
+
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError(f"Exporting to {format} requires pyarrow (pip install pyarrow)")
+        types = []
+        for col in range(self.cols):
+            array = self._store.arrays[col] if isinstance(self._store, _ArrayStore) else None
+            if array is not None and array.dtype.kind in 'biuf' and not array.dtype.names:
+                types.append(pa.from_numpy_dtype(array.dtype))
+            else:
+                types.append(pa.string())
+        schema = pa.schema(list(zip(names, types)))
+        if format == 'parquet':
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(path, schema)
+            write = writer.write_table
+        else:
+            import pyarrow.ipc  # Feather v2 is the Arrow IPC file format
+            writer = pa.ipc.new_file(path, schema)
+            write = writer.write
+        with writer:
+            for columns in blocks:
+                arrays = [pa.array(column, type=kind) for column, kind in zip(columns, types)]
+                write(pa.Table.from_arrays(arrays, schema=schema))
+
+    def to_sparse_dataframe(self, numeric=False):
+        """
+        The table as a pandas DataFrame of sparse columns (pd.SparseDtype)
+
+        Only the filled cells are copied, so the frame is as small as a
+        sparse table itself. Rows are in view order; formula cells hold
+        their results.
+
+        Args:
+            numeric (bool): Hold floats with NaN for empty cells (text
+                            cells become NaN too) instead of strings with
+                            '' for empty cells
+        """
+        self._commit_focused_edit()
+        self._resolve_formulas()
+        frame = {}
+        for col in range(self.cols):
+            found, values = self._store.filled(col)
+            found, values = self._view_cells(found, values)
+            if numeric:
+                values = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(
+                    dtype=np.float64, na_value=np.nan)
+                keep = ~np.isnan(values)
+                found, values, fill = found[keep], values[keep], np.nan
+            else:
+                fill = ''
+            frame[_column_letter(col)] = _sparse_array(found, values, self.rows, fill)
+        return pd.DataFrame(frame, index=pd.RangeIndex(self.rows))
+
+    def to_scipy_sparse(self, format='csr'):
+        """
+        The numeric cells of the table as a scipy.sparse matrix
+
+        Empty cells are the matrix's implicit zeros; cells that don't parse
+        as a number are left out. Rows are in view order and formula cells
+        hold their results.
+
+        Args:
+            format (str): Any scipy.sparse format name ('csr', 'csc', 'coo', ...)
+        """
+        try:
+            import scipy.sparse
+        except ImportError:
+            raise ImportError("Exporting to scipy.sparse requires scipy (pip install scipy)")
+        self._commit_focused_edit()
+        self._resolve_formulas()
+        rows, cols, data = [], [], []
+        for col in range(self.cols):
+            found, values = self._store.filled(col)
+            found, values = self._view_cells(found, values)
+            numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(
+                dtype=np.float64, na_value=np.nan)
+            keep = ~np.isnan(numbers)
+            rows.append(found[keep])
+            cols.append(np.full(int(keep.sum()), col, dtype=np.int64))
+            data.append(numbers[keep])
+        matrix = scipy.sparse.coo_matrix(
+            (np.concatenate(data) if data else np.zeros(0),
+             (np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64),
+              np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64))),
+            shape=(self.rows, self.cols))
+        return matrix.asformat(format)
+
+    def _view_cells(self, rows, values):
+        """Filled cells given by data row, as sorted view rows"""
+        if self._row_order is not None:
+            rows = self._view_rows(rows)
+            order = np.argsort(rows, kind='stable')
+            rows, values = rows[order], values[order]
+        return rows, values
+
+    def _export_block(self, rows, formula_cells):
+        """
+        Columns of the given data rows for export
+
+        Returns:
+            list: One array per column - strings, or the raw values of
+                  numeric load_array() columns
+        """
+        columns = []
+        for col in range(self.cols):
+            if isinstance(self._store, _ArrayStore) and self._store.arrays[col].dtype.kind in 'biuf':
+                columns.append(np.asarray(self._store.arrays[col][rows]))
+                continue
+            values = self._store.values(rows, col)
+            if col in formula_cells:
+                formula_rows, texts = formula_cells[col]
+                position = np.searchsorted(formula_rows, rows)
+                found = position < len(formula_rows)
+                found[found] = formula_rows[position[found]] == rows[found]
+                for i, j in zip(np.flatnonzero(found).tolist(), position[found].tolist()):
+                    values[i] = texts[j]
+            columns.append(values)
+        return columns
+
+    def set_values(self, data):
+        """Populate table with data"""
+        self._check_writable()
+        self.save_state("Set table values")
+        changes = {}
+        for row in range(min(self.rows, len(data))):
+            data_row = self._data_row(row)
+            for col in range(min(self.cols, len(data[row]))):
+                if not self.is_merged_cell(row, col):
+                    rows, values = changes.setdefault(col, ([], []))
+                    rows.append(data_row)
+                    values.append(str(data[row][col]))
+        for col, (rows, values) in changes.items():
+            self._store.set_many(rows, col, values)
+        self.refresh_grid()
+
+    def load_dataframe(self, df):
+        """Load data from a pandas DataFrame"""
+        if self._store.read_only:
+            self._install_store(_ColumnStore(len(df), len(df.columns)))
+        self.resize_grid(len(df), len(df.columns))
+        self.set_values(df.values.tolist())
+
+    def load_array(self, source, dtype=None, shape=None):
+        """
+        Show a NumPy array - typically a large file on disk - without copying it
+
+        Files are memory-mapped read-only and values are formatted only for
+        the rows being displayed, so opening even a multi-gigabyte file is
+        instant and memory use stays bounded by what is on screen. The table
+        is read-only while it shows the array; sorting, filtering, find and
+        copy still work. Loading other data (load_dataframe) makes it
+        editable again.
+
+        Args:
+            source: One of
+                - path to a .npy file (opened with np.load(mmap_mode='r'))
+                - path to a raw binary file (np.memmap; needs dtype)
+                - a list of such paths or of 1-D arrays, one per column
+                - an array (1-D, 2-D or structured), used as is
+            dtype: Element type of raw binary files
+            shape: Shape of raw binary files (default: 1-D, from the file size)
+
+        Examples:
+            table.load_array("results.npy")
+            table.load_array(["x.f64", "y.f64"], dtype=np.float64)
+        """
+        sources = source if isinstance(source, (list, tuple)) else [source]
+        columns = []
+        for item in sources:
+            array = self._open_array(item, dtype, shape)
+            if array.dtype.names:
+                columns.extend(array[name] for name in array.dtype.names)
+            elif array.ndim == 1:
+                columns.append(array)
+            elif array.ndim == 2:
+                columns.extend(array[:, col] for col in range(array.shape[1]))
+            else:
+                raise ValueError(f"Expected 1-D or 2-D data, got shape {array.shape}")
+        if len({len(column) for column in columns}) > 1:
+            raise ValueError("All columns must have the same number of rows")
+        self._install_store(_ArrayStore(columns))
 
-    def on_click_cell(self, event, row, col):
-        """Handle cell click events"""
-        self.update_selection(row, col)
+    def load_sparse(self, cells, rows=None, cols=None):
+        """
+        Load mostly empty data into a sparse table that stores only its filled cells
 
-        if (row, col) in self.cells:
-            text_widget = self.cells[(row, col)]['text']
-            text_widget.focus_set()
-            # Place cursor at click position or end of text
-            text_widget.icursor(tk.END)
+        Memory follows the number of filled cells rather than rows x cols,
+        and only the cells in view are ever drawn, so a sheet with millions
+        of rows and a few thousand values stays light. The table stays
+        editable; sorting and filtering build one full column at a time.
 
-    # ... (keep all other methods the same, but ensure they use self.selected_cells)
+        Args:
+            cells: One of
+                - a dict {(row, col): value}
+                - an iterable of (row, col, value)
+                - a pandas DataFrame; sparse columns (SparseDtype) are
+                  read without densifying, fill values count as empty
+                - a scipy.sparse matrix (anything with tocoo())
+            rows (int): Number of rows (default: one past the last filled row)
+            cols (int): Number of columns (default: one past the last filled column)
 
-    def draw_grid_lines(self):
-        """Draw grid lines based on current row heights"""
-        self.canvas.delete('grid_line')
-        
-        # Calculate cumulative heights
-        y_positions = [0]
-        for height in self.row_heights:
-            y_positions.append(y_positions[-1] + height)
-        
-        # Horizontal lines
-        for y in y_positions:
-            self.canvas.create_line(
-                0, y,
-                self.cols * self.cell_width, y,
-                fill=self.current_theme['grid'],
-                tags="grid_line"
-            )
-        
-        # Vertical lines
-        for col in range(self.cols + 1):
-            x = col * self.cell_width
-            self.canvas.create_line(
-                x, 0,
-                x, y_positions[-1],
-                fill=self.current_theme['grid'],
-                tags="grid_line"
-            )
+        Examples:
+            table.load_sparse({(0, 0): "x", (999999, 3): 42})
+            table.load_sparse(matrix, rows=matrix.shape[0])
+        """
+        columns = {}  # {col: (data rows, display strings)}
+        shape = (0, 0)
+        if isinstance(cells, pd.DataFrame):
+            shape = cells.shape
+            for col in range(cells.shape[1]):
+                series = cells.iloc[:, col]
+                if isinstance(series.dtype, pd.SparseDtype):
+                    array = series.array
+                    found = np.asarray(array.sp_index.indices, dtype=np.int64)
+                    values = np.asarray(array.sp_values)
+                else:
+                    values = series.to_numpy()
+                    found = np.arange(len(values))
+                columns[col] = (found, values)
+        elif hasattr(cells, 'tocoo'):
+            matrix = cells.tocoo()
+            shape = matrix.shape
+            order = np.lexsort((matrix.row, matrix.col))
+            row, col, data = matrix.row[order], matrix.col[order], matrix.data[order]
+            starts = np.flatnonzero(np.diff(col, prepend=-1))
+            for start, stop in zip(starts, np.append(starts[1:], len(col))):
+                columns[int(col[start])] = (row[start:stop].astype(np.int64), data[start:stop])
+        else:
+            by_column = {}
+            items = cells.items() if isinstance(cells, dict) else ((cell[:2], cell[2]) for cell in cells)
+            for (row, col), value in items:
+                by_column.setdefault(col, ([], []))
+                by_column[col][0].append(row)
+                by_column[col][1].append(value)
+            for col, (found, values) in by_column.items():
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+                columns[col] = (np.array(found, dtype=np.int64), array)
 
-    # def _setup_canvas(self):
-    #     """Initialize canvas with resize binding"""
-    #     self.canvas = tk.Canvas(self, highlightthickness=0)
-    #     self.h_scroll = ttk.Scrollbar(self, orient='horizontal', command=self.canvas.xview)
-    #     self.v_scroll = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
-        
-    #     self.canvas.configure(
-    #         xscrollcommand=self.h_scroll.set,
-    #         yscrollcommand=self.v_scroll.set
-    #     )
-        
-    #     self.canvas.grid(row=0, column=0, sticky='nsew')
-    #     self.v_scroll.grid(row=0, column=1, sticky='ns')
-    #     self.h_scroll.grid(row=1, column=0, sticky='ew')
-        
-    #     self.grid_rowconfigure(0, weight=1)
-    #     self.grid_columnconfigure(0, weight=1)
-        
-    #     # Bind resize event
-    #     self.canvas.bind("<Configure>", self._on_canvas_resize)
+        store = _SparseStore(0, 0)
+        for col, (found, values) in columns.items():
+            if values.dtype == object:
+                text = np.array([_display_text(value) for value in values.tolist()], dtype=object)
+            else:
+                text = _format_values(values)
+            keep = text != ''
+            columns[col] = (found[keep], text[keep])
+            shape = (max(shape[0], int(found.max()) + 1 if len(found) else 0), max(shape[1], col + 1))
+        store.resize(shape[0] if rows is None else rows, shape[1] if cols is None else cols)
+        for col, (found, text) in columns.items():
+            inside = found < store.rows
+            if col < store.cols:
+                store.set_many(found[inside], col, text[inside])
+        self._install_store(store)
 
-    def _on_canvas_resize(self, event):
-        """Handle canvas resize - retruncate all text"""
-        for (row, col) in self.cells:
-            self._truncate_text(row, col)
+    def load_provider(self, provider, row_count=None, column_count=None,
+                      block_rows=256, cache_blocks=64, write_back=False):
+        """
+        Browse a data source that is paged in on demand instead of loaded
 
+        Rows are fetched in blocks of `block_rows` as they scroll into view
+        and kept in an LRU cache of `cache_blocks` blocks; the block past
+        the edge of the view is prefetched in the scroll direction when the
+        widget is idle. Edits are kept in the table, and are also passed to
+        provider.set_value() when write_back is True. Rows and columns
+        can't be inserted or deleted.
 
-    def create_grid(self):
-        """Create the grid of cells with theme support"""
-        self.canvas.delete("all")
-        self.cells = {}
-        self.row_heights = [self.default_cell_height] * self.rows  # Reset row heights
-        # Calculate positions relative to headers
-        header_width = 30  # Width of row headers
-        header_height = 25  # Height of column headers
-        
-        # Calculate cumulative heights
-        cumulative_heights = [0]
-        for height in self.row_heights:
-            cumulative_heights.append(cumulative_heights[-1] + height)
-            
-        for row in range(self.rows):
-            for col in range(self.cols):
-                if self.is_merged_cell(row, col):
-                    continue
-                        
-                span_rows, span_cols = self.get_merged_span(row, col)
-                x1 = col * self.cell_width
-                y1 = cumulative_heights[row]
-                x2 = x1 + (span_cols * self.cell_width)
-                y2 = y1 + sum(self.row_heights[row:row+span_rows])  # Sum of spanned rows
-                
-                bg_color = self.current_theme['even'] if row % 2 == 0 else self.current_theme['odd']
-                
-                rect = self.canvas.create_rectangle(
-                    x1, y1, x2, y2,
-                    fill=bg_color,
-                    outline='',
-                    tags=f"cell_{row}_{col}"
-                )
-                
-                text = tk.Text(
-                    self.canvas,
-                    bg=bg_color,
-                    fg=self.current_theme['fg'],
-                    font=self.current_theme['font'],
-                    relief='flat',
-                    borderwidth=0,
-                    height=1,
-                    width=max(1, int((x2-x1)/7)),
-                    wrap=tk.NONE,  # Disable wrapping
-                    highlightthickness=0,
-                    selectbackground=self.current_theme['select_bg'],
-                    selectforeground=self.current_theme['select_fg'],
-                    exportselection=0  # Important for proper selection handling
-                )
-                
-                text_window = self.canvas.create_window(
-                    x1 + 2, y1 + 2,
-                    window=text,
-                    anchor='nw',
-                    width=x2 - x1 - 4,
-                    height=y2 - y1 - 4,
-                    tags=f"text_{row}_{col}"
-                )
-                
-                self.cells[(row, col)] = {
-                    'rect': rect,
-                    'text': text,
-                    'text_window': text_window,
-                    'bg_color': bg_color,
-                    'span_rows': span_rows,
-                    'span_cols': span_cols
-                }
-                
-                text.bind('<Button-1>', lambda e, r=row, c=col: self.on_click_cell(e, r, c))
-                for key in ['<Up>', '<Down>', '<Left>', '<Right>', '<Tab>', '<Shift-Tab>']:
-                    text.bind(key, lambda e: 'break')
-                text.bind('<FocusOut>', lambda e, r=row, c=col: self.process_cell_edit(r, c))
-                text.bind('<Return>', lambda e, r=row, c=col: self.process_cell_edit(r, c))
-                # Add key bindings for navigation
-                text.bind('<Up>', lambda e, r=row, c=col: self._navigate_cell(e, r, c, 'up'))
-                text.bind('<Down>', lambda e, r=row, c=col: self._navigate_cell(e, r, c, 'down'))
-                text.bind('<Left>', lambda e, r=row, c=col: self._navigate_cell(e, r, c, 'left'))
-                text.bind('<Right>', lambda e, r=row, c=col: self._navigate_cell(e, r, c, 'right'))
-                text.bind('<Tab>', lambda e, r=row, c=col: self._navigate_cell(e, r, c, 'tab'))
-                text.bind('<Shift-Tab>', lambda e, r=row, c=col: self._navigate_cell(e, r, c, 'shift_tab'))
-        
-        self.draw_grid_lines()
-        self.canvas.configure(
-            scrollregion=(0, 0, 
-                         self.cols * self.cell_width, 
-                         self.rows * self.cell_height)
-        )
+        Args:
+            provider: A DataProvider (any object with row_count and
+                      get_block(row_start, row_stop, cols)), or a
+                      get_block function together with row_count
+            row_count (int): Number of rows when provider is a function
+            column_count (int): Number of columns (default: width of the first block)
+            block_rows (int): Rows fetched per request
+            cache_blocks (int): Blocks kept in memory
+            write_back (bool): Pass edits on to the provider
 
-    def _navigate_cell(self, event, current_row, current_col, direction):
-        """Handle keyboard navigation between cells"""
-        new_row, new_col = current_row, current_col
-        
-        if direction == 'up':
-            new_row = max(0, current_row - 1)
-        elif direction == 'down':
-            new_row = min(self.rows - 1, current_row + 1)
-        elif direction == 'left':
-            new_col = max(0, current_col - 1)
-        elif direction == 'right':
-            new_col = min(self.cols - 1, current_col + 1)
-        elif direction == 'tab':
-            if event.state & 0x0001:  # Shift key (Shift+Tab)
-                new_col = current_col - 1
-                if new_col < 0:
-                    new_col = self.cols - 1
-                    new_row = max(0, current_row - 1)
-            else:  # Regular Tab
-                new_col = current_col + 1
-                if new_col >= self.cols:
-                    new_col = 0
-                    new_row = min(self.rows - 1, current_row + 1)
-        elif direction == 'shift_tab':
-            new_col = current_col - 1
-            if new_col < 0:
-                new_col = self.cols - 1
-                new_row = max(0, current_row - 1)
-        
-        # Skip merged cells (except the top-left cell of a merged range)
-        while self.is_merged_cell(new_row, new_col) and not ((new_row, new_col) in self.merged_cells):
-            # Adjust position based on direction
-            if direction in ['up', 'down']:
-                new_row = max(0, new_row - 1) if direction == 'up' else min(self.rows - 1, new_row + 1)
-            else:
-                new_col = max(0, new_col - 1) if direction in ['left', 'shift_tab'] else min(self.cols - 1, new_col + 1)
-        
-        # Only move if we're actually changing cells
-        if (new_row != current_row) or (new_col != current_col):
-            self.update_selection(new_row, new_col)
-        
-        return 'break'  # Prevent default behavior
+        Examples:
+            table.load_provider(SQLiteProvider(connection, "events"))
+            table.load_provider(lambda start, stop, cols: df.iloc[start:stop, cols].values,
+                                row_count=len(df))
+        """
+        if callable(provider) and not hasattr(provider, 'get_block'):
+            if row_count is None:
+                raise ValueError("row_count is required when provider is a function")
+            provider = _CallableProvider(provider, row_count, column_count)
+        elif column_count is not None and getattr(provider, 'column_count', None) is None:
+            provider.column_count = column_count
+        self._install_store(_ProviderStore(provider, block_rows, cache_blocks, write_back))
 
-    def _setup_event_bindings(self):
-        """Add hover effects for references"""
-        # Highlight column when hovering header
-        for col, header in enumerate(self.col_headers):
-            header.bind("<Enter>", lambda e, c=col: self._highlight_column(c))
-            header.bind("<Leave>", lambda e: self._remove_highlight())
-        
-        # Highlight row when hovering header
-        for row, header in enumerate(self.row_headers):
-            header.bind("<Enter>", lambda e, r=row: self._highlight_row(r))
-            header.bind("<Leave>", lambda e: self._remove_highlight())
+    def save(self, path, compress=False):
+        """
+        Save the table to a compact binary workbook file (see Table.load)
 
-    def _highlight_column(self, col):
-        """Visual feedback for column reference"""
-        for row in range(self.rows):
-            if (row, col) in self.cells:
-                self.canvas.itemconfig(
-                    self.cells[(row, col)]['rect'],
-                    fill='#e6f3ff'  # Light blue highlight
-                )
+        Cell values, formulas, column formulas, merged cells, cell styles,
+        row heights, column widths, the row order, the theme and
+        spreadsheet mode are kept. Each column is one contiguous block, aligned so it can be
+        memory-mapped; the columns of a table opened with load_array() keep
+        their NumPy dtype. Formulas are stored once per shared template
+        plus the cells using it.
 
-    def _highlight_row(self, row):
-        """Visual feedback for row reference"""
-        for col in range(self.cols):
-            if (row, col) in self.cells:
-                self.canvas.itemconfig(
-                    self.cells[(row, col)]['rect'],
-                    fill='#e6f3ff'  # Light blue highlight
-                )
+        Args:
+            path: File to write
+            compress (bool): Deflate each block (smaller file, slower load,
+                             no memory-mapping)
+        """
+        self._commit_focused_edit()
+        self._resolve_formulas()
+        blocks = []
+        size = 0
 
-    def _remove_highlight(self):
-        """Remove visual highlights"""
-        for (row, col), cell in self.cells.items():
-            bg_color = self.current_theme['even'] if row % 2 == 0 else self.current_theme['odd']
-            self.canvas.itemconfig(cell['rect'], fill=bg_color)
+        def add_block(data):
+            nonlocal size
+            data = data.tobytes() if isinstance(data, np.ndarray) else data
+            stored = zlib.compress(data, 1) if compress else data
+            blocks.append(stored)
+            entry = {'offset': size, 'size': len(stored), 'compressed': bool(compress)}
+            size += -(-len(stored) // _WORKBOOK_ALIGN) * _WORKBOOK_ALIGN
+            return entry
 
-    def _truncate_text(self, row, col):
-        """Truncate text with ellipsis if it's too long for the cell"""
-        if (row, col) not in self.cells:
-            return
-        
-        text_widget = self.cells[(row, col)]['text']
-        full_text = text_widget.get("1.0", "end-1c")
-        
-        # Calculate available width in characters
-        cell_width = text_widget.winfo_width()
-        avg_char_width = self.font.measure("M")
-        max_chars = max(3, int(cell_width / avg_char_width)) if avg_char_width > 0 else 20
-        
-        if len(full_text) > max_chars:
-            # Truncate and add ellipsis
-            truncated = full_text[:max_chars-3] + "..."
-            text_widget.delete("1.0", "end")
-            text_widget.insert("1.0", truncated)
-            text_widget.tag_add("truncated", "1.0", "end")
-            text_widget.tag_config("truncated", elide=True)  # Hide the visual text
-            text_widget.insert("1.0", full_text)  # But keep full text stored
-        else:
-            text_widget.delete("1.0", "end")
-            text_widget.insert("1.0", full_text)
+        columns = []
+        for col in range(self.cols):
+            if isinstance(self._store, _ArrayStore):
+                array = np.ascontiguousarray(self._store.arrays[col])
+                if array.dtype.kind != 'O':
+                    columns.append(dict(add_block(array), kind='array', dtype=array.dtype.str))
+                    continue
+            values = self._store.column(col).tolist()
+            text = '\0'.join(values)
+            if text.count('\0') == max(len(values) - 1, 0):
+                columns.append(dict(add_block(text.encode('utf-8')), kind='text'))
+            else:  # Values contain NUL themselves
+                columns.append(dict(add_block(json.dumps(values).encode('utf-8')), kind='json'))
 
-    def on_click_cell(self, event, row, col):
-        """Handle cell click - show full text when selected"""
-        self.update_selection(row, col)
-        
-        if (row, col) in self.cells:
-            text_widget = self.cells[(row, col)]['text']
-            # For Text widget, set cursor at click position
-            text_widget.focus_set()
-            text_widget.mark_set("insert", f"@{event.x},{event.y}")
-            text_widget.see("insert")
+        # Formulas: each shared template once, plus the cells using it
+        groups = {}
+        for cell, formula in self.formulas.items():
+            groups.setdefault(self._cell_template(cell, formula), []).append(cell)
+        templates = list(groups)
+        cells = np.array([cell for template in templates for cell in groups[template]],
+                         dtype=np.int64).reshape(-1, 2)
+        template_ids = np.repeat(np.arange(len(templates), dtype=np.int32),
+                                 [len(groups[template]) for template in templates])
 
+        # Cell styles: the style table, plus a block of uint16 ids per styled column
+        styles = self._store.styles
+        style_columns = [None if column is None else add_block(column) for column in styles.columns]
 
-    def add_theme(self, name, config):
+        header = {
+            'version': 1,
+            'rows': self.rows,
+            'cols': self.cols,
+            'columns': columns,
+            'row_order': None if self._row_order is None else add_block(
+                np.asarray(self._row_order, dtype=np.int64)),
+            'templates': templates,
+            'formula_cells': add_block(cells),
+            'formula_templates': add_block(template_ids),
+            'column_formulas': [[col, formula, start, stop] for col, (formula, start, stop)
+                                in self.column_formulas.items()],
+            'merged': [[r, c, span_r, span_c] for (r, c), (span_r, span_c)
+                       in self.merged_cells.items()],
+            'styles': [list(style) for style in styles.styles],
+            'style_columns': style_columns,
+            'row_heights': [self.row_heights.default, sorted(self.row_heights.overrides.items())],
+            'col_widths': [self.col_widths.default, sorted(self.col_widths.overrides.items())],
+            'theme': [self.theme, self.current_theme],
+            'spreadsheet_mode': self.spreadsheet_mode,
+        }
+        header = json.dumps(header, default=int).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_WORKBOOK_MAGIC + struct.pack('<Q', len(header)) + header)
+            f.write(b'\0' * (-f.tell() % _WORKBOOK_ALIGN))
+            for block in blocks:
+                f.write(block)
+                f.write(b'\0' * (-len(block) % _WORKBOOK_ALIGN))
+
+    @classmethod
+    def load(cls, path, parent, mmap=True, **kwargs):
         """
-        Add a custom theme configuration
-        
+        Open a workbook file written by save() in a new table
+
         Args:
-            name (str): Theme name
-            config (dict): Theme configuration with keys:
-                - bg: background color
-                - fg: text color
-                - select_bg: selection background
-                - select_fg: selection text
-                - even: even row color
-                - odd: odd row color
-                - grid: grid line color
-                - font: text font
+            path: Workbook file
+            parent: Parent widget
+            mmap (bool): Memory-map the file instead of reading it
+            **kwargs: Passed to Table() (cell_width, theme, ...)
+
+        Returns:
+            Table: The new table, not yet placed with pack/grid
+
+        Examples:
+            table = Table.load("report.tbl", root)
+            table.pack(fill='both', expand=True)
         """
-        required_keys = ['bg', 'fg', 'select_bg', 'select_fg', 'even', 'odd', 'grid', 'font']
-        if all(key in config for key in required_keys):
-            self.themes[name] = config
+        table = cls(parent, rows=0, cols=0, **kwargs)
+        table.load_workbook(path, mmap)
+        return table
+
+    def load_workbook(self, path, mmap=True):
+        """
+        Replace the table's contents with a workbook file written by save()
+
+        Text columns are decoded in one pass each. NumPy columns saved from
+        load_array() are memory-mapped again and shown read-only when every
+        column is one (unless mmap is False or the file is compressed).
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(_WORKBOOK_MAGIC)) != _WORKBOOK_MAGIC:
+                raise ValueError(f"{path!r} is not a table workbook file")
+            length, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(length).decode('utf-8'))
+        start = -(-(len(_WORKBOOK_MAGIC) + 8 + length) // _WORKBOOK_ALIGN) * _WORKBOOK_ALIGN
+        data = np.memmap(path, dtype=np.uint8, mode='r') if mmap else np.fromfile(path, dtype=np.uint8)
+        rows = header['rows']
+
+        def block(entry, dtype=np.uint8):
+            raw = data[start + entry['offset']:start + entry['offset'] + entry['size']]
+            if entry['compressed']:
+                raw = np.frombuffer(zlib.decompress(raw), dtype=np.uint8)
+            return raw.view(dtype)
+
+        columns = []
+        for entry in header['columns']:
+            if entry['kind'] == 'array':
+                array = block(entry, np.dtype(entry['dtype']))
+                columns.append(array if mmap else array.copy())
+            elif entry['kind'] == 'text':
+                values = block(entry).tobytes().decode('utf-8').split('\0') if rows else []
+                column = np.empty(rows, dtype=object)
+                column[:] = values
+                columns.append(column)
+            else:
+                column = np.empty(rows, dtype=object)
+                column[:] = json.loads(block(entry).tobytes().decode('utf-8'))
+                columns.append(column)
+
+        if columns and all(column.dtype != object for column in columns):
+            store = _ArrayStore(columns)
         else:
-            raise ValueError("Theme config must contain all required keys")
+            store = _ColumnStore(rows, 0)
+            store.columns = [column if column.dtype == object else _format_values(column)
+                             for column in columns]
+            store.styles = _CellStyles(rows, len(columns))
+            store.versions = [0] * len(columns)
+        if header.get('styles'):
+            store.styles.restore((rows, [_CellStyle(*style) for style in header['styles']],
+                                  [None if entry is None else block(entry, np.uint16).copy()
+                                   for entry in header['style_columns']]))
+        self._install_store(store)
 
-    def get_available_themes(self):
-        """Return list of available theme names"""
-        return list(self.themes.keys())
+        if header['row_order'] is not None:
+            self._set_row_order(block(header['row_order'], np.int64).copy())
+        default, overrides = header['row_heights']
+        self.row_heights = _RowHeights(self.rows, default, dict(overrides))
+        default, overrides = header['col_widths']
+        self.col_widths = _ColumnWidths(self.cols, default, dict(overrides))
+        self.merged_cells = {(r, c): (span_r, span_c) for r, c, span_r, span_c in header['merged']}
 
-    def is_merged_cell(self, row, col):
-        """Check if cell is part of a merged range"""
-        for (r, c), (span_r, span_c) in self.merged_cells.items():
-            if (r <= row < r + span_r) and (c <= col < c + span_c) and not (r == row and c == col):
-                return True
-        return False
+        templates = header['templates']
+        cells = block(header['formula_cells'], np.int64).reshape(-1, 2).tolist()
+        template_ids = block(header['formula_templates'], np.int32).tolist()
+        for (row, col), template_id in zip(cells, template_ids):
+            template = sys.intern(templates[template_id])
+            formula = _absolute_formula(template, row, col)
+            self.formulas[(row, col)] = formula
+            self._formula_templates[(row, col)] = (formula, template)
+        self._formulas_version += 1
+        self.column_formulas = {col: (formula, start_row, end_row)
+                                for col, formula, start_row, end_row in header['column_formulas']}
 
-    def get_merged_span(self, row, col):
-        """Get merged span for cell (default 1x1 if not merged)"""
-        return self.merged_cells.get((row, col), (1, 1))
+        name, theme = header['theme']
+        if isinstance(theme['font'], list):
+            theme['font'] = tuple(theme['font'])
+        self.themes.setdefault(name, theme)
+        self.theme, self.current_theme = name, theme
 
-    def merge_cells(self, start_row, start_col, span_rows=1, span_cols=1):
-        """Merge a range of cells"""
-        # Validate merge area
-        self.save_state(f"Merge cells at ({start_row},{start_col})")
-        if (start_row + span_rows > self.rows or start_col + span_cols > self.cols):
-            raise ValueError("Merge area exceeds grid dimensions")
-            
-        # Clear existing merged cells in this range
-        for r in range(start_row, start_row + span_rows):
-            for c in range(start_col, start_col + span_cols):
-                if (r, c) in self.merged_cells:
-                    self.unmerge_cells(r, c)
-        
-        # Store merge info
-        self.merged_cells[(start_row, start_col)] = (span_rows, span_cols)
-        
-        # Recreate grid with new merged cells
-        self.create_grid()
-        
-        # Update selection to the merged cell
-        if self.selected_cells:
-            # Get the first selected cell's row
-            first_selected_row = next(iter(self.selected_cells))[0]
-            first_selected_col = next(iter(self.selected_cells))[1]
-            self.update_selection(min(start_row, first_selected_row), 
-                                min(start_col, first_selected_col))
-        # After merging:
-        
-        self.refresh_grid()
+        self._finish_load(header['spreadsheet_mode'])
 
-    def merge_selected(self):
-        """Merge currently selected cells"""
-        if not self.selected_cells:
-            return
-            
-        # Find bounding rectangle of selection
-        rows = {r for r, c in self.selected_cells}
-        cols = {c for r, c in self.selected_cells}
-        
-        min_row, max_row = min(rows), max(rows)
-        min_col, max_col = min(cols), max(cols)
-        
-        # Merge the rectangular area
-        self.merge_cells(
-            min_row, min_col,
-            max_row - min_row + 1,
-            max_col - min_col + 1
-        )
+    def _finish_load(self, spreadsheet_mode):
+        """Lay out and draw restored contents, evaluating their formulas"""
+        self._layout_rows()
+        if spreadsheet_mode != self.spreadsheet_mode:
+            self.enable_spreadsheet_mode(spreadsheet_mode)
+        else:
+            self.recalculate_all()
+            self.refresh_grid()
+
+    def enable_autosave(self, journal_path, interval=1000, checkpoint_bytes=64 << 20, sync=False):
+        """
+        Record every change in a journal file so work survives a crash
 
-    def unmerge_cells(self, row, col):
-        """Unmerge cells starting at row,col"""
-        self.save_state(f"Unmerge cells at ({row},{col})")
-        if (row, col) in self.merged_cells:
-            del self.merged_cells[(row, col)]
-            self.create_grid()
-            self.update_selection(row, col)
-        self.refresh_grid()
+        Each change to the data (edits, paste, fill, inserted or deleted
+        rows and columns, resizing, undo) is queued as a compact record
+        and appended to the journal by a background thread. The formulas,
+        merged cells, row heights, column widths and row order it changed
+        are recorded as soon as the change is complete (when Tk is next
+        idle), before any further event is handled; they are also
+        compared every `interval` ms to catch changes made directly to
+        the attributes. Once the journal grows past `checkpoint_bytes` it
+        is rewritten as a single checkpoint of the whole table. Taking a
+        checkpoint copies the store's column arrays (references to the
+        values, not the values) on the Tk thread, a pause that grows with
+        the table: roughly 10 ms per million cells (sparse tables only
+        pay for their filled cells). Pickling and writing it happen on the
+        journal thread. Recover with Table.recover().
 
+        Args:
+            journal_path: Journal file (replaced if it exists)
+            interval (int): ms between checks of the table layout
+            checkpoint_bytes (int): Journal size that triggers compaction
+            sync (bool): fsync after every batch of records (survives
+                         power loss, not just a crash of the application)
+        """
+        if self._store.read_only or self._store.paged:
+            raise ValueError("Autosave needs a table holding its own editable data")
+        self.disable_autosave()
+        self.autosave_interval = interval
+        self.checkpoint_bytes = checkpoint_bytes
+        self._journal = _Journal(journal_path, sync)
+        self._store.journal = self._store.styles.journal = self._journal_hook(self._journal)
+        self._checkpoint_journal()
+        self._autosave_job = self.after(interval, self._autosave_tick)
 
-    def select_cell(self, row, col):
-        """Select a single cell (maintaining single selection)"""
-        if not (0 <= row < self.rows and 0 <= col < self.cols):
+    def disable_autosave(self):
+        """Stop journaling; the journal file is left as it is, complete"""
+        if self._journal is None:
             return
-            
-        self.update_selection(row, col)  # Reuse the unified method
+        self._cancel_autosave_jobs()
+        journal = self._journal
+        if journal.error is None:
+            self._journal_layout()
+        self._store.journal = self._store.styles.journal = None
+        self._journal = None
+        self._journal_state = {}
+        journal.close()  # Raises if the writer failed
 
-    def select_range(self, start_row, start_col, end_row, end_col):
-        """Select range of cells (for multiple selection mode)"""
-        if self.selection_mode == "single":
-            self.update_selection(end_row, end_col)
-            return
-            
-        # For multiple selection mode
-        new_selection = set()
-        for row in range(min(start_row, end_row), max(start_row, end_row) + 1):
-            for col in range(min(start_col, end_col), max(start_col, end_col) + 1):
-                if (row, col) in self.cells:
-                    new_selection.add((row, col))
-        
-        # Clear previous selection
-        for r, c in self.selected_cells - new_selection:
-            cell = self.cells.get((r, c))
-            if cell:
-                self.canvas.itemconfig(cell['rect'], fill=cell['bg_color'])
-                cell['text'].config(bg=cell['bg_color'])
-        
-        # Set new selection
-        for r, c in new_selection:
-            cell = self.cells.get((r, c))
-            if cell:
-                self.canvas.itemconfig(cell['rect'], fill=self.current_theme['select_bg'])
-                cell['text'].config(bg=self.current_theme['select_bg'])
-        
-        self.selected_cells = new_selection
-        if new_selection:
-            self.auto_scroll_to_selection(*next(iter(new_selection)))
+    def _cancel_autosave_jobs(self):
+        for name in ('_autosave_job', '_layout_job'):
+            job = getattr(self, name)
+            if job is not None:
+                self.after_cancel(job)
+                setattr(self, name, None)
 
-    def clear_selection(self):
-        """Clear all selections using selected_cells"""
-        for row, col in self.selected_cells.copy():
-            cell = self.cells.get((row, col))
-            if cell:
-                self.canvas.itemconfig(cell['rect'], fill=cell['bg_color'])
-                cell['text'].config(bg=cell['bg_color'])
-        self.selected_cells.clear()
+    def _journal_hook(self, journal):
+        """Store journal callback: queue a record, then the layout changes going with it"""
+        def record(record):
+            journal.record(record)
+            self._journal_layout_soon()
+        return record
 
-    def get_selected_cell(self):
-        """Get the primary selected cell (for single selection)"""
-        if not self.selected_cells:
+    def _journal_layout_soon(self):
+        """Journal the layout once the change being made is complete (see _journal_layout)"""
+        if self._journal is not None and self._layout_job is None:
+            self._layout_job = self.after_idle(self._flush_journal_layout)
+
+    def _flush_journal_layout(self):
+        self._layout_job = None
+        if self._journal is not None and self._journal.error is None:
+            self._journal_layout()
+
+    def _suspend_autosave(self):
+        """
+        Stop the autosave timer of the sheet being swapped out, keeping its journal open
+
+        The store stays hooked to the journal, so changes made to it while
+        another sheet is shown (formula results read across sheets) are
+        still recorded.
+
+        Returns:
+            tuple: State for _resume_autosave(), or None without autosave
+        """
+        if self._journal is None:
             return None
-        return next(iter(self.selected_cells))
+        if self._journal.error is not None:
+            self.disable_autosave()  # Raises the writer's error
+        self._cancel_autosave_jobs()
+        self._journal_layout()
+        saved = (self._journal, self._journal_state, self.autosave_interval, self.checkpoint_bytes)
+        self._journal = None
+        self._journal_state = {}
+        return saved
 
+    def _resume_autosave(self, saved):
+        """Pick up the autosave of a sheet swapped back in (see _suspend_autosave)"""
+        self._journal, self._journal_state, self.autosave_interval, self.checkpoint_bytes = saved
+        self._autosave_job = self.after(self.autosave_interval, self._autosave_tick)
 
-    def on_resize(self, event):
-        """Improved resize handler for clean redraw"""
-        if event.width < 100 or event.height < 100:
+    def _autosave_tick(self):
+        """Record layout changes and compact the journal when it has grown"""
+        self._autosave_job = None
+        if self._journal is None:
             return
-        
-        # Calculate new cell sizes (ensuring whole numbers)
-        new_cell_width = max(50, int(event.width / self.cols))
-        new_cell_height = max(20, int(event.height / self.rows))
-        
-        if (new_cell_width != self.cell_width or 
-            new_cell_height != self.cell_height):
-            self.cell_width = new_cell_width
-            self.cell_height = new_cell_height
-            self.create_grid()
-            self.configure_scroll()
+        if self._journal.error is not None:
+            self.disable_autosave()  # Raises the writer's error
+        self._journal_layout()
+        if self._journal.size > self.checkpoint_bytes:
+            self._checkpoint_journal()
+        self._autosave_job = self.after(self.autosave_interval, self._autosave_tick)
 
-    def on_click(self, event):
-        """Handle mouse clicks on the canvas"""
-        col = min(max(0, int(event.x // self.cell_width)), self.cols - 1)
-        row = min(max(0, int(event.y // self.cell_height)), self.rows - 1)
-        self.update_selection(row, col)
+    def _layout_state(self):
+        """Table state outside the data store, as journaled"""
+        return {
+            'formulas': self.formulas,
+            'column_formulas': self.column_formulas,
+            'merged': self.merged_cells,
+            'row_heights': (self.row_heights.default, self.row_heights.overrides),
+            'col_widths': (self.col_widths.default, self.col_widths.overrides),
+            'row_order': self._row_order,
+            'spreadsheet_mode': self.spreadsheet_mode,
+        }
 
-    def on_key(self, event):
-        """Handle keyboard navigation"""
-        row, col = self.selected_cells
-        
-        if event.keysym == 'Up':
-            row = max(0, row - 1)
-        elif event.keysym == 'Down':
-            row = min(self.rows - 1, row + 1)
-        elif event.keysym == 'Left':
-            col = max(0, col - 1)
-        elif event.keysym == 'Right':
-            col = min(self.cols - 1, col + 1)
-        elif event.keysym == 'Tab':
-            if event.state & 0x0001:  # Shift+Tab
-                col -= 1
-                if col < 0:
-                    col = self.cols - 1
-                    row = max(0, row - 1)
-            else:  # Regular Tab
-                col += 1
-                if col >= self.cols:
-                    col = 0
-                    row = min(self.rows - 1, row + 1)
-        else:
-            return  # Let other keys be handled normally
-        
-        self.update_selection(row, col)
-        return 'break'
+    def _journal_layout(self):
+        """Queue the parts of the layout state that changed since they were last journaled"""
+        changed = {}
+        for key, value in self._layout_state().items():
+            last = self._journal_state.get(key)
+            if key == 'row_order':
+                same = (value is None and last is None) or (
+                    value is not None and last is not None and np.array_equal(value, last))
+            else:
+                same = key in self._journal_state and value == last
+            if not same:
+                changed[key] = self._copy_layout_value(value)
+        if changed:
+            self._journal_state.update(changed)
+            self._journal.record(('layout', changed))
 
-    def set_auto_scroll(self, enabled):
-        """Enable/disable auto-scroll to selection"""
-        self.auto_scroll = enabled
+    @staticmethod
+    def _copy_layout_value(value):
+        if isinstance(value, dict):
+            return dict(value)
+        if isinstance(value, tuple):
+            return value[0], dict(value[1])
+        if isinstance(value, np.ndarray):
+            return value.copy()
+        return value
 
-    def get_values(self):
-        """Return table data in multiple formats"""
-        data = []
-        for row in range(self.rows):
-            row_data = []
-            for col in range(self.cols):
-                if (row, col) in self.cells:
-                    text = self.cells[(row, col)]['text']
-                    content = text.get('1.0', 'end-1c')
-                    row_data.append(content)
-                else:
-                    row_data.append("")  # For merged cells
-            data.append(row_data)
-        
+    def _checkpoint_journal(self):
+        """Start the journal over with the whole current table"""
+        layout = {key: self._copy_layout_value(value) for key, value in self._layout_state().items()}
+        self._journal_state = dict(layout)
+        self._journal.record(('checkpoint', self._store.rows, self._store.snapshot(), layout,
+                              self._store.styles.snapshot()))
+
+    @classmethod
+    def recover(cls, journal_path, parent, **kwargs):
+        """
+        Rebuild a table from an autosave journal (see enable_autosave)
+
+        Args:
+            journal_path: Journal file written by enable_autosave()
+            parent: Parent widget
+            **kwargs: Passed to Table() (cell_width, theme, ...)
+
+        Returns:
+            Table: The table as of the last change that reached the journal
+        """
+        store = None
+        layout = {}
+        for record in _Journal.read(journal_path):
+            kind = record[0]
+            if kind == 'checkpoint':
+                rows, columns, layout, styles = record[1:]
+                # Sparse stores snapshot as (rows, keys, data)
+                store = (_SparseStore if isinstance(columns, tuple) else _ColumnStore)(rows, 0)
+                store.restore(columns)
+                store.styles.restore(styles)
+                layout = dict(layout)
+            elif kind == 'layout':
+                layout.update(record[1])
+            elif kind == 'style' and store is not None:
+                getattr(store.styles, record[1])(*record[2:])
+            elif store is not None:
+                getattr(store, kind)(*record[1:])  # Records are named after store methods
+        if store is None:
+            raise ValueError(f"{journal_path!r} holds no checkpoint to recover from")
+
+        table = cls(parent, rows=0, cols=0, **kwargs)
+        table._install_store(store)
+        table._set_row_order(layout['row_order'])
+        table.row_heights = _RowHeights(table.rows, *layout['row_heights'])
+        table.col_widths = _ColumnWidths(table.cols, *layout['col_widths'])
+        table.merged_cells = dict(layout['merged'])
+        table.formulas = dict(layout['formulas'])
+        table._formulas_version += 1
+        table.column_formulas = dict(layout['column_formulas'])
+        table._finish_load(layout['spreadsheet_mode'])
+        return table
+
+    @staticmethod
+    def _open_array(source, dtype=None, shape=None):
+        """Memory-map a .npy / raw binary file, or pass an array through"""
+        if isinstance(source, (str, os.PathLike)):
+            if os.fspath(source).endswith('.npy'):
+                return np.load(source, mmap_mode='r')
+            if dtype is None:
+                raise ValueError(f"dtype is required to read raw binary file {source!r}")
+            return np.memmap(source, dtype=dtype, mode='r', shape=shape)
+        return np.asarray(source)
+
+    def _install_store(self, store):
+        """Switch the table to new data, dropping everything tied to the old data"""
+        self._commit_focused_edit()
+        if self._search_index is not None:
+            self._search_index.close()
+        if self._run_index is not None:
+            self._run_index.close()
+        if self._formats is not None:
+            self._formats.close()
+        for index in self._indexes.values():
+            index.close()
+        self._set_sheet_state(self._new_sheet_state(store))
+        self._update_reference_headers()
+        self.create_grid()
+        self._update_canvas_size()
+        if self._journal is not None:
+            if store.read_only or store.paged:
+                self.disable_autosave()
+            else:
+                store.journal = store.styles.journal = self._journal_hook(self._journal)
+                self._checkpoint_journal()
+
+    def _new_sheet_state(self, store):
+        """Sheet state (see _SHEET_STATE) of fresh data: no formulas, filters, merges or history"""
         return {
-            'dict': {f'Row {i}': row for i, row in enumerate(data)},
-            'dataframe': pd.DataFrame(data),
-            'array': np.array(data)
+            '_store': store, 'rows': store.rows, 'cols': store.cols,
+            'row_heights': _RowHeights(store.rows, self.default_cell_height),
+            'col_widths': _ColumnWidths(store.cols, self.cell_width),
+            '_row_offsets': None, '_custom_rows': np.zeros(0, dtype=np.int64),
+            '_custom_tops': np.zeros(0, dtype=np.int64), '_custom_shift': np.zeros(1, dtype=np.int64),
+            '_row_order': None, '_view_index': None, '_filters': {}, '_data_visible': None,
+            '_indexes': {}, '_search_index': None, '_run_index': None, '_formats': None, 'merged_cells': {}, 'selected_cells': set(),
+            'selection_start': None, 'undo_stack': [], 'redo_stack': [], 'formulas': {},
+            'calculated_values': {}, 'column_formulas': {}, '_column_results': {},
+            '_dirty_formulas': set(), '_formula_graph_cache': None, '_formula_templates': {},
+            # Never reuse a version, so caches kept for the old formulas can't match
+            '_formulas_version': self._formulas_version + 1,
         }
 
-    def set_values(self, data):
-        """Populate table with data"""
-        self.save_state("Set table values")
-        for row in range(min(self.rows, len(data))):
-            for col in range(min(self.cols, len(data[row]))):
-                if (row, col) in self.cells:
-                    self.cells[(row, col)]['text'].delete('1.0', 'end')
-                    self.cells[(row, col)]['text'].insert('1.0', str(data[row][col]))
+    def _sheet_state(self):
+        """The attributes holding the table's current sheet"""
+        return {name: getattr(self, name) for name in _SHEET_STATE}
 
-    def load_dataframe(self, df):
-        """Load data from a pandas DataFrame"""
-        self.resize_grid(len(df), len(df.columns))
-        self.set_values(df.values.tolist())
+    def _set_sheet_state(self, state):
+        """Make the table hold another sheet (drawing it is up to the caller)"""
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def _check_writable(self, structure=False):
+        """
+        Refuse changes the data source can't take
+
+        Args:
+            structure (bool): The change adds or removes rows or columns
+        """
+        if self._store.read_only:
+            raise ValueError("Table data is read-only")
+        if structure and not self._store.resizable:
+            raise ValueError("The table's data source has a fixed number of rows and columns")
 
     def get_cell(self, row, col, raw=False):
         """
@@ -854,18 +4445,19 @@ class Table(ttk.Frame):
             'value': '',
             'is_merged': False,
             'merge_span': None,
-            'bg_color': self.current_theme['even'] if row % 2 == 0 else self.current_theme['odd'],
+            'bg_color': self._cell_colors(row, col)[0],
             'is_selected': (row, col) in self.selected_cells
         }
         
+        self._commit_focused_edit()
+        if self._dirty_formulas:
+            self._resolve_formulas([(self._data_row(row), col)])
+        cell_data['value'] = self._store.get(self._data_row(row), col)
         if (row, col) in self.cells:
-            text_widget = self.cells[(row, col)]['text']
-            cell_data['value'] = text_widget.get("1.0", "end-1c")
-            
             if (row, col) in self.merged_cells:
                 cell_data['is_merged'] = True
                 cell_data['merge_span'] = self.merged_cells[(row, col)]
-                cell_data['bg_color'] = self.cells[(row, col)]['bg_color']
+                cell_data['bg_color'] = self.cells[(row, col)]['colors'][0]
         
         return cell_data
 
@@ -893,6 +4485,8 @@ class Table(ttk.Frame):
         # Validate coordinates
         if not (0 <= row < self.rows and 0 <= col < self.cols):
             return False
+        if self._store.read_only:
+            return False
         
         # Handle merged cells
         target_cells = [(row, col)]
@@ -908,24 +4502,218 @@ class Table(ttk.Frame):
                 (r, c) 
                 for r in range(row, row + span_r)
                 for c in range(col, col + span_c)
-                if (r, c) in self.cells
+                if 0 <= r < self.rows and 0 <= c < self.cols
             ]
         
-        # Update cells
+        # Update cells (rows hidden by a filter are written but not drawn)
         modified = False
         for r, c in target_cells:
-            if (r, c) in self.cells:
-                text_widget = self.cells[(r, c)]['text']
-                text_widget.delete("1.0", "end")
-                text_widget.insert("1.0", str(value))
-                modified = True
-                
-                # Recalculate formulas if in spreadsheet mode
-                if self.spreadsheet_mode and (r, c) in self.formulas:
-                    self._evaluate_cell(r, c)
+            data_row = self._data_row(r)
+            self._store.set(data_row, c, str(value))
+            self._render_cell(r, c)
+            modified = True
+            
+            # Recalculate formulas if in spreadsheet mode
+            if self.spreadsheet_mode and (data_row, c) in self.formulas:
+                self._evaluate_cell(data_row, c)
+            elif self.spreadsheet_mode:
+                self._update_dependencies(data_row, c)
+        self._refresh_column_formulas()
         
         return modified
 
+    def push_updates(self, updates):
+        """
+        Queue cell changes from a live feed; safe to call from any thread
+
+        Changes are collected and applied together at most once every
+        `update_interval` ms, so a cell written many times in between is
+        only stored and redrawn once, with its last value. Live updates
+        are not recorded on the undo stack.
+
+        Args:
+            updates: {(row, col): value} or an iterable of (row, col, value);
+                     rows are data rows (as in get_values(), unaffected by
+                     sorting and filtering)
+
+        Examples:
+            table.push_updates({(0, 1): 20.5, (3, 2): "ok"})
+            table.push_updates((row, 1, price) for row, price in ticks)
+        """
+        self._check_writable()
+        if isinstance(updates, dict):
+            updates = ((row, col, value) for (row, col), value in updates.items())
+        # Convert in the calling thread to keep work off the Tk thread
+        converted = {(row, col): _display_text(value) for row, col, value in updates}
+        with self._live_lock:
+            self._pending_updates.update(converted)
+        self._schedule_live_flush()
+
+    def append_rows(self, rows):
+        """
+        Queue rows to add at the end of the table; safe to call from any thread
+
+        Rows are appended with the next batch of live updates (see
+        push_updates). Sorted views show them at the end and active
+        filters apply to them; the table gets wider if a row has more
+        values than there are columns.
+
+        Args:
+            rows: Sequence of rows (sequences of values), a 2-D array or a DataFrame
+        """
+        self._check_writable(structure=True)
+        if hasattr(rows, 'to_numpy'):
+            rows = rows.to_numpy(dtype=object)
+        rows = [list(row) for row in rows]
+        if not rows:
+            return
+        width = max(len(row) for row in rows)
+        block = np.full((len(rows), width), '', dtype=object)
+        for i, row in enumerate(rows):
+            block[i, :len(row)] = [_display_text(value) for value in row]
+        with self._live_lock:
+            self._pending_rows.append(block)
+        self._schedule_live_flush()
+
+    def set_tail_mode(self, max_rows=None, follow=True):
+        """
+        Keep only the newest rows of a live table
+
+        Args:
+            max_rows (int): Rows to keep; the oldest data rows are dropped
+                            when appended rows go past it (None turns tail
+                            mode off)
+            follow (bool): Keep the newest rows in view while the table is
+                           scrolled to the bottom
+        """
+        self._tail_rows = max_rows
+        self._tail_follow = follow
+        if max_rows is not None and self._store.rows > max_rows:
+            self._drop_oldest_rows(self._store.rows - max_rows)
+            self._refresh_live_layout(follow, shifted=True)
+
+    def _schedule_live_flush(self):
+        """Arrange for queued live updates to be applied on the Tk thread"""
+        with self._live_lock:
+            if self._live_scheduled:
+                return
+            self._live_scheduled = True
+        # Tk queues calls made from other threads to its own thread
+        self.after(self.update_interval, self._flush_live_updates)
+
+    def _flush_live_updates(self):
+        """Apply every queued live update as one batch"""
+        with self._live_lock:
+            updates, self._pending_updates = self._pending_updates, {}
+            blocks, self._pending_rows = self._pending_rows, []
+            self._live_scheduled = False
+        if not self.winfo_exists():
+            return
+        follow = self._tail_follow and self.canvas.yview()[1] >= 1.0
+
+        appended = bool(blocks) and self._store.resizable
+        if appended:
+            self._append_data_rows(blocks)
+        if updates and not self._store.read_only:
+            self._apply_live_updates(updates)
+        dropped = self._tail_rows is not None and self._store.rows > self._tail_rows
+        if dropped:
+            self._drop_oldest_rows(self._store.rows - self._tail_rows)
+        if appended or dropped:
+            self._refresh_live_layout(follow, shifted=dropped)
+
+    def _append_data_rows(self, blocks):
+        """Add blocks of rows (2-D object arrays) after the last data row"""
+        width = max(max(block.shape[1] for block in blocks), self.cols)
+        block = np.full((sum(len(block) for block in blocks), width), '', dtype=object)
+        start = 0
+        for part in blocks:
+            block[start:start + len(part), :part.shape[1]] = part
+            start += len(part)
+        if width > self.cols:
+            self.cols = width
+            self._store.resize(self._store.rows, width)
+
+        first = self._store.rows
+        self._store.append_rows(block)
+        if self._row_order is not None:
+            self._set_row_order(np.concatenate(
+                (self._row_order, np.arange(first, self._store.rows, dtype=np.int64))))
+        self.rows += len(block)
+        if self._filters:
+            self._data_visible = self._compute_visible_rows()
+
+    def _apply_live_updates(self, updates):
+        """Write {(data row, col): value} and redraw the affected cells in view"""
+        cells = np.array(list(updates), dtype=np.int64).reshape(-1, 2)
+        values = np.empty(len(updates), dtype=object)
+        values[:] = list(updates.values())
+        rows, cols = cells[:, 0], cells[:, 1]
+        valid = (rows >= 0) & (rows < self._store.rows) & (cols >= 0) & (cols < self.cols)
+        rows, cols, values = rows[valid], cols[valid], values[valid]
+        for col in np.unique(cols).tolist():
+            in_col = cols == col
+            self._store.set_many(rows[in_col], col, values[in_col])
+
+        if self.formulas:
+            # Written cells lose their formula; look them up rather than scan the formulas
+            for key in zip(rows.tolist(), cols.tolist()):
+                if key in self.formulas:
+                    del self.formulas[key]
+                    self.calculated_values.pop(key, None)
+                    self._formulas_version += 1
+        written = {col: rows[cols == col] for col in np.unique(cols).tolist()}
+        for row, col in self.cells:
+            if col in written and self._data_row(row) in written[col]:
+                self._render_cell(row, col, truncate=(row, col) not in self.selected_cells)
+        self._recalculate_written(written)
+
+    def _drop_oldest_rows(self, count):
+        """Delete the first `count` data rows (tail mode)"""
+        if self._row_order is None:
+            deleted = list(range(count))
+        else:
+            deleted = sorted(self._view_rows(np.arange(count)).tolist())
+        deleted_set = set(deleted)
+        self._delete_data_rows(deleted)
+        self.merged_cells = {
+            (r - int(np.searchsorted(deleted, r)), c): span
+            for (r, c), span in self.merged_cells.items()
+            if r not in deleted_set
+        }
+        self.selected_cells = {
+            (r - int(np.searchsorted(deleted, r)), c)
+            for r, c in self.selected_cells
+            if r not in deleted_set
+        }
+        self.rows -= count
+        self.row_heights.delete(deleted)
+        # Recorded cell positions no longer match the data
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def _refresh_live_layout(self, follow=False, shifted=False):
+        """
+        Update geometry and redraw after live rows were added or dropped
+
+        Args:
+            follow (bool): Scroll to the bottom
+            shifted (bool): Rows were dropped, so view rows show other data
+        """
+        self._update_reference_headers()
+        self._layout_rows()
+        self._update_canvas_size()
+        if follow:
+            self.canvas.yview_moveto(1.0)
+        if shifted and (self.merged_cells or self.row_heights.overrides or self.selected_cells):
+            # Spans, positions or highlights of the drawn cells moved
+            self.create_grid()
+            return
+        stale = list(self.cells) if shifted else []
+        self._render_viewport()
+        for row, col in stale:
+            self._render_cell(row, col, truncate=True)
+
     def get_selected_cell_value(self):
         """Convenience method to get value from first selected cell"""
         if not self.selected_cells:
@@ -961,22 +4749,24 @@ class Table(ttk.Frame):
         """Select a single cell"""
         if not (0 <= row < self.rows and 0 <= col < self.cols):
             return
+        # Cells hidden by a filter or under a merge can't be selected
+        if not self._is_row_visible(row) or self.is_merged_cell(row, col):
+            return
             
         if self.selection_mode == "single":
             self.clear_selection()
             
         if (row, col) not in self.selected_cells:
-            cell = self.cells.get((row, col))
+            self.selected_cells.add((row, col))
+            cell = self.cells.get((row, col))  # Off-screen cells are colored when drawn
             if cell:
                 self.itemconfig(cell['rect'], fill = self.current_theme['select_bg'])
-                self.selected_cells.add((row, col))
 
     def deselect_cell(self, row, col):
         """Deselect a cell"""
-        cell = self.cells.get((row, col))
-        if cell and (row, col) in self.selected_cells:
-            self.itemconfig(cell['rect'], fill=cell['bg_color'])
-            self.selected_cells.discard((row, col))
+        if (row, col) in self.selected_cells:
+            self._paint_cell(row, col, selected=False)
+        self.selected_cells.discard((row, col))
 
     def select_range(self, start_row, start_col, end_row, end_col):
         """Select a range of cells"""
@@ -990,8 +4780,7 @@ class Table(ttk.Frame):
         if self.selection_mode != "multiple":
             return
             
-        col = min(max(0, int(event.x // self.cell_width)), self.cols - 1)
-        row = min(max(0, int(event.y // self.cell_height)), self.rows - 1)
+        row, col = self._cell_at_event(event)
         
         if not self.selection_start:
             self.selection_start = (row, col)
@@ -1004,10 +4793,11 @@ class Table(ttk.Frame):
         if self.selection_rect:
             self.delete(self.selection_rect)
             
-        x1 = start_col * self.cell_width
-        y1 = start_row * self.cell_height
-        x2 = (col + 1) * self.cell_width
-        y2 = (row + 1) * self.cell_height
+        top, bottom = min(start_row, row), max(start_row, row)
+        x1 = self.col_widths.left(min(start_col, col))
+        y1 = self._row_top(top)
+        x2 = self.col_widths.left(max(start_col, col) + 1)
+        y2 = self._row_top(bottom + 1)
         
         self.selection_rect = self.create_rectangle(
             x1, y1, x2, y2,
@@ -1026,8 +4816,7 @@ class Table(ttk.Frame):
 
     def on_ctrl_click(self, event):
         """Add/remove cell from selection with Ctrl+Click"""
-        col = min(max(0, int(event.x // self.cell_width)), self.cols - 1)
-        row = min(max(0, int(event.y // self.cell_height)), self.rows - 1)
+        row, col = self._cell_at_event(event)
         
         if (row, col) in self.selected_cells:
             self.deselect_cell(row, col)
@@ -1040,14 +4829,271 @@ class Table(ttk.Frame):
         if not self.selected_cells:
             return
             
-        col = min(max(0, int(event.x // self.cell_width)), self.cols - 1)
-        row = min(max(0, int(event.y // self.cell_height)), self.rows - 1)
+        row, col = self._cell_at_event(event)
         
         # Use first selected cell as anchor
         first_row, first_col = next(iter(self.selected_cells))
         self.select_range(first_row, first_col, row, col)
         return "break"
 
+    def copy_selection(self):
+        """
+        Copy the selected block to the clipboard as tab-separated text
+
+        The bounding rectangle of the selection is copied (unselected
+        cells inside it are empty, rows hidden by a filter are left out),
+        quoted like spreadsheet applications do so values containing tabs
+        or newlines survive a round trip.
+
+        Returns:
+            str: The copied text ('' when nothing is selected)
+        """
+        if not self.selected_cells:
+            return ""
+        self._commit_focused_edit()
+        rows = [r for r, c in self.selected_cells]
+        cols = [c for r, c in self.selected_cells]
+        top, bottom, left, right = min(rows), max(rows), min(cols), max(cols)
+        self._resolve_formulas(columns=range(left, right + 1))
+
+        view_rows = np.arange(top, bottom + 1)
+        view_rows = view_rows[self._visible_rows_mask()[top:bottom + 1]]
+        data_rows = self._data_row_array(view_rows)
+        block = np.empty((len(view_rows), right - left + 1), dtype=object)
+        for col in range(left, right + 1):
+            block[:, col - left] = self._store.values(data_rows, col)
+        if len(self.selected_cells) != block.size:
+            # Blank the holes of a non-rectangular selection
+            selected = np.zeros(block.shape, dtype=bool)
+            position = {r: i for i, r in enumerate(view_rows.tolist())}
+            for r, c in self.selected_cells:
+                if r in position:
+                    selected[position[r], c - left] = True
+            block[~selected] = ""
+
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter='\t', lineterminator='\n').writerows(block.tolist())
+        text = buffer.getvalue()
+        self.clipboard_clear()
+        self.clipboard_append(text)
+        return text
+
+    def paste(self, text=None, row=None, col=None):
+        """
+        Paste a tab-separated block as one batched, undoable update
+
+        The block is written with its top-left corner at (row, col) -
+        by default the top-left selected cell - and the grid grows when
+        the block runs past its edge. When the selection is a whole
+        multiple of the block's size, the block is tiled over it.
+
+        Args:
+            text (str): TSV text to paste (default: the clipboard)
+            row, col (int): Top-left target view cell
+
+        Returns:
+            tuple: (rows, cols) of the pasted area, or None if nothing was pasted
+        """
+        if text is None:
+            try:
+                text = self.clipboard_get()
+            except tk.TclError:
+                return None
+        if row is None or col is None:
+            if not self.selected_cells:
+                return None
+            row = min(r for r, c in self.selected_cells)
+            col = min(c for r, c in self.selected_cells)
+        self._check_writable()
+        self._commit_focused_edit()
+
+        block = self._parse_tsv(text)
+        if block.size == 0:
+            return None
+        height, width = block.shape
+        if len(self.selected_cells) > 1:
+            sel_rows = {r for r, c in self.selected_cells}
+            sel_cols = {c for r, c in self.selected_cells}
+            sel_height = max(sel_rows) - min(sel_rows) + 1
+            sel_width = max(sel_cols) - min(sel_cols) + 1
+            if sel_height % height == 0 and sel_width % width == 0:
+                block = np.tile(block, (sel_height // height, sel_width // width))
+                height, width = block.shape
+
+        # One undo entry either way: a full snapshot when the grid has to grow
+        grow_rows = max(self.rows, row + height)
+        grow_cols = max(self.cols, col + width)
+        data_rows = None
+        if (grow_rows, grow_cols) != (self.rows, self.cols):
+            if not self._store.resizable:
+                # Clip to the fixed grid instead of growing it
+                block = block[:self.rows - row, :self.cols - col]
+                height, width = block.shape
+                grow_rows, grow_cols = self.rows, self.cols
+        if (grow_rows, grow_cols) != (self.rows, self.cols):
+            self.save_state("Paste")
+            self.resize_grid(grow_rows, grow_cols)
+        else:
+            data_rows = self._data_row_array(np.arange(row, row + height))
+            self._push_undo(self._cells_state(
+                {c: data_rows for c in range(col, col + width)}, "Paste"))
+        if data_rows is None:
+            data_rows = self._data_row_array(np.arange(row, row + height))
+
+        writable = self._writable_mask(row, col, height, width)
+        changes = {}
+        formulas = {}
+        for j in range(width):
+            keep = writable[:, j]
+            rows, values = data_rows[keep], block[keep, j]
+            changes[col + j] = (rows, values)
+            if self.spreadsheet_mode:
+                is_formula = pd.Series(values, dtype=object).str.startswith('=')
+                for i in np.flatnonzero(is_formula.to_numpy(dtype=bool)):
+                    formulas[(int(rows[i]), col + j)] = values[i]
+        self._write_cells(changes, formulas)
+        return (height, width)
+
+    def _writable_mask(self, row, col, height, width):
+        """Mask over a view block of the cells not hidden under a merge (those keep their empty value)"""
+        writable = np.ones((height, width), dtype=bool)
+        for (mr, mc), (span_r, span_c) in self.merged_cells.items():
+            r0, r1 = max(mr, row), min(mr + span_r, row + height)
+            c0, c1 = max(mc, col), min(mc + span_c, col + width)
+            if r0 < r1 and c0 < c1:
+                writable[r0 - row:r1 - row, c0 - col:c1 - col] = False
+                if row <= mr < row + height and col <= mc < col + width:
+                    writable[mr - row, mc - col] = True
+        return writable
+
+    def fill_down(self):
+        """
+        Copy the top cell of each selected column into the selected cells below it
+
+        In spreadsheet mode formulas are copied with their references
+        shifted, as in spreadsheet applications: "=A1*B1" filled down from
+        row 1 becomes "=A2*B2", "=A3*B3", ... Every copy shares the
+        formula's R1C1 template, so it is compiled once and the copies
+        are evaluated together as one array expression where possible.
+        A copy whose references would fall off the sheet gets "#REF!".
+        Undone in one step.
+
+        Returns:
+            int: Number of cells filled
+        """
+        return self._fill(down=True)
+
+    def fill_right(self):
+        """Copy the leftmost cell of each selected row into the selected cells to its right (see fill_down)"""
+        return self._fill(down=False)
+
+    def _fill(self, down):
+        """Fill the selection's bounding block from its first row (down) or column"""
+        if not self.selected_cells:
+            return 0
+        self._check_writable()
+        self._commit_focused_edit()
+        rows = [r for r, c in self.selected_cells]
+        cols = [c for r, c in self.selected_cells]
+        top, bottom, left, right = min(rows), max(rows), min(cols), max(cols)
+        if (bottom == top) if down else (right == left):
+            return 0
+        height, width = bottom - top + 1, right - left + 1
+        data_rows = self._data_row_array(np.arange(top, bottom + 1))
+        writable = self._writable_mask(top, left, height, width)
+        if down:
+            writable[0, :] = False
+        else:
+            writable[:, 0] = False
+
+        block = np.empty((height, width), dtype=object)
+        formulas = {}
+        sources = range(width) if down else range(height)
+        for i in sources:
+            source = (int(data_rows[0]), left + i) if down else (int(data_rows[i]), left)
+            if down:
+                targets = [(int(r), left + i) for r in data_rows[1:]]
+            else:
+                targets = [(source[0], left + j) for j in range(1, width)]
+            values = self._fill_values(source, targets, formulas)
+            if down:
+                block[1:, i] = values
+            else:
+                block[i, 1:] = values
+
+        self._push_undo(self._cells_state(
+            {c: data_rows[writable[:, c - left]] for c in range(left, right + 1)},
+            "Fill Down" if down else "Fill Right"))
+        changes = {}
+        for j in range(width):
+            keep = writable[:, j]
+            if keep.any():
+                changes[left + j] = (data_rows[keep], block[keep, j])
+        written = {(int(r), c) for c, (rs, _) in changes.items() for r in rs}
+        self._write_cells(changes, {cell: f for cell, f in formulas.items() if cell in written})
+        return len(written)
+
+    def _fill_values(self, source, targets, formulas):
+        """
+        Values of data cell `source` copied into data cells `targets`
+
+        Formulas are shifted to each target (collected into `formulas`);
+        other values are copied as they are.
+        """
+        formula = self.formulas.get(source) if self.spreadsheet_mode else None
+        if formula is None:
+            return [self._store.get(*source)] * len(targets)
+        template = _relative_formula(formula, *source)
+        values = []
+        for row, col in targets:
+            text = _absolute_formula(template, row, col)
+            if text is None:
+                values.append("#REF!")
+            else:
+                values.append(text)
+                formulas[(row, col)] = text
+                self._formula_templates[(row, col)] = (text, template)
+        return values
+
+    def _fill_down_selected(self, event=None):
+        """Ctrl+D handler"""
+        self.fill_down()
+        return "break"
+
+    def _fill_right_selected(self, event=None):
+        """Ctrl+R handler"""
+        self.fill_right()
+        return "break"
+
+    @staticmethod
+    def _parse_tsv(text):
+        """Parse tab-separated text into a rectangular object array of str"""
+        lines = list(csv.reader(io.StringIO(text), delimiter='\t'))
+        if lines and not any(lines[-1]):
+            lines.pop()  # Trailing blank line
+        width = max((len(line) for line in lines), default=0)
+        block = np.full((len(lines), width), "", dtype=object)
+        for i, line in enumerate(lines):
+            block[i, :len(line)] = line
+        return block
+
+    def _data_row_array(self, view_rows):
+        """Vectorized _data_row for an array of view rows"""
+        view_rows = np.asarray(view_rows, dtype=np.int64)
+        if self._row_order is None:
+            return view_rows
+        return self._row_order[view_rows]
+
+    def _copy_selected(self, event=None):
+        """Ctrl+C handler"""
+        self.copy_selection()
+        return "break"
+
+    def _paste_to_selected(self, event=None):
+        """Ctrl+V handler"""
+        self.paste()
+        return "break"
+
     def get_selected_values(self):
         """Return values from selected cells"""
         values = []
@@ -1057,7 +5103,7 @@ class Table(ttk.Frame):
                 values.append({
                     'row': row,
                     'col': col,
-                    'value': cell['text'].get("1.0", "end-1c")
+                    'value': self._store.get(self._data_row(row), col)
                 })
         return values
 
@@ -1091,12 +5137,11 @@ class Table(ttk.Frame):
         
         # Resize columns
         if new_width:
-            self.default_cell_width = new_width
             for col in affected_cols:
-                # Update all cells in column
-                for row in range(self.rows):
-                    if (row, col) in self.cells:
-                        self.cells[(row, col)]['text'].config(width=new_width//7)
+                self.col_widths[col] = new_width
+            self._journal_layout_soon()
+            self.create_grid()
+            self._update_canvas_size()
         
         # Resize rows
         if new_height:
@@ -1108,253 +5153,1069 @@ class Table(ttk.Frame):
                         self.cells[(row, col)]['text'].config(height=1)
 
 
-    def insert_row(self, position="below"):
+    def insert_row(self, position="below"):
+        """
+        Insert a new row relative to current selection
+        
+        Args:
+            position: "above" or "below" current row
+        """
+        self._check_writable(structure=True)
+        self.save_state(f"Insert row {position}")
+        if not self.selected_cells:
+            return
+            
+        ref_row = min(r for r, c in self.selected_cells)
+        
+        # Calculate insertion index
+        insert_at = ref_row + 1 if position == "below" else ref_row
+        
+        # Update data structure
+        self._insert_data_rows(insert_at)
+        self.merged_cells = {
+            (r + 1 if r >= insert_at else r, c): span
+            for (r, c), span in self.merged_cells.items()
+        }
+        self.rows += 1
+        self.row_heights.insert(insert_at, self.default_cell_height)
+        
+        # Adjust selection
+        new_selection = set()
+        for r, c in self.selected_cells:
+            new_r = r + 1 if r >= insert_at else r
+            new_selection.add((new_r, c))
+        self.selected_cells = new_selection
+        anchor = next(iter(new_selection))
+        
+        # Recreate grid
+        self.refresh_grid()
+        self._update_canvas_size()
+        self.update_selection(*anchor)
+
+    def delete_row(self):
+        """Delete currently selected row(s)"""
+        self._check_writable(structure=True)
+        self.save_state("Delete row")
+        if not self.selected_cells:
+            return
+            
+        rows_to_delete = {r for r, c in self.selected_cells}
+        deleted = sorted(rows_to_delete)
+        
+        # Update data structure
+        self._delete_data_rows(deleted)
+        self.merged_cells = {
+            (r - int(np.searchsorted(deleted, r)), c): span
+            for (r, c), span in self.merged_cells.items()
+            if r not in rows_to_delete
+        }
+        self.rows -= len(rows_to_delete)
+        self.row_heights.delete(deleted)
+        
+        # Clear selection
+        self.clear_selection()
+        
+        # Recreate grid
+        self.refresh_grid()
+        self._update_canvas_size()
+
+    def insert_column(self, position="right"):
+        """
+        Insert new column relative to current selection
+        
+        Args:
+            position: "left" or "right" of current column
+        """
+        self._check_writable(structure=True)
+        self.save_state(f"Insert column {position}")
+        if not self.selected_cells:
+            return
+            
+        ref_col = min(c for r, c in self.selected_cells)
+        
+        # Calculate insertion index
+        insert_at = ref_col + 1 if position == "right" else ref_col
+        
+        # Update data structure
+        self._store.insert_cols(insert_at)
+        self._remap_formula_cells(lambda r, c: (r, c + 1 if c >= insert_at else c))
+        self._remap_filter_columns(lambda c: c + 1 if c >= insert_at else c)
+        self._remap_column_formulas(lambda c: c + 1 if c >= insert_at else c)
+        self.merged_cells = {
+            (r, c + 1 if c >= insert_at else c): span
+            for (r, c), span in self.merged_cells.items()
+        }
+        self.cols += 1
+        self.col_widths.insert(insert_at)
+        
+        # Adjust selection
+        new_selection = set()
+        for r, c in self.selected_cells:
+            new_c = c + 1 if c >= insert_at else c
+            new_selection.add((r, new_c))
+        self.selected_cells = new_selection
+        anchor = next(iter(new_selection))
+        
+        # Recreate grid
+        self.refresh_grid()
+        self._update_canvas_size()
+        self.update_selection(*anchor)
+
+    def delete_column(self):
+        """Delete currently selected column(s)"""
+        self._check_writable(structure=True)
+        self.save_state("Delete column")
+        if not self.selected_cells:
+            return
+            
+        cols_to_delete = {c for r, c in self.selected_cells}
+        deleted = sorted(cols_to_delete)
+        
+        # Update data structure
+        self._store.delete_cols(deleted)
+        self._remap_formula_cells(
+            lambda r, c: None if c in cols_to_delete
+            else (r, c - int(np.searchsorted(deleted, c))))
+        self._remap_filter_columns(
+            lambda c: None if c in cols_to_delete
+            else c - int(np.searchsorted(deleted, c)))
+        self._remap_column_formulas(
+            lambda c: None if c in cols_to_delete
+            else c - int(np.searchsorted(deleted, c)))
+        self.merged_cells = {
+            (r, c - int(np.searchsorted(deleted, c))): span
+            for (r, c), span in self.merged_cells.items()
+            if c not in cols_to_delete
+        }
+        self.cols -= len(cols_to_delete)
+        self.col_widths.delete(deleted)
+        
+        # Clear selection
+        self.clear_selection()
+        
+        # Recreate grid
+        self.refresh_grid()
+        self._update_canvas_size()
+
+    def _insert_data_rows(self, at, count=1):
+        """Insert empty rows so that they are displayed starting at view row `at`"""
+        if self._row_order is None:
+            data_at = at
+            self._store.insert_rows(at, count)
+            self._remap_formula_cells(lambda r, c: (r + count if r >= at else r, c))
+        else:
+            # Sorted view: append the data and splice it into the mapping
+            data_at = self._store.rows
+            self._store.insert_rows(data_at, count)
+            self._set_row_order(np.insert(self._row_order, at, np.arange(data_at, data_at + count)))
+        if self._data_visible is not None:
+            self._data_visible = np.insert(self._data_visible, data_at, [True] * count)
+
+    def _delete_data_rows(self, rows):
+        """Delete the data shown at the given view rows"""
+        deleted = np.unique([self._data_row(r) for r in rows]).astype(np.int64)
+        if not len(deleted):
+            return
+        self._store.delete_rows(deleted)
+        deleted_set = set(deleted.tolist())
+        self._remap_formula_cells(
+            lambda r, c: None if r in deleted_set
+            else (r - int(np.searchsorted(deleted, r)), c))
+        if self._row_order is not None:
+            kept = self._row_order[~np.isin(self._row_order, deleted)]
+            self._set_row_order(kept - np.searchsorted(deleted, kept))
+        if self._data_visible is not None:
+            self._data_visible = np.delete(self._data_visible, deleted)
+
+    def _remap_formula_cells(self, remap):
+        """Move formulas after a structural edit; remap(row, col) returns the new cell or None"""
+        for cells in (self.formulas, self.calculated_values):
+            moved = {}
+            for cell, value in cells.items():
+                target = remap(*cell)
+                if target is not None:
+                    moved[target] = value
+            cells.clear()
+            cells.update(moved)
+        self._formulas_version += 1
+        if self._dirty_formulas:
+            self._dirty_formulas = {
+                target for target in (remap(*cell) for cell in self._dirty_formulas)
+                if target is not None}
+
+    def move_row(self, direction="down"):
+        """
+        Move selected row up or down
+        
+        Args:
+            direction: "up" or "down"
+        """
+        if not self.selected_cells:
+            return
+            
+        rows = {r for r, c in self.selected_cells}
+        if len(rows) != 1:
+            messagebox.showwarning("Move Row", "Select exactly one row to move")
+            return
+            
+        row = rows.pop()
+        new_pos = row + 1 if direction == "down" else row - 1
+        
+        # Validate new position
+        if new_pos < 0 or new_pos >= self.rows:
+            return
+        self._push_undo(self._row_order_state(f"Move row {direction}"))
+            
+        # Swap the rows in the view mapping; stored values stay put
+        order = self._row_order if self._row_order is not None else np.arange(self.rows)
+        order = order.copy()
+        order[[row, new_pos]] = order[[new_pos, row]]
+        self._set_row_order(order)
+        for c in range(self.cols):
+            # Swap merge status if needed
+            if (row, c) in self.merged_cells:
+                self.merged_cells[(new_pos, c)] = self.merged_cells.pop((row, c))
+            elif (new_pos, c) in self.merged_cells:
+                self.merged_cells[(row, c)] = self.merged_cells.pop((new_pos, c))
+        self.row_heights[row], self.row_heights[new_pos] = self.row_heights[new_pos], self.row_heights[row]
+        self.refresh_grid()
+        
+        # Update selection
+        self.clear_selection()
+        for c in range(self.cols):
+            self.select_cell(new_pos, c)
+        
+        self.update_selection(new_pos, 0)
+
+    def sort_by(self, columns, ascending=True):
+        """
+        Sort the displayed rows by one or more columns
+        
+        The sort is stable and only changes the view row -> data row
+        mapping; stored values, formulas and formula references are left
+        untouched, so a single undo step restores the previous order.
+        Numbers sort before text and blanks always sort last.
+        
+        Args:
+            columns: Column index, column letter, or a list of them
+                     (first is the primary key)
+            ascending (bool or list): Sort direction, per column if a list
+        
+        Examples:
+            table.sort_by('B')
+            table.sort_by(['A', 2], ascending=[True, False])
+        """
+        if not isinstance(columns, (list, tuple)):
+            columns = [columns]
+        columns = [_column_index(c) if isinstance(c, str) else c for c in columns]
+        if isinstance(ascending, (list, tuple)):
+            if len(ascending) != len(columns):
+                raise ValueError("ascending must have one entry per sort column")
+            directions = list(ascending)
+        else:
+            directions = [ascending] * len(columns)
+        for col in columns:
+            if not 0 <= col < self.cols:
+                raise IndexError(f"Column {col} out of bounds (table has {self.cols} columns)")
+        if self.merged_cells:
+            raise ValueError("Cannot sort a table that contains merged cells")
+        if not columns or self.rows < 2:
+            return
+        self._commit_focused_edit()
+        
+        current = self._row_order if self._row_order is not None else np.arange(self.rows)
+        keys = []
+        for col, asc in zip(columns, directions):
+            keys.extend(self._sort_keys(col, current, asc))
+        # np.lexsort is stable and treats the last key as the primary one
+        permutation = np.lexsort(keys[::-1])
+        
+        self._push_undo(self._row_order_state("Sort rows"))
+        self._set_row_order(current[permutation])
+        self.row_heights = self.row_heights.permuted(permutation)
+        self.refresh_grid()
+
+    def clear_sort(self):
+        """Show rows in their stored order again (undoable)"""
+        if self._row_order is None:
+            return
+        if self.merged_cells:
+            raise ValueError("Cannot reorder a table that contains merged cells")
+        self._push_undo(self._row_order_state("Clear sort"))
+        view_index = np.argsort(self._row_order)
+        self.row_heights = self.row_heights.permuted(view_index)
+        self._set_row_order(None)
+        self.refresh_grid()
+
+    def _sort_keys(self, col, order, ascending):
+        """
+        Typed lexsort keys (most significant first) for a column in view order
+        
+        Returns:
+            list: [category, number, text rank] arrays
+        """
+        self._resolve_formulas(columns=(col,))
+        numbers = self._store.numeric(col)[order]
+        is_blank = self._store.blank(col)[order]
+        is_number = ~np.isnan(numbers)
+        
+        # Numbers, then text (reversed when descending); blanks always last
+        number_rank, text_rank = (0, 1) if ascending else (1, 0)
+        category = np.where(is_blank, 2, np.where(is_number, number_rank, text_rank))
+        
+        number_key = np.where(is_number, numbers, 0.0)
+        is_text = ~is_blank & ~is_number
+        text_key = np.zeros(len(order), dtype=np.int64)
+        if is_text.any():
+            values = self._store.values(order[is_text], col)
+            text = pd.Series(values).astype(str).str.lower().to_numpy()
+            text_key[is_text] = pd.factorize(text, sort=True)[0]
+        
+        if not ascending:
+            number_key = -number_key
+            text_key = -text_key
+        return [category, number_key, text_key]
+
+    def set_filter(self, column, equals=None, isin=None, min_value=None,
+                   max_value=None, contains=None, case_sensitive=False):
+        """
+        Show only rows whose value in `column` matches the given criteria
+        
+        Criteria on one column are combined with AND, and so are filters on
+        different columns. Calling set_filter again for a column replaces
+        its filter; calling it without criteria removes it. Hidden rows keep
+        their data and row numbers, they are just not displayed, selected
+        or navigated to. Like spreadsheet filters, the filter is evaluated
+        when it is set: edits made afterwards do not hide or show rows until
+        reapply_filters() is called.
+        
+        Equality and range tests use the column's hash / sorted index when
+        one was created with create_index(), and vectorized masks over the
+        column data otherwise.
+        
+        Args:
+            column: Column index or letter
+            equals: Value to match (numbers match numerically, anything
+                    else matches the cell text exactly)
+            isin (iterable): Any of these values
+            min_value (float): Numeric lower bound (inclusive)
+            max_value (float): Numeric upper bound (inclusive)
+            contains (str): Substring of the cell text
+            case_sensitive (bool): Case sensitivity of `contains`
+        
+        Examples:
+            table.set_filter('A', equals='Open')
+            table.set_filter(2, min_value=10, max_value=20)
+            table.set_filter('B', contains='smith')
+        """
+        col = _column_index(column) if isinstance(column, str) else column
+        if not 0 <= col < self.cols:
+            raise IndexError(f"Column {col} out of bounds (table has {self.cols} columns)")
+        criteria = {
+            'equals': equals, 'isin': None if isin is None else list(isin),
+            'min_value': min_value, 'max_value': max_value,
+            'contains': contains, 'case_sensitive': case_sensitive
+        }
+        if all(criteria[key] is None for key in ('equals', 'isin', 'min_value', 'max_value', 'contains')):
+            self._filters.pop(col, None)
+        else:
+            self._filters[col] = criteria
+        self.reapply_filters()
+
+    def clear_filters(self):
+        """Remove all filters and show every row"""
+        self._filters = {}
+        self.reapply_filters()
+
+    def get_filters(self):
+        """Return {col: criteria} for the active filters"""
+        return {col: dict(criteria) for col, criteria in self._filters.items()}
+
+    def reapply_filters(self):
+        """Re-evaluate the active filters against the current data"""
+        self._commit_focused_edit()
+        self._data_visible = self._compute_visible_rows()
+        
+        # Drop selected cells that just got hidden
+        for row, col in list(self.selected_cells):
+            if not self._is_row_visible(row):
+                self.deselect_cell(row, col)
+                self.selected_cells.discard((row, col))
+        self.refresh_grid()
+        self._update_canvas_size()
+
+    def _compute_visible_rows(self):
+        """Bool mask over data rows passing every filter (None when unfiltered)"""
+        if not self._filters:
+            return None
+        visible = np.ones(self._store.rows, dtype=bool)
+        for col, criteria in self._filters.items():
+            visible &= self._filter_mask(col, criteria)
+        return visible
+
+    def _filter_mask(self, col, criteria):
+        """Boolean mask over data rows for one column's filter criteria"""
+        self._resolve_formulas(columns=(col,))
+        rows = self._store.rows
+        mask = np.ones(rows, dtype=bool)
+        
+        if criteria['equals'] is not None or criteria['isin'] is not None:
+            wanted = [criteria['equals']] if criteria['equals'] is not None else criteria['isin']
+            numbers = [v for v in wanted if isinstance(v, (int, float)) and not isinstance(v, bool)]
+            texts = [str(v) for v in wanted if not (isinstance(v, (int, float)) and not isinstance(v, bool))]
+            match = np.zeros(rows, dtype=bool)
+            if texts:
+                index = self._indexes.get((col, 'hash'))
+                if index is not None:
+                    match[index.rows_equal(texts)] = True
+                else:
+                    match |= pd.Series(self._store.column(col)).isin(texts).to_numpy()
+            if numbers:
+                index = self._indexes.get((col, 'sorted'))
+                if index is not None:
+                    for number in numbers:
+                        match[index.rows_between(number, number)] = True
+                else:
+                    match |= np.isin(self._store.numeric(col), numbers)
+            mask &= match
+        
+        low, high = criteria['min_value'], criteria['max_value']
+        if low is not None or high is not None:
+            index = self._indexes.get((col, 'sorted'))
+            if index is not None:
+                match = np.zeros(rows, dtype=bool)
+                match[index.rows_between(low, high)] = True
+                mask &= match
+            else:
+                numbers = self._store.numeric(col)
+                if low is not None:
+                    mask &= numbers >= low
+                if high is not None:
+                    mask &= numbers <= high
+        
+        if criteria['contains'] is not None:
+            found = pd.Series(self._store.column(col)).astype(str).str.contains(
+                str(criteria['contains']), case=criteria['case_sensitive'], regex=False)
+            mask &= found.to_numpy(dtype=bool)
+        return mask
+
+    def create_index(self, column, kind='hash'):
+        """
+        Build a cached index on a column to speed up filtering
+        
+        The index follows single-cell edits incrementally and rebuilds
+        itself lazily after bulk changes.
+        
+        Args:
+            column: Column index or letter
+            kind (str): 'hash' for equality filters, 'sorted' for numeric
+                        equality and range filters
+        """
+        col = _column_index(column) if isinstance(column, str) else column
+        if not 0 <= col < self.cols:
+            raise IndexError(f"Column {col} out of bounds (table has {self.cols} columns)")
+        if (col, kind) not in self._indexes:
+            self._indexes[(col, kind)] = _ColumnIndex(self._store, col, kind)
+
+    def drop_index(self, column, kind=None):
+        """Remove the index(es) on a column (both kinds when kind is None)"""
+        col = _column_index(column) if isinstance(column, str) else column
+        for key in [key for key in self._indexes if key[0] == col and kind in (None, key[1])]:
+            self._indexes.pop(key).close()
+
+    def define_style(self, bold=False, italic=False, underline=False, fg=None, bg=None, align=None):
+        """
+        Id of a cell style, for set_cell_style() / set_range_style()
+
+        Each distinct style is stored once and cells only hold its id, so
+        styling millions of cells costs two bytes a cell. Defining the
+        same style twice returns the same id. Unset attributes follow the
+        theme (its font, text color and row stripes).
+
+        Args:
+            bold, italic, underline (bool): Font variants
+            fg (str): Text color
+            bg (str): Background color
+            align (str): 'left', 'center' or 'right'
+
+        Examples:
+            header = table.define_style(bold=True, bg='#dde4ee', align='center')
+            table.set_range_style(0, 0, 0, table.cols - 1, header)
+        """
+        if align not in (None, 'left', 'center', 'right'):
+            raise ValueError(f"Unknown alignment {align!r} (use 'left', 'center' or 'right')")
+        return self._store.styles.intern(_CellStyle(bool(bold), bool(italic), bool(underline), fg, bg, align))
+
+    def get_style(self, style_id):
+        """Attributes of a style id as a dict"""
+        return self._store.styles.styles[style_id]._asdict()
+
+    def get_cell_style(self, row, col):
+        """Style id of view cell (row, col); 0 is the plain style"""
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise IndexError(f"Cell ({row},{col}) out of bounds (table size {self.rows}x{self.cols})")
+        return self._store.styles.get(self._data_row(row), col)
+
+    def set_cell_style(self, row, col, style):
+        """
+        Give view cell (row, col) a style
+
+        Args:
+            style: Style id from define_style(), or a dict of its arguments
+        """
+        self.set_range_style(row, col, row, col, style)
+
+    def set_range_style(self, start_row, start_col, end_row, end_col, style):
+        """
+        Give every view cell of a range the same style, as one undo step
+
+        Args:
+            start_row, start_col, end_row, end_col (int): Corners of the
+                range (inclusive)
+            style: Style id from define_style(), or a dict of its arguments
+        """
+        style_id = self.define_style(**style) if isinstance(style, dict) else style
+        if not 0 <= style_id < len(self._store.styles.styles):
+            raise ValueError(f"Unknown style id {style_id}")
+        top, bottom = sorted((start_row, end_row))
+        left, right = sorted((start_col, end_col))
+        if top < 0 or left < 0 or bottom >= self.rows or right >= self.cols:
+            raise IndexError("Style range exceeds grid dimensions")
+        self._commit_focused_edit()
+        self._push_undo(self._styles_state("Set cell style"))
+        rows = self._data_row_array(np.arange(top, bottom + 1))
+        for col in range(left, right + 1):
+            self._store.styles.set(rows, col, style_id)
+        self._restyle_cells(lambda row, col: top <= row <= bottom and left <= col <= right)
+
+    def update_style(self, style_id, **attributes):
+        """
+        Change a style, restyling every cell that uses it at once
+
+        Args:
+            style_id (int): Style to change (0 changes the plain style)
+            **attributes: define_style() arguments to change
+
+        Examples:
+            table.update_style(header, bg='#ffe699')
+        """
+        styles = self._store.styles
+        style = styles.styles[style_id]._replace(**attributes)
+        if style.align not in (None, 'left', 'center', 'right'):
+            raise ValueError(f"Unknown alignment {style.align!r} (use 'left', 'center' or 'right')")
+        styles.update(style_id, style)
+        font = styles.fonts.get(style_id)
+        if font is not None:
+            font.configure(**self._style_font_options(style))  # Every widget using it follows
+        self._restyle_cells(lambda row, col: self.cells[(row, col)]['style'] == style_id)
+
+    def _restyle_cells(self, wanted):
+        """Redraw the style of the drawn cells for which wanted(row, col) is true"""
+        styles = self._store.styles
+        for (row, col), cell in self.cells.items():
+            if not wanted(row, col):
+                continue
+            style_id = styles.get(self._data_row(row), col)
+            if style_id != cell['style']:
+                cell['style'] = style_id
+                cell['text'].config(font=self._style_font(style_id))
+            cell['text'].tag_configure('align', justify=styles.styles[style_id].align or 'left')
+            self._paint_cell(row, col)
+
+    def _style_font(self, style_id):
+        """Named font of a style, made from the theme font on first use"""
+        styles = self._store.styles
+        spec = self.current_theme['font']
+        if styles.font_spec != spec:
+            # Theme font changed: rebase every style font on it
+            styles.font_spec = spec
+            for font_id, font in styles.fonts.items():
+                font.configure(**self._style_font_options(styles.styles[font_id]))
+        font = styles.fonts.get(style_id)
+        if font is None:
+            font = styles.fonts[style_id] = Font(font=spec)
+            font.configure(**self._style_font_options(styles.styles[style_id]))
+        return font
+
+    def _style_font_options(self, style):
+        """Font.configure() options of a style over the theme font"""
+        base = Font(font=self.current_theme['font']).actual()
+        return {
+            'family': base.get('family'), 'size': base.get('size'),
+            'weight': 'bold' if style.bold else base.get('weight', 'normal'),
+            'slant': 'italic' if style.italic else base.get('slant', 'roman'),
+            'underline': 1 if style.underline else base.get('underline', 0),
+        }
+
+    def add_color_scale(self, column, colors=('#f8696b', '#ffeb84', '#63be7b')):
+        """
+        Shade the numeric cells of a column from the lowest value to the highest
+
+        Like all conditional formats, the rule is evaluated over the whole
+        column at once, cached until the column changes and applied only to
+        the cells in view; cells that are not numbers are left alone.
+
+        Args:
+            column: Column index or letter
+            colors: Two or more '#rrggbb' colours, for the lowest value
+                    through to the highest
+
+        Examples:
+            table.add_color_scale('C')
+            table.add_color_scale(2, colors=('#ffffff', '#63be7b'))
+        """
+        if len(colors) < 2:
+            raise ValueError("A colour scale needs at least two colours")
+        shades = _scale_colors(colors, _ConditionalFormats.SCALE_STEPS)
+        self._add_conditional_format(column, 'scale', {'colors': tuple(colors)},
+                                     [(shade, None) for shade in shades])
+
+    def add_threshold_format(self, column, equals=None, min_value=None, max_value=None,
+                             bg='#ffc7ce', fg='#9c0006'):
+        """
+        Color the cells of a column that match the given criteria
+
+        Criteria work as in set_filter() and are combined with AND.
+
+        Args:
+            column: Column index or letter
+            equals: Value to match (numbers match numerically, anything
+                    else matches the cell text exactly)
+            min_value (float): Numeric lower bound (inclusive)
+            max_value (float): Numeric upper bound (inclusive)
+            bg (str): Background of matching cells (None keeps it)
+            fg (str): Text color of matching cells (None keeps it)
+
+        Examples:
+            table.add_threshold_format('B', min_value=100)
+            table.add_threshold_format('D', equals='Late', bg=None, fg='red')
+        """
+        if equals is None and min_value is None and max_value is None:
+            raise ValueError("A threshold format needs equals, min_value or max_value")
+        options = {'equals': equals, 'min_value': min_value, 'max_value': max_value}
+        self._add_conditional_format(column, 'threshold', options, [(bg, fg)])
+
+    def highlight_duplicates(self, column, bg='#ffeb9c', fg='#9c5700'):
+        """
+        Color the cells of a column whose value appears more than once in it
+
+        Args:
+            column: Column index or letter
+            bg (str): Background of duplicated cells (None keeps it)
+            fg (str): Text color of duplicated cells (None keeps it)
+        """
+        self._add_conditional_format(column, 'duplicates', {}, [(bg, fg)])
+
+    def clear_conditional_formats(self, column=None):
+        """Remove the conditional formats of a column (default: of every column)"""
+        if self._formats is None:
+            return
+        self._formats.remove(None if column is None else
+                             _column_index(column) if isinstance(column, str) else column)
+        self._restyle_formats(every=True)
+
+    def get_conditional_formats(self):
+        """Return the conditional formats, in priority order, as a list of dicts"""
+        if self._formats is None:
+            return []
+        return [{'column': rule['col'], 'kind': rule['kind'], **rule['options'],
+                 **({} if rule['kind'] == 'scale' else dict(zip(('bg', 'fg'), rule['styles'][0])))}
+                for rule in self._formats.rules]
+
+    def _add_conditional_format(self, column, kind, options, styles):
+        """Register a rule after the existing ones (earlier rules win) and restyle the view"""
+        col = _column_index(column) if isinstance(column, str) else column
+        if not 0 <= col < self.cols:
+            raise IndexError(f"Column {col} out of bounds (table has {self.cols} columns)")
+        if self._formats is None:
+            self._formats = _ConditionalFormats(self._store)
+        self._formats.add(col, kind, options, styles)
+        self._restyle_formats()
+
+    def _cell_colors(self, row, col):
+        """(bg, fg) of view cell (row, col): conditional formats over the cell style over the theme"""
+        theme = self.current_theme
+        style = self._store.styles.styles[self._store.styles.get(self._data_row(row), col)]
+        bg = style.bg or (theme['even'] if row % 2 == 0 else theme['odd'])
+        fg = style.fg or theme['fg']
+        if self._formats is not None and col in self._formats.columns():
+            self._resolve_formulas(columns=(col,))
+            format_bg, format_fg = self._formats.style(self._data_row(row), col)
+            bg, fg = format_bg or bg, format_fg or fg
+        return bg, fg
+
+    def _paint_cell(self, row, col, selected=None):
+        """
+        Recolor a drawn cell from its style, conditional formats and selection
+
+        Args:
+            selected (bool): Paint as selected or not (default: as it is)
+        """
+        cell = self.cells.get((row, col))
+        if cell is None:
+            return
+        if selected is None:
+            selected = (row, col) in self.selected_cells
+        cell['colors'] = colors = self._cell_colors(row, col)
+        fill = self.current_theme['select_bg'] if selected else colors[0]
+        self.canvas.itemconfig(cell['rect'], fill=fill)
+        cell['text'].config(bg=fill, fg=colors[1])
+
+    def _restyle_formats(self, every=False):
         """
-        Insert a new row relative to current selection
-        
+        Recolor the cells in view whose conditional formats may have changed
+
         Args:
-            position: "above" or "below" current row
+            every (bool): Recheck every cell in view, not just the cells of
+                          columns changed since they were last styled
         """
-        self.save_state(f"Insert row {position}")
-        if not self.selected_cells:
+        if self._formats is None:
             return
-            
-        ref_row = min(r for r, c in self.selected_cells)
-        
-        # Calculate insertion index
-        insert_at = ref_row + 1 if position == "below" else ref_row
-        
-        # Update data structure
-        new_cells = {}
-        for (r, c), cell in sorted(self.cells.items()):
-            if r >= insert_at:
-                new_cells[(r + 1, c)] = cell
-                # Update merged cell references
-                if (r, c) in self.merged_cells:
-                    span_r, span_c = self.merged_cells.pop((r, c))
-                    self.merged_cells[(r + 1, c)] = (span_r, span_c)
-            else:
-                new_cells[(r, c)] = cell
-        
-        self.cells = new_cells
-        self.rows += 1
-        
-        # Recreate grid
-        self.create_grid()
-        self._update_canvas_size()
-        
-        # Adjust selection
-        new_selection = set()
-        for r, c in self.selected_cells:
-            new_r = r + 1 if r >= insert_at else r
-            new_selection.add((new_r, c))
-        self.selected_cells = new_selection
-        self.update_selection(*next(iter(new_selection)))
+        columns = self._formats.columns()
+        stale = {col for col in columns if self._formats.styled.get(col) != self._store.versions[col]}
+        if not every and not stale:
+            return
+        for (row, col), cell in self.cells.items():
+            if (every or col in stale) and self._cell_colors(row, col) != cell['colors']:
+                self._paint_cell(row, col)
+        for col in columns:
+            self._formats.styled[col] = self._store.versions[col]
 
-        # After modifying the grid:
-        self.row_heights.insert(insert_at, self.default_cell_height)
-        
-        self.refresh_grid()
+    def _remap_column_formulas(self, remap):
+        """Move column formulas after a column insert/delete/move; remap(col) returns the new col or None"""
+        for attribute in ('column_formulas', '_column_results'):
+            moved = {}
+            for col, value in getattr(self, attribute).items():
+                target = remap(col)
+                if target is not None:
+                    moved[target] = value
+            setattr(self, attribute, moved)
 
-    def delete_row(self):
-        """Delete currently selected row(s)"""
-        self.save_state("Delete row")
-        if not self.selected_cells:
-            return
-            
-        rows_to_delete = {r for r, c in self.selected_cells}
-        
-        # Update data structure
-        new_cells = {}
-        deleted_indices = set()
-        
-        for (r, c), cell in sorted(self.cells.items()):
-            if r in rows_to_delete:
-                deleted_indices.add(r)
+    def _remap_filter_columns(self, remap):
+        """Follow column inserts/deletes/moves; remap(col) returns the new col or None"""
+        filters = {}
+        for col, criteria in self._filters.items():
+            target = remap(col)
+            if target is not None:
+                filters[target] = criteria
+        self._filters = filters
+        indexes = {}
+        for (col, kind), index in self._indexes.items():
+            target = remap(col)
+            if target is None:
+                index.close()
                 continue
-                
-            new_r = r - sum(1 for dr in deleted_indices if dr < r)
-            new_cells[(new_r, c)] = cell
-            
-            # Update merged cell references
-            if (r, c) in self.merged_cells:
-                span_r, span_c = self.merged_cells.pop((r, c))
-                self.merged_cells[(new_r, c)] = (span_r, span_c)
-        
-        self.cells = new_cells
-        self.rows -= len(rows_to_delete)
-        
-        # Recreate grid
-        self.create_grid()
-        
-        # Clear selection
-        self.clear_selection()
-        # After modifying the grid:
-        for row in sorted(rows_to_delete, reverse=True):
-            del self.row_heights[row]
-        
-        self.refresh_grid()
+            index.col = target
+            indexes[(target, kind)] = index
+        self._indexes = indexes
+        if self._formats is not None:
+            self._formats.remap(remap)
 
-    def insert_column(self, position="right"):
+    def find(self, pattern, regex=False, case_sensitive=False, within=None):
         """
-        Insert new column relative to current selection
-        
+        Find the cells whose value contains a pattern
+
+        Plain-text searches go through an inverted value/token index that
+        is built on first use and kept in step with later edits, so repeated
+        searches (find-next) don't rescan the table. Regex searches use
+        vectorized pandas string matching over each column's distinct values.
+
         Args:
-            position: "left" or "right" of current column
+            pattern (str): Text (or regular expression) to look for
+            regex (bool): Treat pattern as a regular expression
+            case_sensitive (bool): Match case (default: ignore case)
+            within: Limit the search to a range, either (top, left, bottom,
+                    right) view coordinates or an "A1:C10" string
+
+        Returns:
+            list: (row, col) view coordinates of the matches, row by row
+
+        Examples:
+            table.find("total")
+            table.find(r"^\\d{4}-\\d{2}$", regex=True, within="B1:B500")
         """
-        self.save_state(f"Insert column {position}")
-        if not self.selected_cells:
-            return
-            
-        ref_col = min(c for r, c in self.selected_cells)
-        
-        # Calculate insertion index
-        insert_at = ref_col + 1 if position == "right" else ref_col
-        
-        # Update data structure
-        new_cells = {}
-        for (r, c), cell in sorted(self.cells.items()):
-            if c >= insert_at:
-                new_cells[(r, c + 1)] = cell
-                # Update merged cell references
-                if (r, c) in self.merged_cells:
-                    span_r, span_c = self.merged_cells.pop((r, c))
-                    self.merged_cells[(r, c + 1)] = (span_r, span_c)
+        top, left, bottom, right = self._range_bounds(within)
+        if not pattern or top > bottom or left > right:
+            return []
+        self._commit_focused_edit()
+        self._resolve_formulas()
+        if self._search_index is None:
+            self._search_index = _SearchIndex(self._store)
+
+        found_rows, found_cols = [], []
+        for col in range(left, right + 1):
+            rows = self._view_rows(self._search_index.find_rows(
+                col, pattern, regex, case_sensitive))
+            rows = rows[(rows >= top) & (rows <= bottom)]
+            found_rows.append(rows)
+            found_cols.append(np.full(len(rows), col))
+        rows = np.concatenate(found_rows)
+        cols = np.concatenate(found_cols)
+        order = np.lexsort((cols, rows))
+        matches = zip(rows[order].tolist(), cols[order].tolist())
+        covered = self._merge_covered_cells()
+        return [cell for cell in matches if cell not in covered]
+
+    def _merge_covered_cells(self):
+        """Cells hidden under a merge; they hold no value of their own"""
+        return {
+            (r, c)
+            for (mr, mc), (span_r, span_c) in self.merged_cells.items()
+            for r in range(mr, mr + span_r)
+            for c in range(mc, mc + span_c)
+            if (r, c) != (mr, mc)
+        }
+
+    def find_next(self, pattern, regex=False, case_sensitive=False,
+                  within=None, backwards=False):
+        """
+        Select the next (visible) match after the current cell
+
+        The search wraps around the end (or start, when backwards) of
+        the range. Each column's matches come from the search index; only
+        the first visible one past the current cell is looked at.
+
+        Returns:
+            tuple: (row, col) of the selected match, or None if nothing matches
+        """
+        top, left, bottom, right = self._range_bounds(within)
+        if not pattern or top > bottom or left > right:
+            return None
+        self._commit_focused_edit()
+        self._resolve_formulas()
+        if self._search_index is None:
+            self._search_index = _SearchIndex(self._store)
+
+        current_row, current_col = min(self.selected_cells) if self.selected_cells else (-1, self.cols)
+        visible = None if self._data_visible is None else self._visible_rows_mask()
+        covered = self._merge_covered_cells()
+        step = -1 if backwards else 1
+        ahead, wrapped = None, None
+        for col in range(left, right + 1):
+            rows = self._view_rows(self._search_index.find_rows(col, pattern, regex, case_sensitive))
+            if self._row_order is not None:
+                rows = np.sort(rows)
+            rows = rows[(rows >= top) & (rows <= bottom)]
+            if visible is not None:
+                rows = rows[visible[rows]]
+            # Split at the current cell; in this column a match on the current
+            # row lies ahead only when the column is past the current one
+            if backwards:
+                split = int(np.searchsorted(rows, current_row, side='left' if col >= current_col else 'right'))
+                parts = (rows[:split][::-1], rows[split:][::-1])
             else:
-                new_cells[(r, c)] = cell
-        
-        self.cells = new_cells
-        self.cols += 1
-        
-        # Recreate grid
-        self.create_grid()
-        self._update_canvas_size()
-        
-        # Adjust selection
-        new_selection = set()
-        for r, c in self.selected_cells:
-            new_c = c + 1 if c >= insert_at else c
-            new_selection.add((r, new_c))
-        self.selected_cells = new_selection
-        self.update_selection(*next(iter(new_selection)))
-        # After modifying the grid:
-        self.row_heights.insert(insert_at, self.default_cell_height)
-        
-        self.refresh_grid()
+                split = int(np.searchsorted(rows, current_row, side='right' if col <= current_col else 'left'))
+                parts = (rows[split:], rows[:split])
+            for i, part in enumerate(parts):
+                row = next((r for r in part.tolist() if (r, col) not in covered), None)
+                if row is None:
+                    continue
+                key = (row * step, col * step)
+                if i == 0 and (ahead is None or key < ahead):
+                    ahead = key
+                elif i == 1 and (wrapped is None or key < wrapped):
+                    wrapped = key
+                break
+        found = ahead if ahead is not None else wrapped
+        if found is None:
+            return None
+        row, col = found[0] * step, found[1] * step
+        self.update_selection(row, col)
+        self.auto_scroll_to_selection()
+        return (row, col)
 
-    def delete_column(self):
-        """Delete currently selected column(s)"""
-        self.save_state("Delete column")
-        if not self.selected_cells:
-            return
-            
-        cols_to_delete = {c for r, c in self.selected_cells}
-        
-        # Update data structure
-        new_cells = {}
-        deleted_indices = set()
-        
-        for (r, c), cell in sorted(self.cells.items()):
-            if c in cols_to_delete:
-                deleted_indices.add(c)
-                continue
-                
-            new_c = c - sum(1 for dc in deleted_indices if dc < c)
-            new_cells[(r, new_c)] = cell
-            
-            # Update merged cell references
-            if (r, c) in self.merged_cells:
-                span_r, span_c = self.merged_cells.pop((r, c))
-                self.merged_cells[(r, new_c)] = (span_r, span_c)
-        
-        self.cells = new_cells
-        self.cols -= len(cols_to_delete)
-        
-        # Recreate grid
+    def replace_all(self, pattern, replacement, regex=False,
+                    case_sensitive=False, within=None):
+        """
+        Replace a pattern in every matching cell as one undoable change
+
+        Formula cells are left alone. With regex=True the replacement may
+        use group references such as \\1.
+
+        Args:
+            pattern (str): Text (or regular expression) to replace
+            replacement (str): Replacement text
+            regex, case_sensitive, within: As for find()
+
+        Returns:
+            int: Number of cells changed
+        """
+        self._check_writable()
+        by_col = {}
+        for row, col in self.find(pattern, regex, case_sensitive, within):
+            data_row = self._data_row(row)
+            if (data_row, col) not in self.formulas:
+                by_col.setdefault(col, []).append(data_row)
+
+        if regex:
+            expression, substitute = pattern, replacement
+        else:
+            expression, substitute = re.escape(pattern), replacement.replace('\\', '\\\\')
+        changes = {}
+        for col, rows in by_col.items():
+            rows = np.array(rows, dtype=np.int64)
+            new, changed = _replace_values(self._store.column(col)[rows], expression,
+                                           substitute, case_sensitive)
+            if changed.any():
+                changes[col] = (rows[changed], new[changed])
+        if not changes:
+            return 0
+
+        self._push_undo(self._cells_state(
+            {col: rows for col, (rows, _) in changes.items()}, f"Replace '{pattern}'"))
+        self._write_cells(changes)
+        return sum(len(rows) for rows, _ in changes.values())
+
+    def _range_bounds(self, within):
+        """Normalize a range argument to (top, left, bottom, right) view coordinates"""
+        if within is None:
+            return 0, 0, self.rows - 1, self.cols - 1
+        if isinstance(within, str):
+            match = re.fullmatch(r'([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?', within.strip().upper())
+            if not match:
+                raise ValueError(f"Invalid range: {within!r}")
+            first_col, first_row, last_col, last_row = match.groups()
+            if last_col is None:
+                last_col, last_row = first_col, first_row
+            top, bottom = sorted((int(first_row) - 1, int(last_row) - 1))
+            left, right = sorted((_column_index(first_col), _column_index(last_col)))
+        else:
+            top, left, bottom, right = within
+        return (max(0, top), max(0, left),
+                min(self.rows - 1, bottom), min(self.cols - 1, right))
+
+    def _visible_rows_mask(self, start=0, stop=None):
+        """Bool array over view rows start..stop: False for rows hidden by a filter"""
+        stop = self.rows if stop is None else stop
+        if self._data_visible is None:
+            return np.ones(max(0, stop - start), dtype=bool)
+        if self._row_order is None:
+            return self._data_visible[start:stop]
+        return self._data_visible[self._row_order[start:stop]]
+
+    def _is_row_visible(self, row):
+        """True if view row `row` is not hidden by a filter"""
+        return self._data_visible is None or bool(self._data_visible[self._data_row(row)])
+
+    def _next_visible_row(self, row, step, default=None):
+        """First visible view row from `row` onwards in direction `step` (+1/-1)"""
+        if self._data_visible is None:
+            return row if 0 <= row < self.rows else default
+        visible = self._visible_rows_mask()
+        if step > 0:
+            candidates = np.flatnonzero(visible[row:])
+            return row + int(candidates[0]) if len(candidates) else default
+        candidates = np.flatnonzero(visible[:row + 1])
+        return int(candidates[-1]) if len(candidates) else default
+
+    def set_column_width(self, column, width):
+        """
+        Set the width of one column in pixels
+
+        Args:
+            column: Column index or letter ("A", "B", ...)
+            width (int): New width (None goes back to cell_width)
+        """
+        col = _column_index(column) if isinstance(column, str) else column
+        if not 0 <= col < self.cols:
+            raise IndexError(f"Column {col} out of bounds (table has {self.cols} columns)")
+        self.col_widths[col] = self.cell_width if width is None else int(width)
+        self._journal_layout_soon()
         self.create_grid()
-        
-        # Clear selection
-        self.clear_selection()
-        for row in sorted(rows_to_delete, reverse=True):
-            del self.row_heights[row]
-        
-        self.refresh_grid()
+        self._update_canvas_size()
 
-    def move_row(self, direction="down"):
+    def auto_fit_columns(self, columns=None, sample=1000, min_width=40, max_width=400):
         """
-        Move selected row up or down
-        
+        Size columns to fit their content
+
+        Widths are estimated from at most `sample` evenly spaced rows plus
+        the rows in view, measuring only the longest distinct values, and
+        measured strings are memoized - so fitting a column costs the same
+        for a thousand rows as for a million.
+
         Args:
-            direction: "up" or "down"
+            columns: Column indexes or letters (default: every column)
+            sample (int): Rows read per column
+            min_width, max_width (int): Bounds for the new widths
+
+        Returns:
+            list: The new widths, in the order of `columns`
         """
-        self.save_state(f"Move row {direction}")
-        if not self.selected_cells:
-            return
-            
-        rows = {r for r, c in self.selected_cells}
-        if len(rows) != 1:
-            messagebox.showwarning("Move Row", "Select exactly one row to move")
-            return
-            
-        row = rows.pop()
-        new_pos = row + 1 if direction == "down" else row - 1
-        
-        # Validate new position
-        if new_pos < 0 or new_pos >= self.rows:
-            return
-            
-        # Swap row data
-        for c in range(self.cols):
-            if (row, c) in self.cells and (new_pos, c) in self.cells:
-                # Swap text content
-                temp = self.cells[(row, c)]['text'].get("1.0", "end-1c")
-                self.cells[(row, c)]['text'].delete("1.0", "end")
-                self.cells[(row, c)]['text'].insert("1.0", 
-                    self.cells[(new_pos, c)]['text'].get("1.0", "end-1c"))
-                self.cells[(new_pos, c)]['text'].delete("1.0", "end")
-                self.cells[(new_pos, c)]['text'].insert("1.0", temp)
-                
-                # Swap merge status if needed
-                if (row, c) in self.merged_cells:
-                    self.merged_cells[(new_pos, c)] = self.merged_cells.pop((row, c))
-                elif (new_pos, c) in self.merged_cells:
-                    self.merged_cells[(row, c)] = self.merged_cells.pop((new_pos, c))
-        
-        # Update selection
-        self.clear_selection()
-        for c in range(self.cols):
-            self.select_cell(new_pos, c)
-        
-        self.update_selection(new_pos, 0)
+        if columns is None:
+            columns = range(self.cols)
+        elif not isinstance(columns, (list, tuple, range)):
+            columns = [columns]
+        columns = [_column_index(c) if isinstance(c, str) else c for c in columns]
+        for col in columns:
+            if not 0 <= col < self.cols:
+                raise IndexError(f"Column {col} out of bounds (table has {self.cols} columns)")
+        self._commit_focused_edit()
 
-        # After moving:
-        self.row_heights[row], self.row_heights[new_pos] = self.row_heights[new_pos], self.row_heights[row]
-        self.refresh_grid()
+        # Rows in view always count; paged stores are only read there
+        top, bottom = self._viewport[:2] if self._viewport else (0, min(self.rows, 1) - 1)
+        in_view = self._data_row_array(np.arange(top, bottom + 1))
+        if self._store.paged or self._store.rows <= sample:
+            rows = in_view if self._store.paged else np.arange(self._store.rows)
+        else:
+            spread = np.linspace(0, self._store.rows - 1, sample).astype(np.int64)
+            rows = np.unique(np.concatenate((spread, in_view)))
+
+        padding = self._text_width("MM")
+        widths = []
+        for col in columns:
+            longest = self._longest_lines(self._store.values(rows, col))
+            if self.spreadsheet_mode:
+                longest.append(_column_letter(col))
+            content = max((self._text_width(text) for text in longest), default=0)
+            width = min(max(content + padding, min_width), max_width)
+            self.col_widths[col] = width
+            widths.append(width)
+        self._journal_layout_soon()
+        self.create_grid()
+        self._update_canvas_size()
+        return widths
+
+    @staticmethod
+    def _longest_lines(values, count=8):
+        """The `count` longest distinct lines (by characters) among some values"""
+        lines = pd.Series(values, dtype=object).astype(str).str.split('\n').explode()
+        lines = pd.Series(lines.unique(), dtype=object)
+        if len(lines) > count:
+            lines = lines.iloc[np.argpartition(-lines.str.len().to_numpy(), count)[:count]]
+        return lines.tolist()
+
+    def _text_width(self, text):
+        """Pixel width of a line of text in the cell font, memoized per font"""
+        spec = self.current_theme['font']
+        key = (spec, text)
+        width = self._text_widths.get(key)
+        if width is None:
+            font = self._cell_fonts.get(spec)
+            if font is None:
+                font = self._cell_fonts[spec] = Font(font=spec)
+            if len(self._text_widths) >= 65536:
+                self._text_widths.clear()
+            width = self._text_widths[key] = font.measure(text)
+        return width
 
     def set_row_height(self, row, height):
         """Manually set row height"""
         if 0 <= row < self.rows:
             self.row_heights[row] = height
+            self._journal_layout_soon()
             self.refresh_grid()
 
     def refresh_grid(self):
         """Redraw grid while preserving content and selection"""
-        content = {k: v['text'].get("1.0", "end-1c") 
-                  for k, v in self.cells.items()}
+        self._refresh_column_formulas()
         selection = list(self.selected_cells)
         
         self.create_grid()
         
-        # Restore content
-        for (r, c), text in content.items():
-            if (r, c) in self.cells:
-                self.cells[(r, c)]['text'].insert("1.0", text)
-        
         # Restore selection
         self.clear_selection()
         for r, c in selection:
-            if (r, c) in self.cells:
-                self.select_cell(r, c)
+            self.select_cell(r, c)
 
     def move_column(self, direction="right"):
         """
@@ -1363,6 +6224,7 @@ class Table(ttk.Frame):
         Args:
             direction: "left" or "right"
         """
+        self._check_writable(structure=True)
         self.save_state(f"Move column {direction}")
         if not self.selected_cells:
             return
@@ -1380,21 +6242,19 @@ class Table(ttk.Frame):
             return
             
         # Swap column data
+        self._store.swap_cols(col, new_pos)
+        self.col_widths.swap(col, new_pos)
+        swap = {col: new_pos, new_pos: col}
+        self._remap_formula_cells(lambda r, c: (r, swap.get(c, c)))
+        self._remap_filter_columns(lambda c: swap.get(c, c))
+        self._remap_column_formulas(lambda c: swap.get(c, c))
         for r in range(self.rows):
-            if (r, col) in self.cells and (r, new_pos) in self.cells:
-                # Swap text content
-                temp = self.cells[(r, col)]['text'].get("1.0", "end-1c")
-                self.cells[(r, col)]['text'].delete("1.0", "end")
-                self.cells[(r, col)]['text'].insert("1.0", 
-                    self.cells[(r, new_pos)]['text'].get("1.0", "end-1c"))
-                self.cells[(r, new_pos)]['text'].delete("1.0", "end")
-                self.cells[(r, new_pos)]['text'].insert("1.0", temp)
-                
-                # Swap merge status if needed
-                if (r, col) in self.merged_cells:
-                    self.merged_cells[(r, new_pos)] = self.merged_cells.pop((r, col))
-                elif (r, new_pos) in self.merged_cells:
-                    self.merged_cells[(r, col)] = self.merged_cells.pop((r, new_pos))
+            # Swap merge status if needed
+            if (r, col) in self.merged_cells:
+                self.merged_cells[(r, new_pos)] = self.merged_cells.pop((r, col))
+            elif (r, new_pos) in self.merged_cells:
+                self.merged_cells[(r, col)] = self.merged_cells.pop((r, new_pos))
+        self.refresh_grid()
         
         # Update selection
         self.clear_selection()
@@ -1402,8 +6262,6 @@ class Table(ttk.Frame):
             self.select_cell(r, new_pos)
         
         self.update_selection(0, new_pos)
-        # After moving:
-        self.refresh_grid()
 
 
     def split_cell(self, row, col, horizontal=True, vertical=True):
@@ -1442,11 +6300,6 @@ class Table(ttk.Frame):
         if new_span_rows == span_rows and new_span_cols == span_cols:
             return False
         
-        # Save the cell content
-        cell_content = ""
-        if (row, col) in self.cells:
-            cell_content = self.cells[(row, col)]['text'].get("1.0", "end-1c")
-        
         # Remove the merged cell
         del self.merged_cells[(row, col)]
         
@@ -1458,13 +6311,9 @@ class Table(ttk.Frame):
             # Create new merged cell with reduced span
             self.merged_cells[(row, col)] = (new_span_rows, new_span_cols)
         
-        # Recreate the grid
+        # Recreate the grid (content comes back from the store)
         self.create_grid()
         
-        # Restore content to the original cell
-        if (row, col) in self.cells:
-            self.cells[(row, col)]['text'].insert("1.0", cell_content)
-        
         # Update selection to the original cell
         self.update_selection(row, col)
         return True
@@ -1511,68 +6360,188 @@ class Table(ttk.Frame):
 
     def save_state(self, description=""):
         """Save current table state to undo stack"""
+        self._push_undo(self._capture_state(description))
+
+    def _push_undo(self, state):
+        """Append an undo entry, dropping the oldest past max_undo_steps"""
         if len(self.undo_stack) >= self.max_undo_steps:
             self.undo_stack.pop(0)
-            
-        state = {
-            'cells': self._get_cell_contents(),
+        self.undo_stack.append(state)
+        self.redo_stack = []  # Clear redo stack on new action
+        self._journal_layout_soon()
+
+    def _capture_state(self, description="", like=None):
+        """
+        Capture the table state for the undo/redo stacks
+        
+        Args:
+            description (str): Label for the entry
+            like (dict): Entry being undone/redone; lightweight entries are
+                         answered with an entry of the same kind
+        """
+        if like is not None and like.get('kind') == 'row_order':
+            return self._row_order_state(description)
+        if like is not None and like.get('kind') == 'cells':
+            return self._cells_state(
+                {col: rows for col, (rows, _) in like['cells'].items()}, description)
+        if like is not None and like.get('kind') == 'styles':
+            return self._styles_state(description)
+        return {
+            'data': self._store.snapshot(),
+            'styles': self._store.styles.snapshot(),
+            'row_order': self._row_order,
+            'formulas': dict(self.formulas),
+            'calculated': dict(self.calculated_values),
+            'dirty': set(self._dirty_formulas),
+            'column_formulas': (dict(self.column_formulas), dict(self._column_results)),
             'merged': dict(self.merged_cells),
+            'row_heights': self.row_heights.copy(),
+            'col_widths': self.col_widths.copy(),
             'dimensions': (self.rows, self.cols),
             'selection': list(self.selected_cells),
             'description': description
         }
-        self.undo_stack.append(state)
-        self.redo_stack = []  # Clear redo stack on new action
+
+    def _row_order_state(self, description=""):
+        """Lightweight undo entry that only records the row order"""
+        return {
+            'kind': 'row_order',
+            'row_order': self._row_order,
+            'merged': dict(self.merged_cells),
+            'row_heights': self.row_heights.copy(),
+            'selection': list(self.selected_cells),
+            'description': description
+        }
+
+    def _styles_state(self, description=""):
+        """Lightweight undo entry that records the cell styles"""
+        return {
+            'kind': 'styles',
+            'styles': self._store.styles.snapshot(),
+            'selection': list(self.selected_cells),
+            'description': description
+        }
+
+    def _cells_state(self, cells, description=""):
+        """
+        Lightweight undo entry that records the current value of some cells
+
+        Args:
+            cells (dict): {col: data rows} about to be overwritten
+        """
+        values = {}
+        formulas = {}
+        for col, rows in cells.items():
+            rows = np.asarray(rows, dtype=np.int64)
+            values[col] = (rows, self._store.values(rows, col).copy())
+        if self.formulas:
+            touched = {col: set(rows.tolist()) for col, (rows, _) in values.items()}
+            formulas = {
+                (r, c): formula for (r, c), formula in self.formulas.items()
+                if r in touched.get(c, ())
+            }
+        return {
+            'kind': 'cells',
+            'cells': values,
+            'formulas': formulas,
+            'selection': list(self.selected_cells),
+            'description': description
+        }
+
+    def _write_cells(self, changes, formulas=None):
+        """
+        Write a batch of values straight to the store and refresh once
+
+        Args:
+            changes (dict): {col: (data rows, values)}
+            formulas (dict): Formulas for the written cells; written cells
+                             missing from it lose their formula
+        """
+        touched = {}
+        for col, (rows, values) in changes.items():
+            self._store.set_many(rows, col, values)
+            touched[col] = np.asarray(rows, dtype=np.int64)
+
+        formulas = formulas or {}
+        if self.formulas:
+            for col, rows in touched.items():
+                for row in rows.tolist():
+                    if (row, col) in self.formulas:
+                        del self.formulas[(row, col)]
+                        self.calculated_values.pop((row, col), None)
+                        self._formulas_version += 1
+        if formulas:
+            self.formulas.update(formulas)
+            self._formulas_version += 1
+
+        for (row, col) in self.cells:
+            if col in touched:
+                self._render_cell(row, col, truncate=(row, col) not in self.selected_cells)
+        self._recalculate_written(touched, formulas)
 
     def _get_cell_contents(self):
         """Capture current cell contents"""
+        self._commit_focused_edit()
         return {
-            (r, c): cell['text'].get("1.0", "end-1c")
-            for (r, c), cell in self.cells.items()
+            (r, c): self._store.get(self._data_row(r), c)
+            for r in range(self.rows)
+            for c in range(self.cols)
         }
 
     def _restore_state(self, state):
         """Restore table state from saved state"""
-        # Restore dimensions if changed
-        if (self.rows, self.cols) != state['dimensions']:
+        if state.get('kind') == 'cells':
+            self._write_cells(state['cells'], state['formulas'])
+            self.clear_selection()
+            for r, c in state['selection']:
+                self.select_cell(r, c)
+            return
+        if state.get('kind') == 'styles':
+            self._store.styles.restore(state['styles'])
+            self.refresh_grid()
+            return
+        if state.get('kind') == 'row_order':
+            self._set_row_order(state['row_order'])
+            self.row_heights = state['row_heights'].copy()
+        else:
+            # Restore dimensions and cell contents
             self.rows, self.cols = state['dimensions']
-        
-        # Restore cell contents
-        for (r, c), content in state['cells'].items():
-            if (r, c) in self.cells:
-                self.cells[(r, c)]['text'].delete("1.0", "end")
-                self.cells[(r, c)]['text'].insert("1.0", content)
+            self._store.restore(state['data'])
+            self._store.styles.restore(state['styles'])
+            self._set_row_order(state['row_order'])
+            self.formulas = dict(state['formulas'])
+            self._formulas_version += 1
+            self.calculated_values = dict(state['calculated'])
+            self._dirty_formulas = set(state['dirty'])
+            self.column_formulas, self._column_results = map(dict, state['column_formulas'])
+            self.row_heights = state['row_heights'].copy()
+            self.col_widths = state['col_widths'].copy()
         
         # Restore merged cells
         self.merged_cells = dict(state['merged'])
+        if self._data_visible is not None and len(self._data_visible) != self._store.rows:
+            self._data_visible = self._compute_visible_rows()
         
-        # Rebuild grid if dimensions changed
-        if (self.rows, self.cols) != state['dimensions']:
-            self.create_grid()
+        # Rebuild grid
+        self.create_grid()
+        self._update_canvas_size()
         
         # Restore selection
         self.clear_selection()
         for r, c in state['selection']:
-            if (r, c) in self.cells:
-                self.select_cell(r, c)
+            self.select_cell(r, c)
 
     def undo(self, event=None):
         """Undo the last operation"""
         if not self.undo_stack:
             return
-            
+        self._commit_focused_edit()
+        
         # Save current state to redo stack
-        current_state = {
-            'cells': self._get_cell_contents(),
-            'merged': dict(self.merged_cells),
-            'dimensions': (self.rows, self.cols),
-            'selection': list(self.selected_cells),
-            'description': "Before undo"
-        }
-        self.redo_stack.append(current_state)
+        state = self.undo_stack.pop()
+        self.redo_stack.append(self._capture_state("Before undo", like=state))
         
         # Restore previous state
-        state = self.undo_stack.pop()
         self._restore_state(state)
         
         return "break"  # Prevent default binding
@@ -1581,19 +6550,13 @@ class Table(ttk.Frame):
         """Redo the last undone operation"""
         if not self.redo_stack:
             return
-            
+        self._commit_focused_edit()
+        
         # Save current state to undo stack
-        current_state = {
-            'cells': self._get_cell_contents(),
-            'merged': dict(self.merged_cells),
-            'dimensions': (self.rows, self.cols),
-            'selection': list(self.selected_cells),
-            'description': "Before redo"
-        }
-        self.undo_stack.append(current_state)
+        state = self.redo_stack.pop()
+        self.undo_stack.append(self._capture_state("Before redo", like=state))
         
         # Restore next state
-        state = self.redo_stack.pop()
         self._restore_state(state)
         
         return "break"  # Prevent default binding
@@ -1604,7 +6567,7 @@ class Table(ttk.Frame):
         """Configure canvas scrolling settings"""
         self.configure(
             scrollregion=(0, 0, 
-                         self.cols * self.cell_width, 
+                         self.col_widths.total(), 
                          self.rows * self.cell_height),
             highlightthickness=0
         )
@@ -1614,62 +6577,37 @@ class Table(ttk.Frame):
 
     def resize_grid(self, new_rows=None, new_cols=None):
         """Resize grid and update references"""
+        if (new_rows or self.rows, new_cols or self.cols) != (self.rows, self.cols):
+            self._check_writable(structure=True)
         old_rows, old_cols = self.rows, self.cols
         self.rows = new_rows if new_rows else self.rows
         self.cols = new_cols if new_cols else self.cols
         
-        # Update headers if in spreadsheet mode
-        if self.spreadsheet_mode:
-            # Update column headers
-            for col, header in enumerate(self.col_headers):
-                if col < self.cols:
-                    header.config(text=chr(65 + col))
-                else:
-                    header.grid_remove()
-            
-            # Add/remove column headers
-            while len(self.col_headers) < self.cols:
-                col = len(self.col_headers)
-                header = ttk.Label(
-                    self.grid_frame,
-                    text=chr(65 + col),
-                    width=self.cell_width//7,
-                    anchor='center',
-                    style='Header.TLabel'
-                )
-                header.grid(row=0, column=col+1, sticky='nsew')
-                self.col_headers.append(header)
-            
-            # Update row headers
-            for row, header in enumerate(self.row_headers):
-                if row < self.rows:
-                    header.config(text=str(row + 1))
-                else:
-                    header.grid_remove()
-            
-            # Add/remove row headers
-            while len(self.row_headers) < self.rows:
-                row = len(self.row_headers)
-                header = ttk.Label(
-                    self.grid_frame,
-                    text=str(row + 1),
-                    width=4,
-                    anchor='e',
-                    style='Header.TLabel'
-                )
-                header.grid(row=row+1, column=0, sticky='nsew')
-                self.row_headers.append(header)
+        # Resize the stored data, keeping any sorted view consistent
+        if self.rows > old_rows:
+            self._insert_data_rows(old_rows, self.rows - old_rows)
+        elif self.rows < old_rows:
+            self._delete_data_rows(range(self.rows, old_rows))
+        self._store.resize(self._store.rows, self.cols)
+        self._update_reference_headers()
         
         # Update main grid
         self.create_grid()
-        
+
         # Update canvas size and scroll region
         self._update_canvas_size()
 
+    def _update_reference_headers(self):
+        """Match the spreadsheet row/column headers to the table size"""
+        if self.spreadsheet_mode:
+            # Row numbers may have gained a digit (the headers themselves
+            # are redrawn with the cells)
+            self.row_header_canvas.configure(width=self._row_header_width())
+        
     def _update_canvas_size(self):
         """Update canvas dimensions and scroll region"""
-        total_width = self.cols * self.cell_width
-        total_height = sum(self.row_heights[:self.rows])  # Sum only active row heights
+        total_width = self.col_widths.total()
+        total_height = self._total_height()  # Displayed rows only
         
         # Update canvas dimensions
         self.canvas.config(
@@ -1705,225 +6643,1194 @@ class Table(ttk.Frame):
 
     def auto_fit_row(self, row):
         """Optional manual fit-to-content"""
-        max_lines = 1
+        if 0 <= row < self.rows:
+            self.auto_fit_rows([row])
+
+    def auto_fit_rows(self, rows=None):
+        """
+        Fit row heights to the number of text lines in each row
+
+        Line counts are computed column by column from the stored values
+        and applied in one pass, followed by a single redraw.
+
+        Args:
+            rows: View rows to fit (default: every row)
+        """
+        self._commit_focused_edit()
+        if rows is None:
+            view_rows = np.arange(self.rows)
+        else:
+            view_rows = np.unique(np.asarray(list(rows), dtype=np.int64))
+            view_rows = view_rows[(view_rows >= 0) & (view_rows < self.rows)]
+        data_rows = self._data_row_array(view_rows)
+        lines = np.ones(len(view_rows), dtype=np.int64)
         for col in range(self.cols):
-            if (row, col) in self.cells:
-                text = self.cells[(row, col)]['text'].get("1.0", "end-1c")
-                lines = text.count('\n') + 1
-                max_lines = max(max_lines, lines)
-        self.set_row_height(row, self.default_cell_height * max_lines)
+            np.maximum(lines, self._store.line_counts(data_rows, col), out=lines)
+        self.row_heights.set_many(view_rows, self.default_cell_height * lines)
+        self._journal_layout_soon()
+        self.refresh_grid()
+        self._update_canvas_size()
 
     def configure_scroll(self):
         """Configure canvas scrolling settings"""
         self.canvas.configure(
             scrollregion=(0, 0, 
-                         self.cols * self.cell_width, 
-                         sum(self.row_heights)),
+                         self.col_widths.total(), 
+                         self._total_height()),
             highlightthickness=0
         )
 
     def _update_dependencies(self, changed_row, changed_col):
         """Recalculate cells that depend on the changed cell"""
-        for (row, col), formula in self.formulas.items():
-            if f"{chr(65+changed_col)}{changed_row+1}" in formula:
-                self._evaluate_cell(row, col)
-
-    def _init_cell_references(self):
-        """Initialize A1, B1 style references"""
-        self.cell_references = {}
-        for row in range(self.rows):
-            for col in range(self.cols):
-                col_letter = chr(65 + col)
-                self.cell_references[f"{col_letter}{row+1}"] = (row, col)
+        if self.lazy_recalc:
+            self._mark_dependents_dirty(changed_row, changed_col)
+            return
+        for (row, col), formula in list(self.formulas.items()):
+            if (row, col) == (changed_row, changed_col):
+                continue
+            for r1, c1, r2, c2 in _formula_ranges(formula):
+                if r1 <= changed_row <= r2 and c1 <= changed_col <= c2:
+                    self._evaluate_cell(row, col)
+                    break
+
+    def _cell_reference(self, ref):
+        """(row, col) of an A1 reference inside the table, or None"""
+        cell = _parse_reference(ref)
+        if cell is None or cell[0] >= self.rows or cell[1] >= self.cols:
+            return None
+        return cell
 
     def _get_cell_value(self, ref):
         """Get value from A1 reference with better type handling"""
-        if ref in self.cell_references:
-            row, col = self.cell_references[ref]
-            if (row, col) in self.calculated_values:
-                return self.calculated_values[(row, col)]
-            elif (row, col) in self.cells:
-                value = self.cells[(row, col)]['text'].get("1.0", "end-1c")
-                try:
-                    return float(value) if value else 0
-                except ValueError:
-                    return value
+        cell = self._cell_reference(ref)
+        if cell is not None:
+            return self._formula_value(*cell)
+        return 0
+
+    def _formula_value(self, row, col):
+        """Value of data cell (row, col) as seen by formulas: number, 0 when empty, else text"""
+        if (row, col) in self.calculated_values:
+            return self.calculated_values[(row, col)]
+        elif 0 <= row < self.rows and 0 <= col < self.cols:
+            value = self._store.get(row, col)
+            try:
+                return float(value) if value else 0
+            except ValueError:
+                return value
         return 0
 
     def _parse_range(self, range_str):
         """Parse A1:B2 style ranges"""
         if ':' in range_str:
             start, end = range_str.split(':')
-            start_row, start_col = self.cell_references.get(start, (0, 0))
-            end_row, end_col = self.cell_references.get(end, (0, 0))
+            start_row, start_col = self._cell_reference(start) or (0, 0)
+            end_row, end_col = self._cell_reference(end) or (0, 0)
             return [(r, c) 
                     for r in range(start_row, end_row+1)
                     for c in range(start_col, end_col+1)]
         else:
-            return [self.cell_references.get(range_str, (0, 0))]
+            return [self._cell_reference(range_str) or (0, 0)]
 
     def _calculate_formula(self, formula, trigger_cell):
         """Evaluate formula with basic operations"""
         if not formula.startswith('='):
             return formula
-        
+        row, col = trigger_cell
         try:
-            # Extract formula parts
-            expr = formula[1:].strip().upper()
-            
-            # Handle SUM(A1:A5) style
-            if expr.startswith('SUM(') and expr.endswith(')'):
-                range_str = expr[4:-1].strip()
-                cells = self._parse_range(range_str)
-                values = []
-                for r, c in cells:
-                    ref = f"{chr(65+c)}{r+1}"
-                    value = self._get_cell_value(ref)
-                    if isinstance(value, (int, float)):
-                        values.append(value)
-                return sum(values) if values else 0
-            
-            # Handle AVERAGE(A1:A5)
-            elif expr.startswith('AVG(') and expr.endswith(')'):
-                range_str = expr[4:-1].strip()
-                cells = self._parse_range(range_str)
-                values = []
-                for r, c in cells:
-                    ref = f"{chr(65+c)}{r+1}"
-                    value = self._get_cell_value(ref)
-                    if isinstance(value, (int, float)):
-                        values.append(value)
-                return sum(values)/len(values) if values else 0
-            
-            # Handle basic math (A1+B2*C3)
-            else:
-                # Replace references with values
-                for ref in sorted(self.cell_references.keys(), key=len, reverse=True):
-                    if ref in expr:
-                        value = self._get_cell_value(ref)
-                        if isinstance(value, str):
-                            # Quote strings for evaluation
-                            expr = expr.replace(ref, f'"{value}"')
-                        else:
-                            expr = expr.replace(ref, str(value))
-                
-                # Safe evaluation with limited operations
-                allowed_names = {
-                    'sum': sum,
-                    'avg': lambda x: sum(x)/len(x) if x else 0,
-                    'sqrt': math.sqrt,
-                    'math': math
-                }
-                code = compile(expr, '<string>', 'eval')
-                for name in code.co_names:
-                    if name not in allowed_names:
-                        raise NameError(f"Use of {name} not allowed")
-                return eval(code, {'__builtins__': {}}, allowed_names)
-        
+            code = _compile_template(self._cell_template(trigger_cell, formula))
+            namespace = dict(_FORMULA_FUNCTIONS)
+            namespace.update(_ref=self._formula_value, _range=self._formula_range, _row=row, _col=col,
+                             _sheet_ref=self._sheet_value, _sheet_range=self._sheet_range)
+            with np.errstate(all='ignore'):
+                return _scalar(eval(code, {'__builtins__': {}}, namespace))
         except Exception as e:
             return f"#ERROR: {str(e)}"
 
+    def _evaluate_level(self, cells):
+        """Evaluate formula cells that don't read each other, a shared template at a time"""
+        groups = {}
+        for row, col in cells:
+            formula = self.formulas.get((row, col), "")
+            template = self._cell_template((row, col), formula) if formula.startswith('=') else None
+            groups.setdefault(template, []).append((row, col))
+        for template, group in groups.items():
+            if template is not None and len(group) >= 64:
+                group = self._evaluate_batch(template, group)
+            for row, col in group:
+                self._evaluate_cell(row, col, propagate=False)
+
+    def _evaluate_batch(self, template, cells):
+        """
+        Evaluate one template for many cells as a single array expression
+
+        Only templates made of references, arithmetic and element-wise
+        functions qualify. Cells whose inputs hold text, or whose result
+        isn't a finite number or True/False, are left to the cell-by-cell
+        evaluation so both give the same values.
+
+        Returns:
+            list: The cells still to be evaluated one by one
+        """
+        try:
+            code = _compile_template(template)
+        except Exception:
+            return cells
+        if not _BATCH_NAMES.issuperset(code.co_names):
+            return cells
+
+        class TextInput(Exception):
+            pass
+
+        def get_values(rows, cols):
+            rows, cols = np.broadcast_arrays(rows, cols)
+            values = np.zeros(rows.shape)
+            inside = (rows >= 0) & (rows < self._store.rows) & (cols >= 0) & (cols < self.cols)
+            for col in np.unique(cols[inside]).tolist():
+                at = np.flatnonzero(inside & (cols == col))
+                numbers = self._store.numeric(col)[rows[at]]
+                missing = np.isnan(numbers)
+                if missing.any() and not self._store.blank(col)[rows[at[missing]]].all():
+                    raise TextInput  # Text reads differently cell by cell
+                values[at] = np.where(missing, 0, numbers)
+            return values
+
+        rows = np.array([row for row, _ in cells], dtype=np.int64)
+        cols = np.array([col for _, col in cells], dtype=np.int64)
+        namespace = dict(_FORMULA_FUNCTIONS)
+        namespace.update(_ref=get_values, _row=rows, _col=cols)
+        try:
+            with np.errstate(all='ignore'):
+                result = np.asarray(eval(code, {'__builtins__': {}}, namespace))
+        except Exception:
+            return cells
+        if result.shape != rows.shape or result.dtype.kind not in 'fb':
+            return cells
+
+        done = np.isfinite(result) if result.dtype.kind == 'f' else np.ones(len(cells), dtype=bool)
+        results = result.tolist()
+        for col in np.unique(cols[done]).tolist():
+            at = np.flatnonzero(done & (cols == col))
+            self._store.set_many(rows[at], col, [str(results[i]) for i in at.tolist()])
+        for i in np.flatnonzero(done).tolist():
+            self.calculated_values[cells[i]] = results[i]
+        written = {cells[i] for i in np.flatnonzero(done).tolist()}
+        for row, col in self.cells:
+            if (self._data_row(row), col) in written:
+                self._render_cell(row, col, truncate=(row, col) not in self.selected_cells)
+        return [cells[i] for i in np.flatnonzero(~done).tolist()]
+
+    def _formula_range(self, r1, c1, r2, c2):
+        """Data cells r1..r2 x c1..c2 as a _Range, read as column slices"""
+        r2, c2 = min(r2, self._store.rows - 1), min(c2, self.cols - 1)
+        if r2 < r1 or c2 < c1:
+            return _Range(np.empty((0, 0)), np.empty((0, 0), dtype=object))
+        # Formula results are stored as text, so the store already holds them
+        numbers = [self._store.numeric(col)[r1:r2 + 1] for col in range(c1, c2 + 1)]
+        numbers = numbers[0][:, None] if len(numbers) == 1 else np.column_stack(numbers)
+        rows = np.arange(r1, r2 + 1)
+        return _Range(numbers, lambda: np.column_stack(
+            [self._store.values(rows, col) for col in range(c1, c2 + 1)]))
+
+    def _sheet_value(self, name, row, col):
+        """Value of cell (row, col) of another sheet, as seen by formulas"""
+        if self.workbook is None:
+            raise NameError(f"No sheet named {name}")
+        return self.workbook._read(name, row, col)
+
+    def _sheet_range(self, name, r1, c1, r2, c2):
+        """Cells r1..r2 x c1..c2 of another sheet as a _Range"""
+        if self.workbook is None:
+            raise NameError(f"No sheet named {name}")
+        return self.workbook._read_range(name, r1, c1, r2, c2)
+
+    def _formula_levels(self):
+        """
+        Split the formula dependency DAG into evaluation levels
+
+        Every formula in a level only depends on plain cells or on formulas
+        in earlier levels, so the cells of one level can be evaluated
+        independently. Formulas caught in a reference cycle are appended
+        as a final level.
+
+        Returns:
+            list: Lists of (row, col) formula cells, in evaluation order
+        """
+        precedents, dependents, _ = self._formula_graph()
+        pending = {cell: len(precedents.get(cell, ())) for cell in self.formulas}
+
+        levels = []
+        current = [cell for cell, count in pending.items() if count == 0]
+        while current:
+            levels.append(current)
+            following = []
+            for cell in current:
+                for dependent in dependents.get(cell, ()):
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        following.append(dependent)
+            current = following
+
+        cyclic = [cell for cell, count in pending.items() if count > 0]
+        if cyclic:
+            levels.append(cyclic)
+        return levels
+
+    def _formula_graph(self):
+        """
+        Dependency graph of the formula cells, rebuilt when the formulas change
+
+        Cells sharing a template are linked together, with array lookups.
+
+        Returns:
+            tuple: (precedents, dependents, readers) - {cell: formula cells it
+                   reads}, {cell: formula cells reading it} (cells without
+                   links are left out) and
+                   {col: (r1 array, r2 array, cells)} listing the row span each
+                   formula reads in each column
+        """
+        cached = self._formula_graph_cache
+        if cached is not None and cached[0] == self._formulas_version:
+            return cached[1]
+
+        cells = list(self.formulas)
+        count = len(cells)
+        all_rows = np.fromiter((row for row, _ in cells), dtype=np.int64, count=count)
+        all_cols = np.fromiter((col for _, col in cells), dtype=np.int64, count=count)
+        # Formula cells as sorted row * 2^24 + col keys, and by column, so lookups can bisect
+        keys = np.sort(all_rows * (1 << 24) + all_cols)
+        by_column = {}
+        for col in np.unique(all_cols).tolist():
+            by_column[col] = np.sort(all_rows[all_cols == col])
+
+        groups = {}
+        templates = {}
+        for index, (cell, formula) in enumerate(self.formulas.items()):
+            try:
+                template = self._cell_template(cell, formula)
+            except Exception:
+                continue
+            templates[cell] = (formula, template)
+            groups.setdefault(template, []).append(index)
+
+        precedents = {}  # Only cells with links get an entry
+        dependents = {}
+        spans = {}  # {col: [(r1 array, r2 array, formula indexes)]}
+        for template, members in groups.items():
+            members = np.array(members, dtype=np.int64)
+            cols = all_cols[members]
+            for dr1, dc1, dr2, dc2 in _template_parts(template)[1]:
+                for dc in range(dc1, dc2 + 1):
+                    read_cols = cols + dc
+                    for col in np.unique(read_cols).tolist():
+                        at = members if len(members) == 1 else members[read_cols == col]
+                        r1, r2 = all_rows[at] + dr1, all_rows[at] + dr2
+                        spans.setdefault(col, []).append((r1, r2, at))
+                        formula_rows = by_column.get(col)
+                        if formula_rows is None:
+                            continue
+                        if dr1 == dr2:
+                            position = np.minimum(np.searchsorted(keys, r1 * (1 << 24) + col),
+                                                  len(keys) - 1)
+                            hits = np.flatnonzero(keys[position] == r1 * (1 << 24) + col)
+                            links = [(at[i], int(r1[i])) for i in hits.tolist()]
+                        else:
+                            lo = np.searchsorted(formula_rows, r1)
+                            hi = np.searchsorted(formula_rows, r2 + 1)
+                            links = [(at[i], int(row)) for i in np.flatnonzero(hi > lo).tolist()
+                                     for row in formula_rows[lo[i]:hi[i]]]
+                        for index, row in links:
+                            cell, precedent = cells[index], (row, col)
+                            if precedent != cell and precedent not in precedents.get(cell, ()):
+                                precedents.setdefault(cell, set()).add(precedent)
+                                dependents.setdefault(precedent, []).append(cell)
+
+        readers = {}
+        for col, parts in spans.items():
+            at = np.concatenate([part[2] for part in parts])
+            readers[col] = (np.concatenate([part[0] for part in parts]),
+                            np.concatenate([part[1] for part in parts]),
+                            [cells[index] for index in at.tolist()])
+
+        graph = (precedents, dependents, readers)
+        self._formula_graph_cache = (self._formulas_version, graph)
+        self._formula_templates = templates  # Forget the templates of removed formulas
+        return graph
+
+    def _cell_template(self, cell, formula):
+        """Shared R1C1 template of the formula in data cell `cell`, remembered per cell"""
+        entry = self._formula_templates.get(cell)
+        if entry is not None and entry[0] == formula:
+            return entry[1]
+        template = _relative_formula(formula, *cell)
+        self._formula_templates[cell] = (formula, template)
+        return template
+
+    def enable_lazy_recalc(self, enable=True):
+        """
+        Evaluate formulas only when their values are needed
+
+        In lazy mode an edit just marks the formulas that depend on it as
+        dirty, and recalculate_all() marks every formula. A dirty formula is
+        evaluated when its cell is drawn, when another formula reads it, or
+        when the table's values are read (get_values(), get_cell(), copy,
+        find, sort, filter). Results are kept until an input changes, so
+        large formula sheets only pay for what is on screen.
+
+        Args:
+            enable (bool): Turn lazy recalculation on or off; turning it off
+                           evaluates every dirty formula
+        """
+        self.lazy_recalc = enable
+        if not enable:
+            self._resolve_formulas()
+
+    def _mark_dependents_dirty(self, row, col):
+        """Mark the formulas reading data cell (row, col), directly or not, as dirty"""
+        if not self.formulas:
+            return
+        _, dependents, readers = self._formula_graph()
+        dirty = self._dirty_formulas
+        stack = []
+        if col in readers:
+            r1, r2, cells = readers[col]
+            stack = [cells[i] for i in np.flatnonzero((r1 <= row) & (row <= r2)).tolist()
+                     if cells[i] != (row, col)]
+        while stack:
+            cell = stack.pop()
+            if cell in dirty:
+                continue  # Its dependents are already dirty
+            dirty.add(cell)
+            stack.extend(dependents.get(cell, ()))
+        self._resolve_visible_formulas()
+
+    def _recalculate_written(self, written, cells=()):
+        """
+        Bring formulas up to date after values were written to some data cells
+
+        Only the column formulas reading a written column are rerun, and
+        only the cell formulas reading a written cell (directly or not) are
+        marked dirty; they are then evaluated, or in lazy mode just those
+        on screen.
+
+        Args:
+            written (dict): {col: data rows written}
+            cells (iterable): Formula cells written along with the values,
+                              evaluated as well
+        """
+        if any(col in written for col in self._column_formula_inputs()):
+            for col, rows in self._refresh_column_formulas().items():
+                written[col] = rows if col not in written else np.concatenate((written[col], rows))
+        if not self.spreadsheet_mode or not self.formulas:
+            return
+        _, dependents, readers = self._formula_graph()
+        dirty = self._dirty_formulas
+        stack = [cell for cell in cells if cell in self.formulas]
+        for col, rows in written.items():
+            if col not in readers:
+                continue
+            rows = np.unique(rows)
+            r1, r2, cells = readers[col]
+            # A formula is hit when a written row falls inside the span it reads
+            hit = np.searchsorted(rows, r2, side='right') > np.searchsorted(rows, r1)
+            stack.extend(cells[i] for i in np.flatnonzero(hit).tolist())
+        marked = []
+        while stack:
+            cell = stack.pop()
+            if cell in dirty:
+                continue
+            dirty.add(cell)
+            marked.append(cell)
+            stack.extend(dependents.get(cell, ()))
+        if self.lazy_recalc:
+            self._resolve_visible_formulas()
+        else:
+            self._resolve_formulas(marked)
+
+    def _resolve_visible_formulas(self):
+        """Evaluate the dirty formulas of the cells on screen"""
+        if self._dirty_formulas:
+            self._resolve_formulas([(self._data_row(row), col) for row, col in self.cells])
+
+    def _resolve_formulas(self, cells=None, columns=None):
+        """
+        Evaluate dirty formulas before their values are read
+
+        The dirty formulas they read are evaluated first, in dependency
+        order; formulas caught in a reference cycle are evaluated once.
+
+        Args:
+            cells: Data cells about to be read (default: every dirty formula)
+            columns: Read whole columns instead of cells
+        """
+        dirty = self._dirty_formulas
+        if not dirty:
+            return
+        if cells is None:
+            cells = list(dirty) if columns is None else [cell for cell in dirty if cell[1] in columns]
+        pending = [cell for cell in cells if cell in dirty]
+        if not pending:
+            return
+
+        precedents = self._formula_graph()[0]
+        order = []
+        seen = set()
+        stack = [(cell, False) for cell in pending]
+        while stack:
+            cell, expanded = stack.pop()
+            if expanded:
+                order.append(cell)
+                continue
+            if cell in seen:
+                continue
+            seen.add(cell)
+            stack.append((cell, True))
+            stack.extend((precedent, False) for precedent in precedents.get(cell, ())
+                         if precedent in dirty and precedent not in seen)
+
+        for cell in order:
+            dirty.discard(cell)
+            formula = self.formulas.get(cell)
+            if formula:  # Formulas removed since they were marked are skipped
+                self._show_formula_result(*cell, self._calculate_formula(formula, cell))
+
     def process_cell_edit(self, row, col):
         """Handle cell content changes"""
-        content = self.cells[(row, col)]['text'].get("1.0", "end-1c")
+        cell = self.cells.get((row, col))
+        if cell is None or not cell['text'].edit_modified():
+            return  # Nothing was typed since the value was displayed
+        if self._store.read_only:
+            self._render_cell(row, col)  # Discard the edit
+            return
+        content = cell['text'].get("1.0", "end-1c")
+        cell['text'].edit_modified(False)
+        row = self._data_row(row)
+        self._store.set(row, col, content)
+        self._refresh_column_formulas()
         
         if self.spreadsheet_mode and content.startswith('='):
             self.formulas[(row, col)] = content
+            self._formulas_version += 1
             self._evaluate_cell(row, col)
         else:
             if (row, col) in self.formulas:
                 del self.formulas[(row, col)]
+                self._formulas_version += 1
             if (row, col) in self.calculated_values:
                 del self.calculated_values[(row, col)]
             self._update_dependencies(row, col)
 
-    def _evaluate_cell(self, row, col):
+    def _evaluate_cell(self, row, col, propagate=True):
         """Calculate and display formula result"""
         if not self.spreadsheet_mode:
             return
             
         formula = self.formulas.get((row, col), "")
         if formula:
+            self._dirty_formulas.discard((row, col))
+            if self._dirty_formulas:
+                # Bring the formulas it reads up to date first
+                self._resolve_formulas(self._formula_graph()[0].get((row, col), ()))
             result = self._calculate_formula(formula, (row, col))
-            self.calculated_values[(row, col)] = result
-            self.cells[(row, col)]['text'].delete("1.0", "end")
-            self.cells[(row, col)]['text'].insert("1.0", str(result))
-            self._update_dependencies(row, col)
+            self._show_formula_result(row, col, result)
+            if propagate:
+                self._update_dependencies(row, col)
+
+    def _show_formula_result(self, row, col, result):
+        """Store a computed formula value and display it in its cell"""
+        self.calculated_values[(row, col)] = result
+        self._store.set(row, col, str(result))
+        self._render_cell(self._view_row(row), col)
 
     def enable_spreadsheet_mode(self, enable=True):
         """Toggle spreadsheet functionality and references"""
         self.spreadsheet_mode = enable
+        self._journal_layout_soon()
         
         # Show/hide headers
         if enable:
-            self._init_cell_references()
             self._setup_reference_headers()
             self.recalculate_all()
         else:
             self._remove_reference_headers()
             self.formulas.clear()
+            self._formulas_version += 1
             self.calculated_values.clear()
+            self._dirty_formulas.clear()
         
         self.refresh_grid()
 
     def _setup_reference_headers(self):
-        """Create reference headers"""
-        # Column headers (A, B, C...)
-        for col in range(self.cols):
-            header = ttk.Label(
-                self.grid_frame,
-                text=chr(65 + col),
-                width=self.cell_width//7,
-                anchor='center',
-                style='Header.TLabel'
-            )
-            header.grid(row=0, column=col+1, sticky='nsew')
-            self.col_headers.append(header)
-        
-        # Row headers (1, 2, 3...)
-        for row in range(self.rows):
-            header = ttk.Label(
-                self.grid_frame,
-                text=str(row + 1),
-                width=4,
-                anchor='e',
-                style='Header.TLabel'
-            )
-            header.grid(row=row+1, column=0, sticky='nsew')
-            self.row_headers.append(header)
-        
-        # Reposition canvas
-        self.canvas.grid(
-            row=1, 
-            column=1, 
-            columnspan=self.cols, 
-            rowspan=self.rows, 
-            sticky='nsew'
-        )
+        """Show reference headers"""
+        self.col_header_canvas.grid(row=0, column=1, sticky='ew')
+        self.row_header_canvas.grid(row=1, column=0, sticky='ns')
+        self.row_header_canvas.configure(width=self._row_header_width())
+        
+        # Start out aligned with the table canvas
+        region = self.canvas.cget('scrollregion')
+        self.col_header_canvas.configure(scrollregion=region)
+        self.row_header_canvas.configure(scrollregion=region)
+        self.col_header_canvas.xview_moveto(self.canvas.xview()[0])
+        self.row_header_canvas.yview_moveto(self.canvas.yview()[0])
+        self._draw_reference_headers()
 
     def _remove_reference_headers(self):
-        """Remove reference headers"""
-        for header in self.col_headers + self.row_headers:
-            header.destroy()
-        self.col_headers = []
-        self.row_headers = []
-        
-        # Reposition canvas
-        self.canvas.grid(
-            row=0, 
-            column=0, 
-            columnspan=self.cols + 1, 
-            rowspan=self.rows + 1, 
-            sticky='nsew'
-        )
+        """Hide reference headers"""
+        self.col_header_canvas.delete('all')
+        self.row_header_canvas.delete('all')
+        self.col_header_canvas.grid_remove()
+        self.row_header_canvas.grid_remove()
 
     def recalculate_all(self):
-        """Force recalculation of all formulas"""
-        for (row, col) in self.formulas:
-            self._evaluate_cell(row, col)
+        """Force recalculation of all formulas, also after self.formulas was edited directly"""
+        self._formulas_version += 1
+        self._refresh_column_formulas()
+        if not self.spreadsheet_mode or not self.formulas:
+            return
+        if self.lazy_recalc:
+            self._dirty_formulas = set(self.formulas)
+            self._resolve_visible_formulas()
+            return
+        if (self.parallel_recalc
+                and len(self.formulas) >= self.parallel_recalc_threshold):
+            self._recalculate_parallel()
+            return
+        # Evaluate in dependency order so every formula runs exactly once
+        for level in self._formula_levels():
+            self._evaluate_level(level)
+
+    def set_column_formula(self, column, formula, start_row=0, end_row=None):
+        """
+        Compute a whole column (or a block of its rows) from one formula
+
+        Bare column letters stand for the column's values row by row, so
+        "=A*B+1" is evaluated as a single array expression over columns A
+        and B. Functions and A1 references work as in cell formulas, e.g.
+        "=A/SUM(A)" or "=IF(B>0,A/B,0)". The column is recomputed whenever
+        an input column changes, rewriting only the rows whose result
+        changed; rows where an input is empty or not a number come out
+        empty. Works with or without spreadsheet mode.
+
+        Args:
+            column: Column index or letter receiving the results
+            formula (str): Formula text starting with '='
+            start_row (int): First data row computed
+            end_row (int): Data row after the last one (default: the last
+                           row, following the table as it grows)
+
+        Examples:
+            table.set_column_formula('C', '=A*B+1')
+            table.set_column_formula('D', '=ROUND(C/SUM(C)*100,1)')
+        """
+        self._check_writable()
+        col = _column_index(column) if isinstance(column, str) else column
+        if not 0 <= col < self.cols:
+            raise IndexError(f"Column {col} out of bounds (table has {self.cols} columns)")
+        if not formula.startswith('='):
+            formula = '=' + formula
+        _compile_column_formula(formula)  # Raise on syntax errors now
+
+        self._commit_focused_edit()
+        self.save_state(f"Set formula of column {_column_letter(col)}")
+        # One formula replaces the per-cell formulas of the rows it covers
+        stop = self._store.rows if end_row is None else end_row
+        for key in [(r, c) for r, c in self.formulas if c == col and start_row <= r < stop]:
+            del self.formulas[key]
+            self.calculated_values.pop(key, None)
+            self._formulas_version += 1
+        self.column_formulas[col] = (formula, start_row, end_row)
+        self._column_results.pop(col, None)
+        self._refresh_column_formulas()
+
+    def clear_column_formula(self, column):
+        """Stop computing a column; its current values are kept"""
+        col = _column_index(column) if isinstance(column, str) else column
+        self.column_formulas.pop(col, None)
+        self._column_results.pop(col, None)
+        self._journal_layout_soon()
+
+    def _refresh_column_formulas(self):
+        """
+        Recompute the column formulas whose inputs changed since they last ran
+
+        Returns:
+            dict: {col: data rows rewritten}
+        """
+        written = {}
+        if not self.column_formulas:
+            return written
+        for col, error in self._column_formula_order():
+            formula, start, stop = self.column_formulas[col]
+            stop = self._store.rows if stop is None else min(stop, self._store.rows)
+            start = min(start, stop)
+            code, inputs = _compile_column_formula(formula)
+            self._resolve_formulas(columns=inputs)
+            key = (start, stop, tuple(
+                self._store.versions[c] if c < self._store.cols else None for c in inputs))
+            previous = self._column_results.get(col)
+            if previous is not None and previous[0] == key:
+                continue
+            if error is None:
+                result = self._evaluate_column_formula(code, start, stop)
+            else:
+                result = np.full(stop - start, f"#ERROR: {error}", dtype=object)
+            old = previous[1] if previous is not None else None
+            written[col] = self._write_column_result(col, start, result, old)
+            self._column_results[col] = (key, result)
+        return written
+
+    def _column_formula_inputs(self):
+        """Columns read by any valid column formula"""
+        inputs = set()
+        for formula, _, _ in self.column_formulas.values():
+            try:
+                inputs.update(_compile_column_formula(formula)[1])
+            except Exception:
+                pass
+        return inputs
+
+    def _column_formula_order(self):
+        """
+        Column formulas in dependency order
+
+        Returns:
+            list: (col, error) pairs; error is set for formulas that can't
+                  run (circular references, invalid formulas)
+        """
+        inputs = {}
+        order = []
+        for col, (formula, _, _) in self.column_formulas.items():
+            try:
+                inputs[col] = {c for c in _compile_column_formula(formula)[1]
+                               if c in self.column_formulas}
+            except Exception as e:
+                order.append((col, str(e)))
+        pending = dict(inputs)
+        while pending:
+            ready = [col for col, needs in pending.items() if not needs & pending.keys()]
+            if not ready:
+                order.extend((col, "circular reference") for col in pending)
+                break
+            for col in ready:
+                order.append((col, None))
+                del pending[col]
+        return order
+
+    def _evaluate_column_formula(self, code, start, stop):
+        """
+        Evaluate a compiled column formula over data rows start..stop-1
+
+        Returns:
+            np.ndarray: float64 results (NaN shows as empty), or an object
+                        array of text results
+        """
+        count = stop - start
+
+        def get_column(col):
+            if not 0 <= col < self._store.cols:
+                raise IndexError(f"Column {_column_letter(col)} doesn't exist")
+            rows = np.arange(start, stop)
+            return _Range(self._store.numeric(col)[start:stop],
+                          lambda: self._store.values(rows, col))
+
+        namespace = dict(_FORMULA_FUNCTIONS)
+        namespace.update(_ref=self._formula_value, _range=self._formula_range, _col=get_column)
+        try:
+            with np.errstate(all='ignore'):
+                result = eval(code, {'__builtins__': {}}, namespace)
+            if isinstance(result, _Range):
+                result = result.numbers
+            result = np.asarray(result)
+            if result.ndim == 0:
+                result = np.full(count, result.item(), dtype=result.dtype if result.dtype.kind in 'biuf' else object)
+            result = result.reshape(-1)
+            if len(result) != count:
+                raise ValueError("result doesn't have one value per row")
+        except Exception as e:
+            return np.full(count, f"#ERROR: {str(e)}", dtype=object)
+        if result.dtype.kind in 'iuf':
+            return result.astype(np.float64)
+        # Text and True/False results are shown as Python would print them
+        return np.array([str(value) for value in result.tolist()], dtype=object)
+
+    def _write_column_result(self, col, start, result, old=None):
+        """Store a column formula's results, writing only the rows that changed; returns those rows"""
+        if old is not None and len(old) == len(result) and old.dtype == result.dtype:
+            if result.dtype == object:
+                changed = result != old
+            else:
+                changed = ~((result == old) | (np.isnan(result) & np.isnan(old)))
+            offsets = np.flatnonzero(changed)
+        else:
+            offsets = np.arange(len(result))
+        rows = start + offsets
+        if not len(offsets):
+            return rows
+        values = result[offsets]
+        if result.dtype == object:
+            self._store.set_many(rows, col, values)
+        else:
+            self._store.set_many(rows, col, _format_values(values))
+            self._store.prime_numeric(col, rows, values)
+        for row, c in self.cells:
+            if c == col:
+                self._render_cell(row, col, truncate=(row, col) not in self.selected_cells)
+        return rows
+
+    def enable_parallel_recalc(self, enable=True, max_workers=None,
+                               threshold=10000, chunk_size=2000):
+        """
+        Opt in to multi-core recalculation for large formula sheets
+
+        When enabled, recalculate_all() splits the formulas into dependency
+        levels and evaluates each level in a ProcessPoolExecutor. Cell values
+        are shared with the workers through a shared-memory float grid; only
+        the text values a batch actually reads are pickled.
+
+        Args:
+            enable (bool): Turn the process-pool backend on or off
+            max_workers (int): Worker processes (default: CPU count)
+            threshold (int): Minimum formula count before the pool is used
+            chunk_size (int): Formulas per submitted batch
+        """
+        if not enable or max_workers != self.parallel_recalc_workers:
+            self._shutdown_recalc_executor()
+        self.parallel_recalc = enable
+        self.parallel_recalc_workers = max_workers
+        self.parallel_recalc_threshold = threshold
+        self.parallel_recalc_chunk = max(1, chunk_size)
+
+    def _get_recalc_executor(self):
+        """Lazily start the recalculation process pool"""
+        if self._recalc_executor is None:
+            self._recalc_executor = ProcessPoolExecutor(
+                max_workers=self.parallel_recalc_workers or os.cpu_count())
+        return self._recalc_executor
+
+    def _shutdown_recalc_executor(self):
+        """Stop the recalculation process pool if it is running"""
+        if self._recalc_executor is not None:
+            self._recalc_executor.shutdown(cancel_futures=True)
+            self._recalc_executor = None
+
+    def _formula_input_grid(self):
+        """
+        Snapshot current cell values for formula evaluation
+
+        Returns:
+            tuple: (grid, text_values) - a float64 rows x cols array with
+                   NaN for empty and text cells, plus {(row, col): str} for
+                   cells that hold non-numeric values
+        """
+        grid = np.full((self.rows, self.cols), np.nan)
+        text_values = {}
+        for col in range(self.cols):
+            numeric = self._store.numeric(col)
+            is_number = ~np.isnan(numeric)
+            grid[:, col] = numeric
+            is_text = ~is_number & (self._store.column(col) != '')
+            for row in np.flatnonzero(is_text):
+                text_values[(int(row), col)] = self._store.get(row, col)
+        # Previously computed formula results take precedence
+        for (row, col), value in self.calculated_values.items():
+            if not (0 <= row < self.rows and 0 <= col < self.cols):
+                continue
+            if isinstance(value, (int, float)):
+                grid[row, col] = value
+                text_values.pop((row, col), None)
+            else:
+                text_values[(row, col)] = value
+        return grid, text_values
+
+    def _recalculate_parallel(self):
+        """Evaluate all formulas level by level in the process pool"""
+        levels = self._formula_levels()
+        grid, text_values = self._formula_input_grid()
+        shm = shared_memory.SharedMemory(create=True, size=max(1, grid.nbytes))
+        try:
+            shared = np.ndarray(grid.shape, dtype=np.float64, buffer=shm.buf)
+            shared[:] = grid
+            del grid
+            chunk = self.parallel_recalc_chunk
+            for level in levels:
+                # Other sheets can only be read here, not from the pool
+                linked = [cell for cell in level if _sheet_references(self.formulas[cell])]
+                if linked:
+                    linked_cells = set(linked)
+                    level = [cell for cell in level if cell not in linked_cells]
+                batches = []
+                for start in range(0, len(level), chunk):
+                    cells = level[start:start + chunk]
+                    batches.append([(r, c, self.formulas[(r, c)]) for r, c in cells])
+
+                if len(batches) <= 1:
+                    # Not worth a round-trip through the pool
+                    results = [_evaluate_formula_values(shared, text_values, batch) for batch in batches]
+                else:
+                    executor = self._get_recalc_executor()
+                    by_column = _text_values_by_column(text_values)
+                    futures = [
+                        executor.submit(
+                            _evaluate_formula_batch, shm.name, shared.shape,
+                            self._batch_text_values(batch, by_column), batch)
+                        for batch in batches
+                    ]
+                    results = [future.result() for future in futures]
+                results.append([(r, c, self._calculate_formula(self.formulas[(r, c)], (r, c)))
+                                for r, c in linked])
+
+                # Publish this level's results before the next level reads them
+                for batch_results in results:
+                    for row, col, result in batch_results:
+                        if isinstance(result, (int, float)):
+                            if 0 <= row < self.rows and 0 <= col < self.cols:
+                                shared[row, col] = result
+                            text_values.pop((row, col), None)
+                        else:
+                            text_values[(row, col)] = result
+                        self._show_formula_result(row, col, result)
+            del shared  # Release the buffer export before closing
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _batch_text_values(self, batch, by_column):
+        """
+        Select the text values read by a batch so only those get pickled
+
+        Args:
+            batch: (row, col, formula) triples
+            by_column: Text values from _text_values_by_column()
+        """
+        selected = {}
+        if not by_column:
+            return selected
+        for _, _, formula in batch:
+            for r1, c1, r2, c2 in _formula_ranges(formula):
+                columns = (range(c1, c2 + 1) if c2 - c1 < len(by_column)
+                           else [col for col in by_column if c1 <= col <= c2])
+                for col in columns:
+                    column = by_column.get(col)
+                    if column is None:
+                        continue
+                    rows, values = column
+                    start, stop = np.searchsorted(rows, (r1, r2 + 1)).tolist()
+                    selected.update(zip(zip(rows[start:stop].tolist(), [col] * (stop - start)),
+                                        values[start:stop]))
+        return selected
+
+    def destroy(self):
+        """Destroy the widget and stop background workers"""
+        self._shutdown_recalc_executor()
+        self.disable_autosave()
+        for tag, sequence in self._delegated_events:
+            self.unbind_class(tag, sequence)
+        super().destroy()
 
     def get_cell_reference(self, row, col):
         """Convert (row,col) to A1 notation"""
         if 0 <= row < self.rows and 0 <= col < self.cols:
-            return f"{chr(65 + col)}{row + 1}"
-        return ""
\ No newline at end of file
+            return f"{_column_letter(col)}{row + 1}"
+
+        return ""
+
+class _Sheet:
+    """One sheet of a Workbook: its name and, while not shown, its table state"""
+
+    def __init__(self, name, state):
+        self.name = name
+        self.state = state  # None while the sheet is installed in the table
+        self.seen = {}  # {(sheet key, col): version} of the other-sheet columns its formulas last read
+        self.links = None  # (formulas version, {sheet key: {col: formula cells}}), see Workbook._links
+        self.autosave = None  # Autosave of the sheet while not shown, see Table._suspend_autosave
+
+
+class Workbook(ttk.Frame):
+    """
+    Several sheets shown one at a time in a single Table
+
+    Only the active sheet has widgets: the others are kept as their data
+    and formulas, and switching sheets swaps them in and out of the one
+    Table, so memory grows with the data, not with the number of sheets.
+    Formulas can read other sheets (=Sheet2!A1*2, =SUM('My sheet'!A1:A9));
+    such references are followed across sheets, and formulas reading a
+    sheet that changed are brought up to date when their sheet is shown
+    or read. Autosave (Table.enable_autosave) is per sheet: a sheet's
+    journal keeps running while other sheets are shown.
+
+    Args:
+        parent: Parent widget
+        sheets: Sheet names, or the number of sheets to create
+        rows (int): Rows of new sheets
+        cols (int): Columns of new sheets
+        **kwargs: Passed to Table() (cell_width, theme, spreadsheet_mode, ...)
+    """
+
+    def __init__(self, parent, sheets=1, rows=10, cols=5, **kwargs):
+        super().__init__(parent)
+        self.sheet_rows = rows
+        self.sheet_cols = cols
+        self._sheets = {}  # {upper-case name: _Sheet}, in tab order
+        self._reading = set()  # Cells being read across sheets, to stop at cycles
+        self._refreshing = set()
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.table = Table(self, rows=rows, cols=cols, **kwargs)
+        self.table.workbook = self
+        self.table.grid(row=0, column=0, sticky='nsew')
+        self.tab_bar = ttk.Frame(self)
+        self.tab_bar.grid(row=1, column=0, sticky='ew')
+        self._tab_var = tk.StringVar(self)
+        self._tabs = {}
+
+        names = [f"Sheet{i + 1}" for i in range(sheets)] if isinstance(sheets, int) else list(sheets)
+        if not names:
+            raise ValueError("A workbook needs at least one sheet")
+        first = self._check_name(names[0])
+        self.active_sheet = self._sheets[first.upper()] = _Sheet(first, None)
+        self._installed = self.active_sheet  # Sheet whose state the table holds
+        self._add_tab(first)
+        for name in names[1:]:
+            self.add_sheet(name)
+        self._tab_var.set(first)
+
+    def destroy(self):
+        """Destroy the workbook, closing the autosave journals of the sheets not shown"""
+        for sheet in self._sheets.values():
+            if sheet.autosave is not None:
+                journal, sheet.autosave = sheet.autosave[0], None
+                journal.close()
+        super().destroy()
+
+    def get_sheet_names(self):
+        """Names of the sheets, in tab order"""
+        return [sheet.name for sheet in self._sheets.values()]
+
+    def add_sheet(self, name=None, rows=None, cols=None):
+        """
+        Add an empty sheet after the others
+
+        Args:
+            name (str): Sheet name (default: the next free "SheetN")
+            rows (int): Number of rows (default: the workbook's)
+            cols (int): Number of columns (default: the workbook's)
+
+        Returns:
+            str: The sheet's name
+        """
+        if name is None:
+            number = len(self._sheets) + 1
+            while f"SHEET{number}" in self._sheets:
+                number += 1
+            name = f"Sheet{number}"
+        name = self._check_name(name)
+        store = _ColumnStore(self.sheet_rows if rows is None else rows,
+                             self.sheet_cols if cols is None else cols)
+        self._sheets[name.upper()] = _Sheet(name, self.table._new_sheet_state(store))
+        self._add_tab(name)
+        return name
+
+    def remove_sheet(self, name):
+        """Delete a sheet; formulas reading it show an error"""
+        sheet = self._sheet(name)
+        if len(self._sheets) == 1:
+            raise ValueError("A workbook needs at least one sheet")
+        if sheet is self.active_sheet:
+            names = list(self._sheets)
+            index = names.index(name.upper())
+            self.activate(names[index + 1] if index + 1 < len(names) else names[index - 1])
+        state = sheet.state
+        if sheet.autosave is not None:
+            state['_store'].journal = state['_store'].styles.journal = None
+            sheet.autosave[0].close()
+            sheet.autosave = None
+        for index in state['_indexes'].values():
+            index.close()
+        for attribute in ('_search_index', '_run_index', '_formats'):
+            if state[attribute] is not None:
+                state[attribute].close()
+        del self._sheets[name.upper()]
+        self._tabs.pop(name.upper()).destroy()
+        self._refresh(self.active_sheet)
+
+    def activate(self, name):
+        """Show another sheet"""
+        sheet = self._sheet(name)
+        if sheet is self.active_sheet:
+            return
+        table = self.table
+        table._commit_focused_edit()
+        previous = self.active_sheet
+        previous.autosave = table._suspend_autosave()  # A journal covers the data of one sheet
+        previous.state = table._sheet_state()
+        for attribute in ('_search_index', '_run_index'):
+            if previous.state[attribute] is not None:
+                # Rebuilt if the sheet is searched or navigated again
+                previous.state[attribute].close()
+                previous.state[attribute] = None
+        previous.state['_formula_graph_cache'] = None
+
+        table._set_sheet_state(sheet.state)
+        sheet.state = None
+        self.active_sheet = self._installed = sheet
+        if sheet.autosave is not None:
+            table._resume_autosave(sheet.autosave)
+            sheet.autosave = None
+        table.selection_rect = None
+        table._update_reference_headers()
+        table.create_grid()
+        table._update_canvas_size()
+        self._refresh(sheet)
+        self._tab_var.set(sheet.name)
+
+    def get_values(self, name=None, visible_only=False):
+        """Table.get_values() of any sheet (default: the active one)"""
+        sheet = self.active_sheet if name is None else self._sheet(name)
+        return self._with_sheet(sheet, self.table.get_values, visible_only)
+
+    def _check_name(self, name):
+        name = str(name).strip()
+        if not name or any(char in name for char in '\'"![]'):
+            raise ValueError(f"Invalid sheet name {name!r}")
+        if name.upper() in self._sheets:
+            raise ValueError(f"A sheet named {name!r} already exists")
+        return name
+
+    def _sheet(self, name):
+        sheet = self._sheets.get(name.upper())
+        if sheet is None:
+            raise NameError(f"No sheet named {name}")
+        return sheet
+
+    def _add_tab(self, name):
+        tab = ttk.Radiobutton(self.tab_bar, text=name, value=name, variable=self._tab_var,
+                              style='Toolbutton', command=lambda: self.activate(name))
+        tab.pack(side='left')
+        self._tabs[name.upper()] = tab
+
+    def _with_sheet(self, sheet, function, *args):
+        """
+        Run function(*args) with `sheet` installed in the table
+
+        Nothing is drawn: the table's cell widgets are set aside meanwhile,
+        so a sheet that isn't shown can use the table's formula engine.
+        """
+        if sheet is self._installed:
+            return function(*args)
+        table = self.table
+        previous = self._installed
+        previous.state = table._sheet_state()
+        cells, table.cells = table.cells, {}
+        table._set_sheet_state(sheet.state)
+        sheet.state = None
+        self._installed = sheet
+        try:
+            return function(*args)
+        finally:
+            sheet.state = table._sheet_state()
+            table._set_sheet_state(previous.state)
+            previous.state = None
+            table.cells = cells
+            self._installed = previous
+
+    def _read(self, name, row, col):
+        """Value of data cell (row, col) of a sheet, as seen by formulas of another"""
+        sheet = self._sheet(name)
+        key = (sheet, row, col)
+        if key in self._reading:
+            raise ValueError("circular reference")
+        self._reading.add(key)
+        try:
+            return self._with_sheet(sheet, self._read_installed, lambda: [(row, col)],
+                                    lambda: self.table._formula_value(row, col))
+        finally:
+            self._reading.discard(key)
+
+    def _read_range(self, name, r1, c1, r2, c2):
+        """Data cells r1..r2 x c1..c2 of a sheet as a _Range"""
+        sheet = self._sheet(name)
+        key = (sheet, r1, c1, r2, c2)
+        if key in self._reading:
+            raise ValueError("circular reference")
+        self._reading.add(key)
+        try:
+            cells = lambda: [(row, col) for row, col in self.table._dirty_formulas
+                             if r1 <= row <= r2 and c1 <= col <= c2]
+            return self._with_sheet(sheet, self._read_installed, cells,
+                                    lambda: self.table._formula_range(r1, c1, r2, c2))
+        finally:
+            self._reading.discard(key)
+
+    def _read_installed(self, cells, read):
+        """Bring the cells() about to be read up to date, then read()"""
+        self._refresh(self._installed)
+        if self.table._dirty_formulas:
+            self.table._resolve_formulas(cells())
+        return read()
+
+    def _links(self, sheet):
+        """{sheet key: {col: formula cells reading that column}} of the installed sheet's formulas"""
+        formulas = self.table.formulas
+        version = self.table._formulas_version
+        if sheet.links is not None and sheet.links[0] == version:
+            return sheet.links[1]
+        links = {}
+        for cell, formula in formulas.items():
+            for name, r1, c1, r2, c2 in _sheet_references(formula):
+                columns = links.setdefault(name, {})
+                for col in range(c1, c2 + 1):
+                    columns.setdefault(col, []).append(cell)
+        sheet.links = (version, links)
+        return links
+
+    def _source_versions(self, columns):
+        """Versions of some columns of the installed sheet, after updating their formulas"""
+        table = self.table
+        self._refresh(self._installed)
+        if table._dirty_formulas:
+            table._resolve_formulas(columns=set(columns))
+        store = table._store
+        return {col: (id(store), store.layout_version, store.versions[col]) if col < store.cols else None
+                for col in columns}
+
+    def _refresh(self, sheet):
+        """
+        Recalculate the formulas of the installed sheet whose other-sheet inputs changed
+
+        The sheets read are brought up to date first, so changes reach
+        formulas through any number of sheets.
+        """
+        if sheet in self._refreshing:
+            return  # Sheets reading each other
+        links = self._links(sheet)
+        if not links:
+            return
+        self._refreshing.add(sheet)
+        try:
+            stale = set()
+            for name, columns in links.items():
+                source = self._sheets.get(name)
+                if source is None:
+                    versions = {}
+                elif source is sheet:
+                    continue
+                else:
+                    versions = self._with_sheet(source, self._source_versions, list(columns))
+                for col, cells in columns.items():
+                    version = versions.get(col)
+                    if sheet.seen.get((name, col), ()) != version:
+                        sheet.seen[(name, col)] = version
+                        stale.update(cells)
+        finally:
+            self._refreshing.discard(sheet)
+
+        table = self.table
+        if not stale or not table.spreadsheet_mode:
+            return
+        if table.lazy_recalc:
+            table._dirty_formulas.update(stale)
+            for cell in stale:
+                table._mark_dependents_dirty(*cell)
+        else:
+            for cell in sorted(stale):
+                table._evaluate_cell(*cell)